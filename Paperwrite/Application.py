@@ -10,14 +10,46 @@
 # also parses the arguments from the command line.
 
 # -- STL
+import os
 from argparse import ArgumentParser, Namespace
 from typing import NamedTuple
 
 # -- PROJECT
 from Paperwrite.Configuration import Configuration
+from Paperwrite.Kng.Cache import EXTRACTOR_VERSION, ExtractionCache
+from Paperwrite.Kng.Graph import GraphCache
+from Paperwrite.Kng.Jobs import JobQueue
+from Paperwrite.Kng.Models import ModelCache
+from Paperwrite.Kng.Nlp import NlpRegistry
+from Paperwrite.Kng.Similarity import SimilarityCache
+from Paperwrite.Kng.Tika import TikaPool
+from Paperwrite.Kng.Training import TrainingQueue
 from Paperwrite.PyAdditions import Io
 from Paperwrite.PyAdditions.Types import Singleton
 
+##
+# Command for serving the API.
+COMMAND_SERVE = "serve"
+
+##
+# Command for converting all KNGs of the store into the current format.
+COMMAND_MIGRATE_STORE = "migrate-store"
+
+##
+# Command for benchmarking model trainings (see Paperwrite.Kng.Benchmark).
+COMMAND_BENCHMARK_TRAINING = "benchmark-training"
+
+##
+# Command for benchmarking route matching (see Paperwrite.RouterBenchmark).
+COMMAND_BENCHMARK_ROUTER = "benchmark-router"
+
+##
+# All commands known by the CLI.
+COMMANDS = [
+    COMMAND_SERVE, COMMAND_MIGRATE_STORE, COMMAND_BENCHMARK_TRAINING,
+    COMMAND_BENCHMARK_ROUTER
+]
+
 
 ##
 # This class will parse the cli for arguments predefined in `__init__` function
@@ -25,6 +57,11 @@ from Paperwrite.PyAdditions.Types import Singleton
 #
 # ```{.bash}
 # usage: pate-wapi [-h] [-c CONF]
+#                  [{serve,migrate-store,benchmark-training,benchmark-router}]
+#
+# positional arguments:
+#   {serve,migrate-store,benchmark-training,benchmark-router}
+#                         command to run (default: serve)
 #
 # optional arguments:
 #   -h, --help            show this help message and exit
@@ -50,6 +87,12 @@ class CLIArgumentParser():
                              default="ppw.yml",
                              required=False,
                              help="set custom filepath to configuration file")
+    self.parser.add_argument("command",
+                             type=str,
+                             nargs="?",
+                             default=COMMAND_SERVE,
+                             choices=COMMANDS,
+                             help="command to run (default: serve)")
 
   ##
   # Parse arguments from CLI.
@@ -63,12 +106,19 @@ class CLIArgumentParser():
 class StorageLocations(NamedTuple):
   Temporary: str
   Mutable: str
+  Cache: str
+  Jobs: str
 
 
 STORAGE_LOCATIONS = dict(
-    LOCAL=StorageLocations(Temporary="tmp", Mutable="store"),
+    LOCAL=StorageLocations(Temporary="tmp",
+                           Mutable="store",
+                           Cache=os.path.join("store", ".cache"),
+                           Jobs=os.path.join("store", ".jobs")),
     GLOBAL=StorageLocations(Temporary="/tmp/ppw-api-pdf-cache",
-                            Mutable="store"),
+                            Mutable="store",
+                            Cache=os.path.join("store", ".cache"),
+                            Jobs=os.path.join("store", ".jobs")),
 )
 
 
@@ -83,8 +133,53 @@ class ApplicationContext(Singleton):
   # Configuration parsed from configuration file.
   Config: Configuration
 
+  ##
+  # @var Command
+  # Command to run, parsed from CLI.
+  Command: str
+
   Store: StorageLocations
 
+  ##
+  # @var Nlp
+  # Registry of spaCy pipelines shared by all request threads.
+  Nlp: NlpRegistry
+
+  ##
+  # @var Tika
+  # Pool of local Tika servers used for parsing documents.
+  Tika: TikaPool
+
+  ##
+  # @var Cache
+  # Content-addressed cache of extraction results.
+  Cache: ExtractionCache
+
+  ##
+  # @var Graphs
+  # Memory mapped graphs of the store shared by all request threads.
+  Graphs: GraphCache
+
+  ##
+  # @var Jobs
+  # Persistent queue of background jobs.
+  Jobs: JobQueue
+
+  ##
+  # @var Training
+  # Queue of model trainings running in worker processes.
+  Training: TrainingQueue
+
+  ##
+  # @var Models
+  # Cache of restored models shared by all request threads.
+  Models: ModelCache
+
+  ##
+  # @var Similarity
+  # Memory mapped similarity indices shared by all request threads.
+  Similarity: SimilarityCache
+
   ##
   # Constructor. Is called on `Init()` from inherited Singleton class.
   def __init__(self) -> None:
@@ -94,12 +189,39 @@ class ApplicationContext(Singleton):
 
     # map information to members
     self.Config = Configuration(cliArgs.conf)
+    self.Command = cliArgs.command
 
     # configure io package
     Io.Configure(self.Config.Io)
 
     self.Store = STORAGE_LOCATIONS[self.Config.StorageOption]
 
+    # pipelines are loaded on first use or by `Preload()` on startup
+    self.Nlp = NlpRegistry(self.Config.Nlp, self.Config.Extraction.BatchSize)
+
+    # servers are started by `Start()` on startup
+    self.Tika = TikaPool(self.Config.Tika)
+
+    # cached results are only valid for the same extractor and model
+    self.Cache = ExtractionCache(self.Store.Cache, self.Config.Cache.MaxSize,
+                                 f"{EXTRACTOR_VERSION}-{self.Config.Nlp.Model}")
+
+    # graphs are mapped on first access
+    self.Graphs = GraphCache()
+
+    # workers are started by `Start()` on startup
+    self.Jobs = JobQueue(self.Config.Jobs,
+                         os.path.join(self.Store.Jobs, "jobs.sqlite"))
+
+    # dispatcher is started by `Start()` on startup
+    self.Training = TrainingQueue(self.Config.Training, self.Store.Mutable)
+
+    # models are restored on first prediction
+    self.Models = ModelCache(self.Config.Models)
+
+    # indices are mapped on first query
+    self.Similarity = SimilarityCache()
+
 
 ##
 # This is the application context object export for easier use and initializes
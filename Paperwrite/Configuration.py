@@ -31,6 +31,8 @@
 #   host: "127.0.0.1"
 #   port: 44997
 #   api-prefix: ""
+#   preload_handlers: false
+#   workers: 0
 #
 # jwt-rs256:
 #   private_key: "/jwt_rs256"
@@ -42,6 +44,63 @@
 #   log_filepath: "pate-wapi-<ISO datetime>.log"
 #   #log_directory: "/tmp"
 #   log_stream: "sys:stderr"
+#
+# extraction:
+#   batch_size: 256
+#   workers: 1
+#   chunk_size: 65536
+#   window_size: 131072
+#
+# nlp:
+#   model: "en_core_web_sm"
+#   exclude: ["ner", "lemmatizer"]
+#   instances: 2
+#   preload: true
+#
+# tika:
+#   pool_size: 2
+#   host: "127.0.0.1"
+#   base_port: 9998
+#   java: "java"
+#   jar_path: ""
+#   startup_timeout: 60
+#
+# cache:
+#   max_size_mb: 512
+#
+# jobs:
+#   workers: 1
+#
+# training:
+#   workers: 1
+#   profile: "default"
+#   profiles:
+#     default:
+#       k: 1000
+#       batches_count: 1
+#       epochs: 200
+#       seed: 555
+#       optimizer: "adam"
+#       learning_rate: 0.0005
+#       early_stopping: false
+#       validation_size: 0.05
+#       burn_in: 50
+#       check_interval: 10
+#       stop_interval: 3
+#       criteria: "mrr"
+#       warm_epochs: 20
+#
+# models:
+#   max_size_mb: 1024
+#   preload: false
+#   max_batch_size: 1000
+#
+# benchmark:
+#   kngs: []
+#   scales: [1, 4, 16]
+#   profiles: []
+#   epochs: 0
+#   output: "benchmark-training.json"
 # ~~~
 #
 # @see
@@ -49,12 +108,21 @@
 #  - DatabaseConfiguration
 #  - JwtRS256Configuration
 #  - IoConfiguration
+#  - ExtractionConfiguration
+#  - NlpConfiguration
+#  - TikaConfiguration
+#  - CacheConfiguration
+#  - JobsConfiguration
+#  - TrainingConfiguration
+#  - TrainingProfile
+#  - ModelsConfiguration
+#  - BenchmarkConfiguration
 
 # -- STL
 import os
 import sys
 from datetime import datetime
-from typing import NamedTuple
+from typing import Any, Dict, List, NamedTuple
 
 # -- LIBRARY
 import yaml
@@ -69,6 +137,10 @@ import yaml
 # @param  Port  `int` -- Port of current host on which the server should be
 # listening
 # @param  ApiPrefix  `str` -- Prefix of api that is added in front of all path's
+# @param  PreloadHandlers   `bool` -- Import all handlers on startup, instead of
+# on their first request
+# @param  Workers   `int` -- Number of forked worker processes serving requests
+# (0 serves from a single process, see Paperwrite.Prefork)
 #
 # @par Configuration (defaults)
 # ~~~{.py}
@@ -76,6 +148,8 @@ import yaml
 #   host: "127.0.0.1"
 #   port: 44997
 #   api-prefix: ""
+#   preload_handlers: false
+#   workers: 0
 # ~~~
 #
 # @see
@@ -84,6 +158,8 @@ class WebserverConfiguration(NamedTuple):
   Host: str
   Port: int
   ApiPrefix: str
+  PreloadHandlers: bool
+  Workers: int
 
 
 ##
@@ -113,6 +189,307 @@ class IoConfiguration(NamedTuple):
   LogStream: str
 
 
+##
+# Representation of configurable parameters for the extraction of triples from
+# documents.
+#
+# @param  BatchSize  `int` -- Number of sentences parsed together by spaCy
+# @param  Workers  `int` -- Number of processes sentences are sharded across (1
+# extracts inside of the request thread)
+# @param  ChunkSize  `int` -- Number of characters of a document, that are
+# cleaned up at once
+# @param  WindowSize  `int` -- Number of characters of a document, that are
+# segmented into sentences at once
+#
+# @par Configuration (defaults)
+# ~~~{.py}
+# extraction:
+#   batch_size: 256
+#   workers: 1
+#   chunk_size: 65536
+#   window_size: 131072
+# ~~~
+#
+# @see
+#  - Paperwrite.Configuration
+class ExtractionConfiguration(NamedTuple):
+  BatchSize: int
+  Workers: int
+  ChunkSize: int
+  WindowSize: int
+
+
+##
+# Representation of configurable parameters for the spaCy pipelines.
+#
+# @param  Model  `str` -- Name or path of spaCy model used for parsing
+# @param  Exclude  `List[str]` -- Components of model, that are not loaded
+# @param  Instances  `int` -- Number of instances loaded per pipeline, which can
+# be used by request threads at the same time
+# @param  Preload  `bool` -- Load all pipelines on startup
+#
+# @par Configuration (defaults)
+# ~~~{.py}
+# nlp:
+#   model: "en_core_web_sm"
+#   exclude: ["ner", "lemmatizer"]
+#   instances: 2
+#   preload: true
+# ~~~
+#
+# @see
+#  - Paperwrite.Configuration
+class NlpConfiguration(NamedTuple):
+  Model: str
+  Exclude: List[str]
+  Instances: int
+  Preload: bool
+
+
+##
+# Representation of configurable parameters for the pool of local Apache Tika
+# servers used for parsing documents.
+#
+# @param  PoolSize  `int` -- Number of Tika servers (0 lets the tika library
+# manage a single server on its own)
+# @param  Host  `str` -- Host the Tika servers listen on
+# @param  BasePort  `int` -- Port of first Tika server, the others use the
+# following ports
+# @param  Java  `str` -- Path to java executable
+# @param  JarPath  `str` -- Path to tika-server jar (empty uses the jar of the
+# tika library)
+# @param  StartupTimeout  `float` -- Seconds to wait for a server to get healthy
+#
+# @par Configuration (defaults)
+# ~~~{.py}
+# tika:
+#   pool_size: 2
+#   host: "127.0.0.1"
+#   base_port: 9998
+#   java: "java"
+#   jar_path: ""
+#   startup_timeout: 60
+# ~~~
+#
+# @see
+#  - Paperwrite.Configuration
+class TikaConfiguration(NamedTuple):
+  PoolSize: int
+  Host: str
+  BasePort: int
+  Java: str
+  JarPath: str
+  StartupTimeout: float
+
+
+##
+# Representation of configurable parameters for the content-addressed cache of
+# extraction results.
+#
+# @param  MaxSize  `int` -- Maximum size of cache in bytes (0 disables cache)
+#
+# @par Configuration (defaults)
+# ~~~{.py}
+# cache:
+#   max_size_mb: 512
+# ~~~
+#
+# @see
+#  - Paperwrite.Configuration
+class CacheConfiguration(NamedTuple):
+  MaxSize: int
+
+
+##
+# Representation of configurable parameters for the persistent queue of
+# background jobs.
+#
+# @param  Workers  `int` -- Number of jobs processed at the same time
+#
+# @par Configuration (defaults)
+# ~~~{.py}
+# jobs:
+#   workers: 1
+# ~~~
+#
+# @see
+#  - Paperwrite.Configuration
+class JobsConfiguration(NamedTuple):
+  Workers: int
+
+
+##
+# Representation of a named set of hyperparameters for training ComplEx models.
+#
+# @param  K   `int` -- Dimension of embeddings
+# @param  BatchesCount  `int` -- Number of batches the triples are split into
+# per epoch, more batches need less memory
+# @param  Epochs  `int` -- Maximum number of epochs
+# @param  Seed  `int` -- Seed of random number generators
+# @param  Optimizer   `str` -- Optimizer of ampligraph (`adam`, `adagrad`,
+# `sgd`, `momentum`)
+# @param  LearningRate  `float` -- Learning rate of optimizer
+# @param  EarlyStopping   `bool` -- Stop training, as soon as the score on a
+# validation split does not improve anymore
+# @param  ValidationSize  `float` -- Fraction of triples held out for early
+# stopping
+# @param  BurnIn  `int` -- Number of epochs before early stopping is checked
+# @param  CheckInterval   `int` -- Number of epochs between two checks
+# @param  StopInterval  `int` -- Number of checks without improvement, after
+# which training stops
+# @param  Criteria  `str` -- Metric of early stopping (`mrr`, `hits1`,
+# `hits3`, `hits10`)
+# @param  WarmEpochs  `int` -- Number of epochs a warm started training
+# fine-tunes the previous model
+#
+# @par Configuration (defaults)
+# ~~~{.py}
+# training:
+#   profiles:
+#     default:
+#       k: 1000
+#       batches_count: 1
+#       epochs: 200
+#       seed: 555
+#       optimizer: "adam"
+#       learning_rate: 0.0005
+#       early_stopping: false
+#       validation_size: 0.05
+#       burn_in: 50
+#       check_interval: 10
+#       stop_interval: 3
+#       criteria: "mrr"
+#       warm_epochs: 20
+# ~~~
+#
+# @see
+#  - Paperwrite.Configuration
+#  - TrainingConfiguration
+class TrainingProfile(NamedTuple):
+  K: int
+  BatchesCount: int
+  Epochs: int
+  Seed: int
+  Optimizer: str
+  LearningRate: float
+  EarlyStopping: bool
+  ValidationSize: float
+  BurnIn: int
+  CheckInterval: int
+  StopInterval: int
+  Criteria: str
+  WarmEpochs: int
+
+
+##
+# Parses a training profile from the configuration file.
+#
+# @param  profiled  block of profile from configuration file
+#
+# @return training profile
+def parseTrainingProfile(profiled: Dict[str, Any]) -> TrainingProfile:
+  return TrainingProfile(
+      max(1, int(profiled.get("k", 1000))),
+      max(1, int(profiled.get("batches_count", 1))),
+      max(1, int(profiled.get("epochs", 200))),
+      int(profiled.get("seed", 555)),
+      profiled.get("optimizer", "adam"),
+      float(profiled.get("learning_rate", 0.0005)),
+      bool(profiled.get("early_stopping", False)),
+      min(max(float(profiled.get("validation_size", 0.05)), 0.0), 0.5),
+      max(0, int(profiled.get("burn_in", 50))),
+      max(1, int(profiled.get("check_interval", 10))),
+      max(1, int(profiled.get("stop_interval", 3))),
+      profiled.get("criteria", "mrr"),
+      max(1, int(profiled.get("warm_epochs", 20))),
+  )
+
+
+##
+# Representation of configurable parameters for the queue of model trainings.
+#
+# @param  Workers  `int` -- Number of models trained at the same time, every
+# training runs in its own process
+# @param  Profile   `str` -- Name of profile used, if a training does not
+# select one
+# @param  Profiles  `Dict[str, TrainingProfile]` -- Training profiles by name
+#
+# @par Configuration (defaults)
+# ~~~{.py}
+# training:
+#   workers: 1
+#   profile: "default"
+#   profiles:
+#     default: {}
+# ~~~
+#
+# @see
+#  - Paperwrite.Configuration
+#  - TrainingProfile
+class TrainingConfiguration(NamedTuple):
+  Workers: int
+  Profile: str
+  Profiles: Dict[str, TrainingProfile]
+
+
+##
+# Representation of configurable parameters for the cache of restored models.
+#
+# @param  MaxSize  `int` -- Memory budget of cache in bytes (0 disables cache)
+# @param  Preload   `bool` -- Load models of all KNGs on startup, as long as
+# they fit into the memory budget
+# @param  MaxBatchSize  `int` -- Maximum number of sentences and triples of a
+# single batch prediction
+#
+# @par Configuration (defaults)
+# ~~~{.py}
+# models:
+#   max_size_mb: 1024
+#   preload: false
+#   max_batch_size: 1000
+# ~~~
+#
+# @see
+#  - Paperwrite.Configuration
+class ModelsConfiguration(NamedTuple):
+  MaxSize: int
+  Preload: bool
+  MaxBatchSize: int
+
+
+##
+# Representation of configurable parameters for the training benchmark (see
+# Paperwrite.Kng.Benchmark).
+#
+# @param  Kngs  `List[str]` -- Ids of KNGs to train on (empty for all KNGs of
+# the store)
+# @param  Scales  `List[int]` -- Factors the KNGs are synthetically scaled up by
+# @param  Profiles  `List[str]` -- Names of training profiles to compare (empty
+# for the default profile)
+# @param  Epochs  `int` -- Number of epochs of every run (0 for the epochs of
+# the profile)
+# @param  Output  `str` -- Path of JSON report
+#
+# @par Configuration (defaults)
+# ~~~{.py}
+# benchmark:
+#   kngs: []
+#   scales: [1, 4, 16]
+#   profiles: []
+#   epochs: 0
+#   output: "benchmark-training.json"
+# ~~~
+#
+# @see
+#  - Paperwrite.Configuration
+class BenchmarkConfiguration(NamedTuple):
+  Kngs: List[str]
+  Scales: List[int]
+  Profiles: List[str]
+  Epochs: int
+  Output: str
+
+
 ##
 # Representation of the sum of all configureable parameters and
 # namespaces found in configuration file.
@@ -123,6 +500,14 @@ class IoConfiguration(NamedTuple):
 #  - DatabaseConfiguration
 #  - JwtRS256Configuration
 #  - IoConfiguration
+#  - ExtractionConfiguration
+#  - NlpConfiguration
+#  - TikaConfiguration
+#  - CacheConfiguration
+#  - JobsConfiguration
+#  - TrainingConfiguration
+#  - ModelsConfiguration
+#  - BenchmarkConfiguration
 class Configuration():
 
   ##
@@ -139,6 +524,62 @@ class Configuration():
   #   - IoConfiguration
   Io: IoConfiguration
 
+  ##
+  # @var Extraction
+  # Namespace for extraction configuration
+  # @see
+  #   - ExtractionConfiguration
+  Extraction: ExtractionConfiguration
+
+  ##
+  # @var Nlp
+  # Namespace for nlp configuration
+  # @see
+  #   - NlpConfiguration
+  Nlp: NlpConfiguration
+
+  ##
+  # @var Tika
+  # Namespace for tika configuration
+  # @see
+  #   - TikaConfiguration
+  Tika: TikaConfiguration
+
+  ##
+  # @var Cache
+  # Namespace for cache configuration
+  # @see
+  #   - CacheConfiguration
+  Cache: CacheConfiguration
+
+  ##
+  # @var Jobs
+  # Namespace for jobs configuration
+  # @see
+  #   - JobsConfiguration
+  Jobs: JobsConfiguration
+
+  ##
+  # @var Training
+  # Namespace for training configuration
+  # @see
+  #   - TrainingConfiguration
+  Training: TrainingConfiguration
+
+  ##
+  # @var Models
+  # Namespace for models configuration
+  # @see
+  #   - ModelsConfiguration
+  Models: ModelsConfiguration
+
+  ##
+  # @var Benchmark
+  # Namespace for benchmark configuration
+  # @see
+  #   - BenchmarkConfiguration
+  Benchmark: BenchmarkConfiguration
+
   StorageOption: str
 
   ##
@@ -158,9 +599,11 @@ class Configuration():
 
     # map webserver namespace onto member
     webserverd = confd.get("webserver", {})
-    self.Webserver = WebserverConfiguration(webserverd.get("host", "127.0.0.1"),
-                                            int(webserverd.get("port", 44777)),
-                                            webserverd.get("api_prefix", ""))
+    self.Webserver = WebserverConfiguration(
+        webserverd.get("host", "127.0.0.1"), int(webserverd.get("port", 44777)),
+        webserverd.get("api_prefix", ""),
+        bool(webserverd.get("preload_handlers", False)),
+        max(0, int(webserverd.get("workers", 0))))
 
     # get io configuration block from file
     iod = confd.get("io", {})
@@ -189,3 +632,74 @@ class Configuration():
     )
 
     self.StorageOption = confd.get("storage_option", "local").upper()
+
+    # map extraction namespace onto member
+    extractiond = confd.get("extraction", {})
+    self.Extraction = ExtractionConfiguration(
+        int(extractiond.get("batch_size", 256)),
+        max(1, int(extractiond.get("workers", 1))),
+        max(1, int(extractiond.get("chunk_size", 65536))),
+        max(1, int(extractiond.get("window_size", 131072))))
+
+    # map nlp namespace onto member
+    nlpd = confd.get("nlp", {})
+    self.Nlp = NlpConfiguration(
+        nlpd.get("model", "en_core_web_sm"),
+        list(nlpd.get("exclude", ["ner", "lemmatizer"])),
+        max(1, int(nlpd.get("instances", 2))),
+        bool(nlpd.get("preload", True)),
+    )
+
+    # map tika namespace onto member
+    tikad = confd.get("tika", {})
+    self.Tika = TikaConfiguration(
+        max(0, int(tikad.get("pool_size", 2))),
+        tikad.get("host", "127.0.0.1"),
+        int(tikad.get("base_port", 9998)),
+        tikad.get("java", "java"),
+        tikad.get("jar_path", ""),
+        float(tikad.get("startup_timeout", 60)),
+    )
+
+    # map cache namespace onto member
+    cached = confd.get("cache", {})
+    self.Cache = CacheConfiguration(
+        int(float(cached.get("max_size_mb", 512)) * 1024 * 1024))
+
+    # map jobs namespace onto member
+    jobsd = confd.get("jobs", {})
+    self.Jobs = JobsConfiguration(max(1, int(jobsd.get("workers", 1))))
+
+    # map training namespace onto member
+    trainingd = confd.get("training", {})
+    profilesd = trainingd.get("profiles") or {"default": {}}
+    self.Training = TrainingConfiguration(
+        max(1, int(trainingd.get("workers", 1))),
+        trainingd.get("profile", "default"),
+        {
+            name: parseTrainingProfile(profiled or {})
+            for name, profiled in profilesd.items()
+        },
+    )
+    # abort program if default profile does not exist
+    if self.Training.Profile not in self.Training.Profiles:
+      print(f"training profile not found: {self.Training.Profile}",
+            file=sys.stderr)
+      exit(1)
+
+    # map models namespace onto member
+    modelsd = confd.get("models", {})
+    self.Models = ModelsConfiguration(
+        int(float(modelsd.get("max_size_mb", 1024)) * 1024 * 1024),
+        bool(modelsd.get("preload", False)),
+        int(modelsd.get("max_batch_size", 1000)))
+
+    # map benchmark namespace onto member
+    benchmarkd = confd.get("benchmark", {})
+    self.Benchmark = BenchmarkConfiguration(
+        list(benchmarkd.get("kngs", [])),
+        [max(1, int(s)) for s in benchmarkd.get("scales", [1, 4, 16])],
+        list(benchmarkd.get("profiles", [])) or [self.Training.Profile],
+        max(0, int(benchmarkd.get("epochs", 0))),
+        benchmarkd.get("output", "benchmark-training.json"),
+    )
@@ -0,0 +1,11 @@
+from flask import Response
+
+from Paperwrite.Rest import CreateResponseJson, HttpStatus, RespondWithError
+from Paperwrite.Application import AppContext
+
+
+def DeleteKngTrainModel(kid: str) -> Response:
+  if not AppContext.Training.Cancel(kid):
+    RespondWithError(HttpStatus.NOT_FOUND,
+                     f"no training of '{kid}' is queued or running")
+  return CreateResponseJson(HttpStatus.OK, {"status": "cancelled"})
@@ -0,0 +1,11 @@
+from flask import Response
+
+from Paperwrite.Rest import CreateResponseJson, HttpStatus, RespondWithError
+from Paperwrite.Application import AppContext
+
+
+def GetJob(jid: str) -> Response:
+  job = AppContext.Jobs.Get(jid)
+  if job is None:
+    RespondWithError(HttpStatus.NOT_FOUND, f"job '{jid}' not found")
+  return CreateResponseJson(HttpStatus.OK, job.ToDict())
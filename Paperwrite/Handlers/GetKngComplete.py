@@ -0,0 +1,50 @@
+import os
+
+from flask import Response, request
+
+from Paperwrite.Application import AppContext
+from Paperwrite.Rest import CreateResponseJson, HttpStatus, RespondWithError
+from Paperwrite.Kng.Completion import CompleteHead, CompleteRelation, CompleteTail, UnknownNodeError
+from Paperwrite.Kng.Store import METADATA_FILE, MODEL_FILE
+
+
+def GetKngComplete(kid: str) -> Response:
+  storeFolder = os.path.join(AppContext.Store.Mutable, kid)
+  if not os.path.isfile(os.path.join(storeFolder, METADATA_FILE)):
+    RespondWithError(HttpStatus.NOT_FOUND, f"knowledge graph '{kid}' not found")
+  if not os.path.isfile(os.path.join(storeFolder, MODEL_FILE)):
+    RespondWithError(HttpStatus.NOT_FOUND, f"knowledge graph '{kid}' has no model")
+
+  head = request.args.get("head")
+  relation = request.args.get("relation")
+  tail = request.args.get("tail")
+  k = request.args.get("k", 10, type=int)
+  if [head, relation, tail].count(None) != 1:
+    RespondWithError(HttpStatus.BAD_REQUEST,
+                     "exactly one of 'head', 'relation' and 'tail' is missing")
+  if k <= 0:
+    RespondWithError(HttpStatus.BAD_REQUEST, "'k' has to be positive")
+
+  try:
+    embeddings = AppContext.Models.Get(storeFolder).Embeddings
+    if tail is None:
+      candidates = CompleteTail(embeddings, head, relation, k)
+    elif head is None:
+      candidates = CompleteHead(embeddings, relation, tail, k)
+    else:
+      candidates = CompleteRelation(embeddings, head, tail, k)
+  except UnknownNodeError as err:
+    RespondWithError(HttpStatus.BAD_REQUEST, str(err))
+
+  return CreateResponseJson(
+      HttpStatus.OK, {
+          "query": {
+              "head": head,
+              "relation": relation,
+              "tail": tail
+          },
+          "candidates": [{
+              "value": value,
+              "score": score
+          } for value, score in candidates]
+      })
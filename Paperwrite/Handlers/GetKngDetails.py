@@ -15,6 +15,12 @@ def GetKngDetails(kid: str) -> Response:
   if metadata.get("ai_models") is None:
     additionalData["ai_models"] = "none"
 
+  # the metadata holds the status of a training, but not its position in the
+  # queue, as that changes whenever another training starts
+  queueStatus = AppContext.Training.Status(kid)
+  if queueStatus is not None:
+    metadata.setdefault("training", {}).update(queueStatus)
+
   result = {
       "kid": kid,
       **additionalData,
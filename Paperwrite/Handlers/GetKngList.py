@@ -8,7 +8,12 @@ from Paperwrite.Application import AppContext
 
 
 def GetKngList() -> Response:
-  kngs = os.listdir(AppContext.Store.Mutable)
+  # hidden folders (like the extraction cache) are not KNGs
+  kngs = [
+      k for k in os.listdir(AppContext.Store.Mutable)
+      if not k.startswith(".") and
+      os.path.isdir(os.path.join(AppContext.Store.Mutable, k))
+  ]
 
   results = []
   for kng in kngs:
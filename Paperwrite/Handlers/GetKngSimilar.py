@@ -0,0 +1,44 @@
+import os
+
+from flask import Response, request
+
+from Paperwrite.Application import AppContext
+from Paperwrite.Rest import CreateResponseJson, HttpStatus, RespondWithError
+from Paperwrite.Kng.Completion import UnknownNodeError
+from Paperwrite.Kng.Similarity import BuildIndex, SaveIndex
+from Paperwrite.Kng.Store import GetLock, METADATA_FILE, MODEL_FILE, SIMILARITY_FILE
+
+
+def GetKngSimilar(kid: str) -> Response:
+  storeFolder = os.path.join(AppContext.Store.Mutable, kid)
+  if not os.path.isfile(os.path.join(storeFolder, METADATA_FILE)):
+    RespondWithError(HttpStatus.NOT_FOUND, f"knowledge graph '{kid}' not found")
+  if not os.path.isfile(os.path.join(storeFolder, MODEL_FILE)):
+    RespondWithError(HttpStatus.NOT_FOUND, f"knowledge graph '{kid}' has no model")
+
+  entity = request.args.get("entity")
+  k = request.args.get("k", 10, type=int)
+  if entity is None:
+    RespondWithError(HttpStatus.BAD_REQUEST, "'entity' is missing")
+  if k <= 0:
+    RespondWithError(HttpStatus.BAD_REQUEST, "'k' has to be positive")
+
+  # models trained before indices were introduced get their index once
+  with GetLock(storeFolder):
+    if not os.path.isfile(os.path.join(storeFolder, SIMILARITY_FILE)):
+      index = BuildIndex(AppContext.Models.Get(storeFolder).Embeddings)
+      SaveIndex(storeFolder, index)
+
+  try:
+    neighbours = AppContext.Similarity.Get(storeFolder).Query(entity, k)
+  except UnknownNodeError as err:
+    RespondWithError(HttpStatus.BAD_REQUEST, str(err))
+
+  return CreateResponseJson(
+      HttpStatus.OK, {
+          "entity": entity,
+          "similar": [{
+              "entity": name,
+              "similarity": similarity
+          } for name, similarity in neighbours]
+      })
@@ -1,35 +1,26 @@
 import os
-import json
 
-from flask import Response
-import numpy as np
-from ampligraph.latent_features import ComplEx
-from ampligraph.utils import save_model
+from flask import Response, request
 
-from Paperwrite.Rest import CreateResponseJson, HttpStatus
+from Paperwrite.Rest import CreateResponseJson, HttpStatus, RespondWithError
 from Paperwrite.Application import AppContext
+from Paperwrite.Kng.Store import METADATA_FILE
 
 
 def GetKngTrainModel(kid: str) -> Response:
   storeFolder = os.path.join(AppContext.Store.Mutable, kid)
-  metadataPath = os.path.join(storeFolder, "metadata.json")
-
-  with open(metadataPath, "r") as f:
-    metadata = json.load(f)
-
-  metadata["ai_models"] = "training..."
-
-  with open(metadataPath, "w") as f:
-    json.dump(metadata, f)
-
-  model = ComplEx(batches_count=1, seed=555, epochs=200, k=1000)
-  X = np.load(os.path.join(storeFolder, "raw_graph_data.npy"))
-  model.fit(X)
-  save_model(model, model_name_path=os.path.join(storeFolder, "complex.pkl"))
-
-  metadata["ai_models"] = "ComplEx"
-
-  with open(metadataPath, "w") as f:
-    json.dump(metadata, f)
-
-  return CreateResponseJson(HttpStatus.OK, {})
\ No newline at end of file
+  if not os.path.isfile(os.path.join(storeFolder, METADATA_FILE)):
+    RespondWithError(HttpStatus.NOT_FOUND, f"knowledge graph '{kid}' not found")
+
+  profile = request.args.get("profile")
+  if profile is not None and profile not in AppContext.Config.Training.Profiles:
+    RespondWithError(HttpStatus.BAD_REQUEST,
+                     f"training profile '{profile}' not found")
+  mode = request.args.get("mode", "full")
+  if mode not in ("full", "warm"):
+    RespondWithError(HttpStatus.BAD_REQUEST,
+                     f"found mode '{mode}', expected 'full' or 'warm'")
+
+  # training runs in a worker process, the request only queues it
+  status = AppContext.Training.Submit(kid, profile, mode == "warm")
+  return CreateResponseJson(HttpStatus.ACCEPTED, status)
@@ -2,9 +2,24 @@ import os
 from flask import Response
 
 from Paperwrite.Application import AppContext
-from Paperwrite.Rest import CreateResponseHTML, HttpStatus
+from Paperwrite.Rest import CreateResponseStatic, HttpStatus, RespondWithError
+from Paperwrite.Kng.Store import GetLock, VISUALISATION_FILE
+from Paperwrite.Kng.Visualisation import CompressGraph, GZIP_SUFFIX
 
 
 def GetKngVisualisation(kid: str) -> Response:
-  path = os.path.join(AppContext.Store.Mutable, kid, "graph_visualisation.html")
-  return CreateResponseHTML(HttpStatus.OK, path)
+  storeFolder = os.path.join(AppContext.Store.Mutable, kid)
+  path = os.path.join(storeFolder, VISUALISATION_FILE)
+  if not os.path.isfile(path):
+    RespondWithError(HttpStatus.NOT_FOUND,
+                     f"knowledge graph '{kid}' has no visualisation")
+
+  # visualisations rendered before compressed copies were introduced get their
+  # copy once
+  gzipPath = f"{path}{GZIP_SUFFIX}"
+  if not os.path.isfile(gzipPath):
+    with GetLock(storeFolder):
+      if not os.path.isfile(gzipPath):
+        CompressGraph(path)
+
+  return CreateResponseStatic(path, "text/html", gzipPath)
@@ -0,0 +1,8 @@
+from flask import Response
+
+from Paperwrite.Rest import CreateResponseJson, HttpStatus
+from Paperwrite.Application import AppContext
+
+
+def GetModelStats() -> Response:
+  return CreateResponseJson(HttpStatus.OK, AppContext.Models.Stats())
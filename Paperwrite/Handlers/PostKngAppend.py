@@ -0,0 +1,37 @@
+# -- STL
+import os
+import uuid
+
+# -- LIBRARY
+from flask import Response, request
+
+# -- PROJECT
+from Paperwrite.Application import AppContext
+from Paperwrite.Rest import CreateResponseJson, HttpStatus, RespondWithError
+from Paperwrite.Kng.Build import JOB_APPEND
+from Paperwrite.Kng.Documents import SaveUploads
+from Paperwrite.Kng.Store import METADATA_FILE
+
+
+def PostKngAppend(kid: str) -> Response:
+  storageFolder = os.path.join(AppContext.Store.Mutable, kid)
+  if not os.path.isfile(os.path.join(storageFolder, METADATA_FILE)):
+    RespondWithError(HttpStatus.NOT_FOUND, f"knowledge graph '{kid}' not found")
+
+  # uploads are kept in store, until the job has processed them
+  uploadFolder = os.path.join(AppContext.Store.Jobs, uuid.uuid4().hex)
+  os.makedirs(uploadFolder, exist_ok=True)
+
+  # get source files from
+  files = request.files.getlist("files[]")
+  paths, filenames = SaveUploads(files, uploadFolder)
+
+  jid = AppContext.Jobs.Submit(JOB_APPEND, kid, {
+      "upload": uploadFolder,
+      "paths": paths,
+      "filenames": filenames
+  })
+  return CreateResponseJson(HttpStatus.ACCEPTED, {
+      "status": "queued",
+      "job": jid
+  })
@@ -1,29 +1,39 @@
 import os
-import asyncio
 
-import spacy
 import numpy as np
 from flask import Response, request
-from ampligraph.utils import restore_model
 
 from Paperwrite.Application import AppContext
 from Paperwrite.PyAdditions import Io
-from Paperwrite.Rest import CreateResponseJson, HttpStatus
-from Paperwrite.Handlers.PostKngCreate import GetTuple
+from Paperwrite.Rest import CreateResponseJson, HttpStatus, RespondWithError
+from Paperwrite.Kng.Completion import UnknownNodeError
+from Paperwrite.Kng.Nlp import PIPELINE_PARSER
+from Paperwrite.Kng.Store import LookupIndices, METADATA_FILE, MODEL_FILE
 
 
 def PostKngPredict(kid: str) -> Response:
-  modelPath = os.path.join(AppContext.Store.Mutable, kid, "complex.pkl")
-  model = restore_model(modelPath)
+  storeFolder = os.path.join(AppContext.Store.Mutable, kid)
+  if not os.path.isfile(os.path.join(storeFolder, METADATA_FILE)):
+    RespondWithError(HttpStatus.NOT_FOUND, f"knowledge graph '{kid}' not found")
+  if not os.path.isfile(os.path.join(storeFolder, MODEL_FILE)):
+    RespondWithError(HttpStatus.NOT_FOUND, f"knowledge graph '{kid}' has no model")
+
   content = request.get_json(silent=True)
-  nlp = spacy.load("en_core_web_sm")
-  asyncLoop = asyncio.new_event_loop()
-  tpl = asyncLoop.run_until_complete(GetTuple(content["sentence"], nlp))
+  with AppContext.Nlp.Acquire(PIPELINE_PARSER) as handle:
+    tpl = handle.Extractor.ExtractOne(content["sentence"])
   Io.Debug(f"   => Search tuples: {tpl}")
 
+  # reject unknown nodes from vocabulary, before the model is loaded
+  graph = AppContext.Graphs.Get(storeFolder)
+  entities = LookupIndices(graph.Entities, [tpl[0], tpl[2]])
+  relations = LookupIndices(graph.Relations, [tpl[1]])
+  if (entities < 0).any() or (relations < 0).any():
+    return CreateResponseJson(HttpStatus.BAD_REQUEST, {"predit_val": "only use existing nodes"})
+
   try:
-    result = model.predict(np.asarray(tpl))
-    return CreateResponseJson(HttpStatus.OK, {"predit_val": result})
-  except Exception:
+    result = AppContext.Models.Get(storeFolder).Predict(np.asarray([tpl]))
+    return CreateResponseJson(HttpStatus.OK, {"predit_val": float(result[0])})
+  except UnknownNodeError:
+    # nodes added after the last training are not part of the model
     return CreateResponseJson(HttpStatus.BAD_REQUEST, {"predit_val": "only use existing nodes"})
 
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+from flask import Response, request
+
+from Paperwrite.Application import AppContext
+from Paperwrite.Rest import CreateResponseJson, HttpStatus, RespondWithError
+from Paperwrite.Kng.Nlp import PIPELINE_PARSER
+from Paperwrite.Kng.Store import LookupIndices, METADATA_FILE, MODEL_FILE
+
+
+def isTriple(item) -> bool:
+  return isinstance(item, list) and len(item) == 3 and all(
+      isinstance(value, str) for value in item)
+
+
+def PostKngPredictBatch(kid: str) -> Response:
+  storeFolder = os.path.join(AppContext.Store.Mutable, kid)
+  if not os.path.isfile(os.path.join(storeFolder, METADATA_FILE)):
+    RespondWithError(HttpStatus.NOT_FOUND, f"knowledge graph '{kid}' not found")
+  if not os.path.isfile(os.path.join(storeFolder, MODEL_FILE)):
+    RespondWithError(HttpStatus.NOT_FOUND, f"knowledge graph '{kid}' has no model")
+
+  content = request.get_json(silent=True)
+  if not isinstance(content, dict):
+    RespondWithError(HttpStatus.BAD_REQUEST, "expected json object as body")
+  sentences = content.get("sentences", [])
+  triples = content.get("triples", [])
+  if not isinstance(sentences, list) or not isinstance(triples, list):
+    RespondWithError(HttpStatus.BAD_REQUEST,
+                     "'sentences' and 'triples' have to be lists")
+  maxBatchSize = AppContext.Config.Models.MaxBatchSize
+  if len(sentences) + len(triples) > maxBatchSize:
+    RespondWithError(
+        HttpStatus.BAD_REQUEST,
+        f"batch has more than {maxBatchSize} sentences and triples")
+
+  # all sentences are parsed in a single pass over the pipeline, results keep
+  # the order of sentences followed by triples
+  texts = [s for s in sentences if isinstance(s, str)]
+  parsed = []
+  if len(texts) > 0:
+    with AppContext.Nlp.Acquire(PIPELINE_PARSER) as handle:
+      parsed = list(handle.Extractor.Extract(texts))
+  parsed.reverse()
+
+  items = []
+  results = []
+  for sentence in sentences:
+    if not isinstance(sentence, str):
+      items.append(None)
+      results.append({
+          "sentence": sentence,
+          "error": "sentence has to be a string"
+      })
+      continue
+    items.append(parsed.pop())
+    results.append({"triple": items[-1]})
+  items.extend(triples)
+  results.extend({"triple": item} for item in triples)
+
+  for item, result in zip(items, results):
+    if "error" not in result and not isTriple(item):
+      result["error"] = "triple has to be a list of 3 strings"
+
+  # reject unknown nodes from vocabulary, before the model is loaded
+  valid = np.asarray([i for i, r in enumerate(results) if "error" not in r],
+                     dtype=np.int64)
+  batch = np.asarray([items[i] for i in valid], dtype=str).reshape(-1, 3)
+  graph = AppContext.Graphs.Get(storeFolder)
+  known = ((LookupIndices(graph.Entities, batch[:, 0]) >= 0) &
+           (LookupIndices(graph.Relations, batch[:, 1]) >= 0) &
+           (LookupIndices(graph.Entities, batch[:, 2]) >= 0))
+  for i in valid[~known]:
+    results[i]["error"] = "only use existing nodes"
+
+  # all known triples are scored by a single call of the engine, triples of
+  # nodes added after the last training are not part of the model
+  if known.any():
+    engine = AppContext.Models.Get(storeFolder)
+    indices, trained = engine.Indices(batch[known])
+    scores = engine.Score(indices[trained])
+    for i in valid[known][~trained]:
+      results[i]["error"] = "only use existing nodes"
+    for i, score in zip(valid[known][trained], scores):
+      results[i]["score"] = float(score)
+
+  return CreateResponseJson(HttpStatus.OK, {"results": results})
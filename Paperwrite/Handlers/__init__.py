@@ -1,6 +0,0 @@
-from . import PostKngCreate
-from . import GetKngList
-from . import GetKngVisualisation
-from . import GetKngDetails
-from . import GetKngTrainModel
-from . import PostKngPredict
\ No newline at end of file
@@ -0,0 +1,240 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Benchmark
+# @namespace Paperwrite.Kng.Benchmark
+#
+# Package containing the benchmark of model trainings. Every KNG of the
+# benchmark is trained once per scale and training profile. Scaled KNGs are
+# synthetic copies of a KNG with renamed entities, so their structure matches
+# the original graph. Every run trains in its own worker process, so its peak
+# memory is not distorted by earlier runs. Early stopping is disabled, so every
+# run trains for the same number of epochs. The report is written as JSON:
+#
+# ~~~{.py}
+# {
+#   "created": "<datetime>",
+#   "environment": {"python": "...", "numpy": "...", ...},
+#   "runs": [{
+#     "kng": "<id of KNG>",
+#     "scale": <factor KNG is scaled up by>,
+#     "profile": "<name of training profile>",
+#     "triples": <number of triples>,
+#     "entities": <number of entities>,
+#     "relations": <number of relations>,
+#     "epochs": <number of epochs>,
+#     "wall_time": <seconds of training>,
+#     "triples_per_sec": <triples processed per second>,
+#     "peak_rss": <peak resident memory of worker in bytes>,
+#     "loss": <final loss>,
+#     "error": "<error of failed run>"
+#   }, ...]
+# }
+# ~~~
+#
+# The final loss is the negative log-likelihood loss of ComplEx, computed from
+# the trained embeddings on a sample of the triples and their corruptions.
+
+# -- STL
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+# -- LIBRARY
+import numpy as np
+
+# -- PROJECT
+from Paperwrite.Configuration import BenchmarkConfiguration, TrainingConfiguration, TrainingProfile
+from Paperwrite.Kng.Completion import GetEmbeddings, ScoreTriples
+from Paperwrite.Kng.Store import LoadTriples, WriteAtomic, METADATA_FILE
+from Paperwrite.Kng.Training import FitModel
+from Paperwrite.PyAdditions import Io
+
+##
+# Number of corruptions per triple of the loss (default `eta` of ampligraph).
+LOSS_ETA = 2
+
+##
+# Maximum number of triples the loss is computed on.
+LOSS_SAMPLE_SIZE = 10000
+
+
+##
+# Scales a KNG up by copying its triples. Entities of every copy but the first
+# are renamed, relations are shared by all copies.
+#
+# @param  triples   triples of KNG
+# @param  scale   number of copies
+#
+# @return scaled triples
+def ScaleTriples(triples: np.ndarray, scale: int) -> np.ndarray:
+  copies = [triples]
+  for i in range(1, scale):
+    copy = triples.astype(object)
+    copy[:, 0] = copy[:, 0] + f"#{i}"
+    copy[:, 2] = copy[:, 2] + f"#{i}"
+    copies.append(copy)
+  return np.concatenate(copies).astype(str)
+
+
+##
+# Computes the negative log-likelihood loss of a trained model on a sample of
+# triples. Every triple is corrupted `LOSS_ETA` times by replacing its head or
+# tail with a random entity.
+#
+# @param  model   trained ComplEx model
+# @param  triples   triples the model was trained on
+# @param  seed  seed of sampling and corruption
+#
+# @return mean loss over triples and corruptions
+def TrainingLoss(model: Any, triples: np.ndarray, seed: int) -> float:
+  embeddings = GetEmbeddings(model)
+  rng = np.random.RandomState(seed)
+  if len(triples) > LOSS_SAMPLE_SIZE:
+    triples = triples[rng.choice(len(triples), LOSS_SAMPLE_SIZE, replace=False)]
+
+  heads = np.asarray([embeddings.EntityIndex[h] for h in triples[:, 0]])
+  relations = np.asarray([embeddings.RelationIndex[r] for r in triples[:, 1]])
+  tails = np.asarray([embeddings.EntityIndex[t] for t in triples[:, 2]])
+  losses = [np.logaddexp(0, -ScoreTriples(embeddings, heads, relations, tails))]
+
+  for _ in range(LOSS_ETA):
+    corrupted = rng.randint(len(embeddings.Entities), size=len(heads))
+    corruptHead = rng.rand(len(heads)) < 0.5
+    negHeads = np.where(corruptHead, corrupted, heads)
+    negTails = np.where(corruptHead, tails, corrupted)
+    losses.append(
+        np.logaddexp(0, ScoreTriples(embeddings, negHeads, relations,
+                                     negTails)))
+  return float(np.mean(np.concatenate(losses)))
+
+
+##
+# Trains a single run of the benchmark. Entry point of the worker processes.
+#
+# @param  triples   triples to train on
+# @param  profile   training profile
+# @param  conn  connection the result is sent to
+def RunTraining(triples: np.ndarray, profile: TrainingProfile, conn) -> None:
+  try:
+    import ampligraph
+
+    started = time.monotonic()
+    model = FitModel(triples, profile)
+    wallTime = time.monotonic() - started
+
+    # ru_maxrss is reported in kilobytes on linux
+    peakRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    conn.send({
+        "entities": len(model.ent_to_idx),
+        "relations": len(model.rel_to_idx),
+        "wall_time": round(wallTime, 3),
+        "triples_per_sec": round(len(triples) * profile.Epochs / wallTime, 1),
+        "peak_rss": peakRss,
+        "loss": TrainingLoss(model, triples, profile.Seed),
+        "ampligraph": ampligraph.__version__,
+    })
+  except Exception as err:
+    conn.send({"error": f"{type(err).__name__}: {err}"})
+  finally:
+    conn.close()
+
+
+##
+# Runs a single run of the benchmark in a worker process.
+#
+# @param  context   multiprocessing context for worker process
+# @param  triples   triples to train on
+# @param  profile   training profile
+#
+# @return result of run
+def runWorker(context: Any, triples: np.ndarray,
+              profile: TrainingProfile) -> Dict[str, Any]:
+  recvConn, sendConn = context.Pipe(duplex=False)
+  process = context.Process(target=RunTraining,
+                            args=(triples, profile, sendConn),
+                            name="ppw-benchmark")
+  process.start()
+  sendConn.close()
+  result = {"error": "worker exited without result"}
+  try:
+    result = recvConn.recv()
+  except EOFError:
+    pass
+  process.join()
+  recvConn.close()
+  if "error" in result and process.exitcode:
+    result["error"] += f" (exit code {process.exitcode})"
+  return result
+
+
+##
+# Runs the training benchmark and writes its report.
+#
+# @param  config  configuration from `benchmark`-block from configuration file
+# @param  training  configuration from `training`-block from configuration file
+# @param  root  folder of store containing the KNGs
+#
+# @return report of benchmark
+def RunBenchmark(config: BenchmarkConfiguration,
+                 training: TrainingConfiguration, root: str) -> Dict[str, Any]:
+  kngs = config.Kngs or sorted(
+      kid for kid in os.listdir(root)
+      if os.path.isfile(os.path.join(root, kid, METADATA_FILE)))
+  # spawn, so every run starts with a fresh process
+  context = multiprocessing.get_context("spawn")
+
+  runs: List[Dict[str, Any]] = []
+  environment = {
+      "python": platform.python_version(),
+      "numpy": np.__version__,
+      "platform": platform.platform(),
+      "cpus": os.cpu_count(),
+  }
+  for kid in kngs:
+    triples = LoadTriples(os.path.join(root, kid)).Triples
+    for scale in config.Scales:
+      scaled = ScaleTriples(triples, scale)
+      for name in config.Profiles:
+        run = {
+            "kng": kid,
+            "scale": scale,
+            "profile": name,
+            "triples": len(scaled)
+        }
+        profile = training.Profiles.get(name)
+        if profile is None:
+          run["error"] = f"training profile '{name}' is not configured"
+          runs.append(run)
+          continue
+
+        profile = profile._replace(EarlyStopping=False,
+                                   Epochs=config.Epochs or profile.Epochs)
+        run["epochs"] = profile.Epochs
+        Io.Info(f"Benchmarking '{kid}' x{scale} with profile '{name}' "
+                f"({len(scaled)} triples)")
+        run.update(runWorker(context, scaled, profile))
+        version = run.pop("ampligraph", None)
+        if version is not None:
+          environment["ampligraph"] = version
+        if "error" in run:
+          Io.Error(f"    => Failed: {run['error']}")
+        else:
+          Io.Info(f"    => {run['triples_per_sec']} triples/s, "
+                  f"{run['wall_time']}s, {run['peak_rss'] // 2**20} MB, "
+                  f"loss {run['loss']:.4f}")
+        runs.append(run)
+
+  report = {
+      "created": str(datetime.now()),
+      "environment": environment,
+      "runs": runs
+  }
+  WriteAtomic(config.Output, json.dumps(report, indent=2))
+  return report
@@ -0,0 +1,130 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Build
+# @namespace Paperwrite.Kng.Build
+#
+# Package containing the jobs building a KNG from uploaded documents. They are
+# processed by the job queue (see Paperwrite.Kng.Jobs) and get their uploads as
+# payload:
+#
+# ~~~{.py}
+# {
+#   "upload": "<folder of uploaded files>",
+#   "paths": ["<path of uploaded file>", ...],
+#   "filenames": ["<original filename>", ...]
+# }
+# ~~~
+
+# -- STL
+import os
+import shutil
+from datetime import datetime
+from typing import Any, Dict
+
+# -- PROJECT
+from Paperwrite.Application import AppContext
+from Paperwrite.PyAdditions import Io
+from Paperwrite.Kng.Documents import BuildTriples, ExtractDocuments
+from Paperwrite.Kng.Jobs import Job, JobFunc, ProgressFunc, ScaleProgress
+from Paperwrite.Kng.Store import AppendTriples, DecodeTriples, GetLock, ReadMetadata, SaveTriples, WriteMetadata, VISUALISATION_FILE
+from Paperwrite.Kng.Visualisation import AppendGraph, RenderGraph
+
+##
+# Kind of job creating a KNG.
+JOB_CREATE = "create"
+
+##
+# Kind of job appending documents to a KNG.
+JOB_APPEND = "append"
+
+
+##
+# Wraps a job, so its uploads are deleted after it finished or failed. Uploads
+# of jobs interrupted by a restart are kept, so the job can run again.
+#
+# @param  func  function processing job
+#
+# @return function processing job and deleting its uploads
+def WithUploads(func: JobFunc) -> JobFunc:
+
+  def wrapper(job: Job, progress: ProgressFunc) -> Dict[str, Any]:
+    try:
+      return func(job, progress)
+    finally:
+      shutil.rmtree(job.Payload["upload"], ignore_errors=True)
+
+  return wrapper
+
+
+##
+# Creates a KNG from uploaded documents. An existing KNG with the same id is
+# overwritten. Register wrapped in WithUploads.
+#
+# @param  job   job with uploads as payload
+# @param  progress  function progress is reported to
+#
+# @return result of job
+def CreateKng(job: Job, progress: ProgressFunc) -> Dict[str, Any]:
+  storageFolder = os.path.join(AppContext.Store.Mutable, job.Kid)
+  os.makedirs(storageFolder, exist_ok=True)
+
+  triples = BuildTriples(
+      ExtractDocuments(job.Payload["paths"], ScaleProgress(progress, 0.0,
+                                                           0.8)))
+
+  with GetLock(storageFolder):
+    progress(0.8, "Saving graph")
+    SaveTriples(storageFolder, triples)
+
+    metadata = {
+        "knowledge_base": job.Payload["filenames"],
+        "created": str(datetime.now()),
+        "size": len(triples.Triples),
+        "occurrences": int(triples.Counts.sum())
+    }
+    WriteMetadata(storageFolder, metadata)
+
+    progress(0.9, "Rendering visualisation")
+    RenderGraph(triples.Triples,
+                os.path.join(storageFolder, VISUALISATION_FILE))
+
+  return {"size": len(triples.Triples)}
+
+
+##
+# Appends uploaded documents to an existing KNG. Only the new documents are
+# extracted and the visualisation is extended in place. Register wrapped in
+# WithUploads.
+#
+# @param  job   job with uploads as payload
+# @param  progress  function progress is reported to
+#
+# @return result of job
+def AppendKng(job: Job, progress: ProgressFunc) -> Dict[str, Any]:
+  storageFolder = os.path.join(AppContext.Store.Mutable, job.Kid)
+
+  newTriples = BuildTriples(
+      ExtractDocuments(job.Payload["paths"], ScaleProgress(progress, 0.0,
+                                                           0.8)))
+
+  with GetLock(storageFolder):
+    progress(0.8, "Merging graph")
+    graph, added = AppendTriples(storageFolder, newTriples)
+
+    metadata = ReadMetadata(storageFolder)
+    metadata["knowledge_base"] = metadata.get("knowledge_base",
+                                              []) + job.Payload["filenames"]
+    metadata["size"] = len(graph.Triples)
+    metadata["occurrences"] = int(graph.Counts.sum())
+    metadata["updated"] = str(datetime.now())
+    WriteMetadata(storageFolder, metadata)
+
+    progress(0.9, "Extending visualisation")
+    visualisationPath = os.path.join(storageFolder, VISUALISATION_FILE)
+    if not AppendGraph(added.Triples, visualisationPath):
+      Io.Debug("    => Visualisation could not be extended, rendering graph")
+      RenderGraph(DecodeTriples(graph).Triples, visualisationPath)
+
+  return {"size": len(graph.Triples), "appended": len(added.Triples)}
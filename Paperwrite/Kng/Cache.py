@@ -0,0 +1,201 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Cache
+# @namespace Paperwrite.Kng.Cache
+#
+# Package containing the content-addressed cache for extraction results. Entries
+# are keyed by the SHA-256 of an uploaded file and the version of the extractor
+# and hold the sentences of the cleaned text, the extracted triples and
+# references. The cache is bounded in size, least recently used entries are
+# evicted first.
+
+# -- STL
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from threading import Lock
+from typing import Any, Dict, Optional
+
+# -- PROJECT
+from Paperwrite.PyAdditions import Io
+
+##
+# Version of the extraction pipeline (cleanup, segmentation and extraction). Has
+# to be increased on every change, that alters the extracted triples, so stale
+# cache entries are no longer found.
+EXTRACTOR_VERSION = "2"
+
+##
+# Number of bytes read at once, when hashing files.
+HASH_BLOCK_SIZE = 1 << 20
+
+##
+# File extension of cache entries.
+ENTRY_EXTENSION = ".json.gz"
+
+
+##
+# Computes the SHA-256 of a file.
+#
+# @param  path  path to file
+#
+# @return hex digest of file content
+def HashFile(path: str) -> str:
+  digest = hashlib.sha256()
+  with open(path, "rb") as f:
+    for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+      digest.update(block)
+  return digest.hexdigest()
+
+
+##
+# Size-bounded, content-addressed LRU cache on disk. Recency is tracked through
+# the modification time of entries, which is refreshed on every hit.
+class ExtractionCache():
+
+  ##
+  # @var Folder
+  # folder entries are stored in
+  Folder: str
+
+  ##
+  # @var MaxSize
+  # maximum size of all entries in bytes (0 disables the cache)
+  MaxSize: int
+
+  ##
+  # @var Version
+  # version of extractor, part of every key
+  Version: str
+
+  ##
+  # @var lock
+  # internal lock guarding writes and eviction
+  lock: Lock
+
+  ##
+  # @var size
+  # internal running size of all entries in bytes, None until the folder was
+  # scanned once. Entries written by other processes are only counted by the
+  # next scan.
+  size: Optional[int]
+
+  ##
+  # Constructor
+  #
+  # @param  folder  folder entries are stored in
+  # @param  maxSize   maximum size of all entries in bytes
+  # @param  version   version of extractor
+  def __init__(self, folder: str, maxSize: int, version: str) -> None:
+    self.Folder = folder
+    self.MaxSize = maxSize
+    self.Version = version
+    self.lock = Lock()
+    self.size = None
+
+  ##
+  # Builds the key of an entry.
+  #
+  # @param  digest  SHA-256 of file content as hex digest
+  #
+  # @return key of entry
+  def Key(self, digest: str) -> str:
+    return f"{digest}-{self.Version}"
+
+  ##
+  # Returns the path of an entry. Entries are spread over subfolders by the
+  # first two characters of their key.
+  #
+  # @param  key   key of entry
+  #
+  # @return path of entry
+  def path(self, key: str) -> str:
+    return os.path.join(self.Folder, key[:2], key + ENTRY_EXTENSION)
+
+  ##
+  # Looks up an entry and marks it as recently used.
+  #
+  # @param  key   key of entry
+  #
+  # @return entry, None if it is not cached
+  def Get(self, key: str) -> Optional[Dict[str, Any]]:
+    if self.MaxSize <= 0:
+      return None
+
+    path = self.path(key)
+    try:
+      with gzip.open(path, "rt", encoding="utf-8") as f:
+        entry = json.load(f)
+      os.utime(path)
+    except (OSError, ValueError):
+      return None
+
+    Io.Debug(f"    => Cache hit: {key}")
+    return entry
+
+  ##
+  # Stores an entry and evicts least recently used entries, if the cache
+  # exceeds its maximum size. The folder is only scanned for the first entry
+  # and on eviction, otherwise the running size is updated.
+  #
+  # @param  key   key of entry
+  # @param  entry   json-serializable entry
+  def Put(self, key: str, entry: Dict[str, Any]) -> None:
+    if self.MaxSize <= 0:
+      return
+
+    path = self.path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write to temporary file first, so readers never see partial entries
+    tmpPath = f"{path}.{uuid.uuid4().hex}.tmp"
+    with gzip.open(tmpPath, "wt", encoding="utf-8") as f:
+      json.dump(entry, f)
+    newSize = os.stat(tmpPath).st_size
+
+    with self.lock:
+      try:
+        oldSize = os.stat(path).st_size
+      except FileNotFoundError:
+        oldSize = 0
+      os.replace(tmpPath, path)
+
+      if self.size is None:
+        self.Evict()
+        return
+      self.size += newSize - oldSize
+      if self.size > self.MaxSize:
+        self.Evict()
+
+  ##
+  # Deletes least recently used entries, until the size of all entries is
+  # below the maximum size. Scans the whole folder and resets the running size.
+  def Evict(self) -> None:
+    entries = []
+    totalSize = 0
+    for root, _, files in os.walk(self.Folder):
+      for name in files:
+        if not name.endswith(ENTRY_EXTENSION):
+          continue
+        path = os.path.join(root, name)
+        try:
+          stat = os.stat(path)
+        except OSError:
+          continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        totalSize += stat.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+      if totalSize <= self.MaxSize:
+        break
+      try:
+        os.remove(path)
+        totalSize -= size
+        Io.Debug(f"    => Cache evicted: {os.path.basename(path)}")
+      except OSError:
+        pass
+    self.size = totalSize
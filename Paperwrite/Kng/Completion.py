@@ -0,0 +1,211 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Completion
+# @namespace Paperwrite.Kng.Completion
+#
+# Package containing the completion of incomplete triples with a trained ComplEx
+# model. Instead of scoring every candidate with `model.predict`, the known
+# parts of a query are folded into a single vector, so all candidate entities or
+# relations are ranked by one matrix-vector product over the embeddings.
+#
+# Embeddings of ComplEx store the real and imaginary part of every vector next
+# to each other (`[real | imag]`). The score of a triple `(h, r, t)` is
+#
+# ~~~
+# sum(h_re * r_re * t_re + h_re * r_im * t_im + h_im * r_re * t_im
+#     - h_im * r_im * t_re)
+# ~~~
+#
+# @example
+# ~~~{.py}
+# embeddings = GetEmbeddings(model)
+# candidates = CompleteTail(embeddings, "Paper", "refrences", k=10)
+# ~~~
+
+# -- STL
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+# -- LIBRARY
+import numpy as np
+
+# -- PROJECT
+from Paperwrite.PyAdditions.Errors import Error
+
+
+##
+# Trained embeddings of a ComplEx model.
+#
+# @param  Entities  `np.ndarray` -- names of entities in order of their
+# embeddings
+# @param  Relations   `np.ndarray` -- names of relations in order of their
+# embeddings
+# @param  EntityIndex   `Dict[str, int]` -- index of embedding per entity
+# @param  RelationIndex   `Dict[str, int]` -- index of embedding per relation
+# @param  EntityEmb   `np.ndarray` -- entity embeddings as `N x 2k` array
+# @param  RelationEmb   `np.ndarray` -- relation embeddings as `M x 2k` array
+class Embeddings(NamedTuple):
+  Entities: np.ndarray
+  Relations: np.ndarray
+  EntityIndex: Dict[str, int]
+  RelationIndex: Dict[str, int]
+  EntityEmb: np.ndarray
+  RelationEmb: np.ndarray
+
+
+##
+# Error for entities or relations, that are not part of the trained model.
+class UnknownNodeError(Error):
+  pass
+
+
+##
+# Inverts a mapping of names to indices.
+#
+# @param  mapping   index per name
+#
+# @return names ordered by index
+def InvertMapping(mapping: Dict[str, int]) -> np.ndarray:
+  names = np.empty(len(mapping), dtype=object)
+  for name, idx in mapping.items():
+    names[idx] = name
+  return names
+
+
+##
+# Reads the embeddings of a restored ComplEx model.
+#
+# @param  model   restored ComplEx model
+#
+# @return embeddings of model
+def GetEmbeddings(model: Any) -> Embeddings:
+  entityEmb, relationEmb = model.trained_model_params[:2]
+  return Embeddings(InvertMapping(model.ent_to_idx),
+                    InvertMapping(model.rel_to_idx), model.ent_to_idx,
+                    model.rel_to_idx, np.asarray(entityEmb),
+                    np.asarray(relationEmb))
+
+
+##
+# Splits embeddings into their real and imaginary part.
+#
+# @param  emb   embedding(s) as `[real | imag]`
+#
+# @return real and imaginary part
+def split(emb: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+  k = emb.shape[-1] // 2
+  return emb[..., :k], emb[..., k:]
+
+
+##
+# Looks up the embedding of a name.
+#
+# @param  index   index of embedding per name
+# @param  emb   all embeddings
+# @param  name  name of entity or relation
+#
+# @return embedding of name
+#
+# @throws UnknownNodeError if `name` is not part of the model
+def lookup(index: Dict[str, int], emb: np.ndarray, name: str) -> np.ndarray:
+  idx = index.get(name)
+  if idx is None:
+    raise UnknownNodeError(f"'{name}' is not part of the trained model")
+  return emb[idx]
+
+
+##
+# Scores triples given by the indices of their embeddings.
+#
+# @param  embeddings  embeddings of model
+# @param  heads   indices of head entities
+# @param  relations   indices of relations
+# @param  tails   indices of tail entities
+#
+# @return score of every triple
+def ScoreTriples(embeddings: Embeddings, heads: np.ndarray,
+                 relations: np.ndarray, tails: np.ndarray) -> np.ndarray:
+  hRe, hIm = split(embeddings.EntityEmb[heads])
+  rRe, rIm = split(embeddings.RelationEmb[relations])
+  tRe, tIm = split(embeddings.EntityEmb[tails])
+  return np.sum(hRe * (rRe * tRe + rIm * tIm) + hIm * (rRe * tIm - rIm * tRe),
+                axis=-1)
+
+
+##
+# Selects the `k` highest scores. Only the top-k are sorted, all other scores
+# are partitioned in linear time.
+#
+# @param  names   candidate per score
+# @param  scores  score per candidate
+# @param  k   number of candidates to return
+#
+# @return top-k candidates as `(name, score)`, highest score first
+def TopK(names: np.ndarray, scores: np.ndarray,
+         k: int) -> List[Tuple[str, float]]:
+  k = min(k, len(scores))
+  if k <= 0:
+    return []
+  top = np.argpartition(-scores, k - 1)[:k]
+  top = top[np.argsort(-scores[top], kind="stable")]
+  return [(str(names[i]), float(scores[i])) for i in top]
+
+
+##
+# Ranks all entities as tail of `(head, relation, ?)`.
+#
+# @param  embeddings  embeddings of model
+# @param  head  name of head entity
+# @param  relation  name of relation
+# @param  k   number of candidates to return
+#
+# @return top-k tails as `(name, score)`, highest score first
+#
+# @throws UnknownNodeError if `head` or `relation` is not part of the model
+def CompleteTail(embeddings: Embeddings, head: str, relation: str,
+                 k: int) -> List[Tuple[str, float]]:
+  hRe, hIm = split(lookup(embeddings.EntityIndex, embeddings.EntityEmb, head))
+  rRe, rIm = split(
+      lookup(embeddings.RelationIndex, embeddings.RelationEmb, relation))
+  query = np.concatenate([hRe * rRe - hIm * rIm, hRe * rIm + hIm * rRe])
+  return TopK(embeddings.Entities, embeddings.EntityEmb @ query, k)
+
+
+##
+# Ranks all entities as head of `(?, relation, tail)`.
+#
+# @param  embeddings  embeddings of model
+# @param  relation  name of relation
+# @param  tail  name of tail entity
+# @param  k   number of candidates to return
+#
+# @return top-k heads as `(name, score)`, highest score first
+#
+# @throws UnknownNodeError if `relation` or `tail` is not part of the model
+def CompleteHead(embeddings: Embeddings, relation: str, tail: str,
+                 k: int) -> List[Tuple[str, float]]:
+  rRe, rIm = split(
+      lookup(embeddings.RelationIndex, embeddings.RelationEmb, relation))
+  tRe, tIm = split(lookup(embeddings.EntityIndex, embeddings.EntityEmb, tail))
+  query = np.concatenate([rRe * tRe + rIm * tIm, rRe * tIm - rIm * tRe])
+  return TopK(embeddings.Entities, embeddings.EntityEmb @ query, k)
+
+
+##
+# Ranks all relations of `(head, ?, tail)`.
+#
+# @param  embeddings  embeddings of model
+# @param  head  name of head entity
+# @param  tail  name of tail entity
+# @param  k   number of candidates to return
+#
+# @return top-k relations as `(name, score)`, highest score first
+#
+# @throws UnknownNodeError if `head` or `tail` is not part of the model
+def CompleteRelation(embeddings: Embeddings, head: str, tail: str,
+                     k: int) -> List[Tuple[str, float]]:
+  hRe, hIm = split(lookup(embeddings.EntityIndex, embeddings.EntityEmb, head))
+  tRe, tIm = split(lookup(embeddings.EntityIndex, embeddings.EntityEmb, tail))
+  query = np.concatenate([hRe * tRe + hIm * tIm, hRe * tIm - hIm * tRe])
+  return TopK(embeddings.Relations, embeddings.RelationEmb @ query, k)
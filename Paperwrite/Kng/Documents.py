@@ -0,0 +1,194 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Documents
+# @namespace Paperwrite.Kng.Documents
+#
+# Package containing the document pipeline of a KNG: parsing uploaded files with
+# Tika, cleaning up their text, segmenting it into sentences and extracting
+# triples. Results are cached per file content (see Paperwrite.Kng.Cache), so a
+# file, that has already been processed once, only costs a hash and a lookup.
+
+# -- STL
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# -- LIBRARY
+import tqdm
+from werkzeug.datastructures import FileStorage
+
+# -- PROJECT
+from Paperwrite.Application import AppContext
+from Paperwrite.Kng.Cache import HashFile
+from Paperwrite.Kng.Jobs import ProgressFunc, ScaleProgress
+from Paperwrite.Kng.Nlp import PIPELINE_PARSER, PIPELINE_SENTENCIZER
+from Paperwrite.Kng.Text import IterChunks, SentenceSegmenter, TextNormalizer
+from Paperwrite.Kng.Triples import NormalizeTriples, TripleSet
+from Paperwrite.PyAdditions.Io import CLI_FORMATTER
+
+##
+# Relation of triples, that link a document to its references.
+REFERENCE_RELATION = "refrences"
+
+##
+# Subject of triples, that link a document to its references.
+REFERENCE_SUBJECT = "Paper"
+
+
+##
+# Extraction result of a single document.
+#
+# @param  Digest  `str` -- SHA-256 of file content
+# @param  Triples   `List[List[str]]` -- extracted `[subject, relation, object]`
+# triples in order of sentences
+# @param  References  `List[str]` -- references found in document
+class DocumentResult(NamedTuple):
+  Digest: str
+  Triples: List[List[str]]
+  References: List[str]
+
+
+##
+# Cleans up the text extracted by Tika and segments it into sentences. Both
+# steps stream over bounded chunks of the text (see Paperwrite.Kng.Text).
+#
+# @param  raw   raw text of document
+#
+# @return sentences and list of references found in text
+def SegmentDocument(raw: str) -> Tuple[List[str], List[str]]:
+  config = AppContext.Config.Extraction
+  normalizer = TextNormalizer()
+  with AppContext.Nlp.Acquire(PIPELINE_SENTENCIZER) as handle:
+    segmenter = SentenceSegmenter(handle.Nlp, config.WindowSize)
+    sentences = list(
+        segmenter.Segment(
+            normalizer.Normalize(IterChunks(raw, config.ChunkSize))))
+  return sentences, normalizer.References
+
+
+##
+# Extracts triples from sentences. Uses the sharded process pool, if more than
+# one extraction worker is configured, otherwise a parser of the registry.
+#
+# @param  sentences   list of sentences as strings
+# @param  progress  function progress is reported to (optional)
+#
+# @return triples in order of sentences
+def ExtractTriples(sentences: List[str],
+                   progress: Optional[ProgressFunc] = None) -> List[List[str]]:
+  if len(sentences) == 0:
+    return []
+
+  desc = f"{CLI_FORMATTER.GetPrefix('DEBUG')}    => Building KNG"
+  batchSize = AppContext.Config.Extraction.BatchSize
+  workers = AppContext.Config.Extraction.Workers
+
+  def collect(triples) -> List[List[str]]:
+    result = []
+    for triple in tqdm.tqdm(triples, desc=desc, total=len(sentences)):
+      result.append(triple)
+      if progress is not None and len(result) % batchSize == 0:
+        progress(len(result) / len(sentences),
+                 f"Extracted {len(result)}/{len(sentences)} sentences")
+    return result
+
+  if workers > 1:
+    extractor = AppContext.Nlp.GetShardedExtractor(workers)
+    return collect(extractor.Extract(sentences))
+
+  with AppContext.Nlp.Acquire(PIPELINE_PARSER) as handle:
+    return collect(handle.Extractor.Extract(sentences))
+
+
+##
+# Runs the document pipeline over uploaded files. Files, whose content is found
+# in the extraction cache, are not parsed again. All other files are parsed in
+# parallel and their sentences are extracted together.
+#
+# @param  paths   paths to uploaded files
+# @param  progress  function progress is reported to (optional)
+#
+# @return extraction results in order of `paths`
+def ExtractDocuments(
+    paths: List[str],
+    progress: Optional[ProgressFunc] = None) -> List[DocumentResult]:
+  progress = progress or (lambda value, message: None)
+  cache = AppContext.Cache
+  digests = [HashFile(p) for p in paths]
+  results: Dict[str, DocumentResult] = {}
+
+  # look up all distinct files in cache
+  missing = []
+  for path, digest in zip(paths, digests):
+    if digest in results:
+      continue
+    entry = cache.Get(cache.Key(digest))
+    if entry is None:
+      missing.append((path, digest))
+      results[digest] = None
+    else:
+      results[digest] = DocumentResult(digest, entry["triples"],
+                                       entry["references"])
+
+  # parse, clean and segment all files, that are not cached
+  entries = []
+  counts = []
+  sentences = []
+  progress(0.0, f"Parsing {len(missing)} document(s)")
+  raws = AppContext.Tika.ParseAll([path for path, _ in missing])
+  while raws:
+    progress(0.1 + 0.2 * len(entries) / len(missing),
+             f"Segmenting document {len(entries) + 1}/{len(missing)}")
+    # release raw text of document as soon as it is segmented
+    sents, refs = SegmentDocument(raws.pop(0))
+    entries.append({"sentences": sents, "references": refs})
+    counts.append(len(sents))
+    sentences.extend(sents)
+
+  # extract triples of all sentences at once and split them by file
+  progress(0.3, f"Extracting {len(sentences)} sentences")
+  triples = ExtractTriples(sentences, ScaleProgress(progress, 0.3, 1.0))
+  offset = 0
+  for (_, digest), entry, count in zip(missing, entries, counts):
+    entry["triples"] = triples[offset:offset + count]
+    offset += count
+    cache.Put(cache.Key(digest), entry)
+    results[digest] = DocumentResult(digest, entry["triples"],
+                                     entry["references"])
+
+  return [results[d] for d in digests]
+
+
+##
+# Saves uploaded files into a folder.
+#
+# @param  files   uploaded files of request
+# @param  folder  folder files should be saved to
+#
+# @return paths of saved files and their original filenames
+def SaveUploads(files: List[FileStorage],
+                folder: str) -> Tuple[List[str], List[str]]:
+  paths = []
+  filenames = []
+  for f in files:
+    path = os.path.join(folder, f.filename)
+    f.save(path)
+    paths.append(path)
+    filenames.append(f.filename)
+  return paths, filenames
+
+
+##
+# Builds the triples of a graph from extraction results. Every reference is
+# linked to the paper (see Paperwrite.Kng.Triples.NormalizeTriples).
+#
+# @param  documents   extraction results of documents
+#
+# @return deduplicated set of triples
+def BuildTriples(documents: List[DocumentResult]) -> TripleSet:
+  rows = [t for d in documents for t in d.Triples]
+  for d in documents:
+    for r in d.References:
+      rows.append([REFERENCE_SUBJECT, REFERENCE_RELATION, str(r)])
+  return NormalizeTriples(rows)
@@ -0,0 +1,192 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Engine
+# @namespace Paperwrite.Kng.Engine
+#
+# Package containing the inference engine for trained ComplEx models. Scores are
+# computed from the embeddings with NumPy, so serving predictions neither
+# imports tensorflow nor ampligraph. Trainings export the embeddings of their
+# model as plain arrays, which are memory mapped by the engine. Models trained
+# before the export was introduced are read from the model file directly, which
+# only contains NumPy arrays and dictionaries.
+#
+# Every export is written as a new generation (see
+# Paperwrite.Kng.Store.SaveGeneration), so readers always see embeddings and
+# mappings of the same model.
+#
+# @example
+# ~~~{.py}
+# engine = LoadEngine(folder)
+# scores = engine.Predict(np.array([["Paper", "refrences", "ComplEx"]]))
+# ~~~
+
+# -- STL
+import json
+import os
+import pickle
+from typing import Dict, Optional, Tuple
+
+# -- LIBRARY
+import numpy as np
+
+# -- PROJECT
+from Paperwrite.Kng.Completion import Embeddings, InvertMapping, ScoreTriples, UnknownNodeError
+from Paperwrite.Kng.Store import SaveGeneration, EMBEDDINGS_FILE, EMBEDDINGS_ARRAY_FILE, MODEL_FILE
+
+
+##
+# ComplEx model, that scores triples with NumPy.
+class ComplExEngine():
+
+  ##
+  # @var Embeddings
+  # trained embeddings of model
+  Embeddings: Embeddings
+
+  ##
+  # Constructor
+  #
+  # @param  embeddings  trained embeddings of model
+  def __init__(self, embeddings: Embeddings) -> None:
+    self.Embeddings = embeddings
+
+  ##
+  # Estimates the memory used by the embeddings.
+  #
+  # @return size in bytes
+  def Size(self) -> int:
+    return self.Embeddings.EntityEmb.nbytes + self.Embeddings.RelationEmb.nbytes
+
+  ##
+  # Looks up the indices of the embeddings of triples.
+  #
+  # @param  triples   `[subject, relation, object]` triples as `N x 3` array of
+  # strings
+  #
+  # @return indices as `N x 3` array (-1 for unknown values) and mask of
+  # triples, whose values are all part of the model
+  def Indices(self, triples: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    triples = np.asarray(triples, dtype=str).reshape(-1, 3)
+    indices = np.empty(triples.shape, dtype=np.int64)
+    for col, index in enumerate((self.Embeddings.EntityIndex,
+                                 self.Embeddings.RelationIndex,
+                                 self.Embeddings.EntityIndex)):
+      indices[:, col] = [index.get(value, -1) for value in triples[:, col]]
+    return indices, (indices >= 0).all(axis=1)
+
+  ##
+  # Scores triples given by the indices of their embeddings.
+  #
+  # @param  indices   indices as `N x 3` array
+  #
+  # @return score of every triple
+  def Score(self, indices: np.ndarray) -> np.ndarray:
+    return ScoreTriples(self.Embeddings, indices[:, 0], indices[:, 1],
+                        indices[:, 2])
+
+  ##
+  # Scores triples. Equals `predict` of an uncalibrated ampligraph model.
+  #
+  # @param  triples   `[subject, relation, object]` triple(s)
+  #
+  # @return score of every triple
+  #
+  # @throws UnknownNodeError if a value of a triple is not part of the model
+  def Predict(self, triples: np.ndarray) -> np.ndarray:
+    indices, known = self.Indices(triples)
+    if not known.all():
+      raise UnknownNodeError("triple contains values, that are not part of the "
+                             "trained model")
+    return self.Score(indices)
+
+
+##
+# Exports the embeddings of a model as plain arrays.
+#
+# @param  folder  folder of KNG
+# @param  embeddings  trained embeddings of model
+def SaveEmbeddings(folder: str, embeddings: Embeddings) -> None:
+  SaveGeneration(
+      folder, EMBEDDINGS_FILE, {
+          "entities": [str(e) for e in embeddings.Entities],
+          "relations": [str(r) for r in embeddings.Relations],
+      }, {
+          "entity_emb": (EMBEDDINGS_ARRAY_FILE.format("entities", "{}"),
+                         embeddings.EntityEmb),
+          "relation_emb": (EMBEDDINGS_ARRAY_FILE.format("relations", "{}"),
+                           embeddings.RelationEmb),
+      })
+
+
+##
+# Reads the exported embeddings of a model.
+#
+# @param  folder  folder of KNG
+# @param  mmapMode  mode for memory mapping the arrays (see `numpy.load`)
+#
+# @return trained embeddings of model
+#
+# @throws FileNotFoundError if the embeddings of the KNG were not exported
+def LoadEmbeddings(folder: str, mmapMode: Optional[str] = None) -> Embeddings:
+  with open(os.path.join(folder, EMBEDDINGS_FILE), "r") as f:
+    content = json.load(f)
+  entities, relations = content["entities"], content["relations"]
+  return Embeddings(
+      np.asarray(entities, dtype=object), np.asarray(relations, dtype=object),
+      {e: i for i, e in enumerate(entities)},
+      {r: i for i, r in enumerate(relations)},
+      np.load(os.path.join(folder, content["entity_emb"]), mmap_mode=mmapMode),
+      np.load(os.path.join(folder, content["relation_emb"]),
+              mmap_mode=mmapMode))
+
+
+##
+# Reads the embeddings of a model from the model file saved by ampligraph.
+#
+# @param  folder  folder of KNG
+# @param  filename  filename of model file
+#
+# @return trained embeddings of model
+#
+# @throws FileNotFoundError if the KNG has no model
+def ReadModelFile(folder: str, filename: str = MODEL_FILE) -> Embeddings:
+  with open(os.path.join(folder, filename), "rb") as f:
+    params = pickle.load(f)
+  entToIdx: Dict[str, int] = params["ent_to_idx"]
+  relToIdx: Dict[str, int] = params["rel_to_idx"]
+  entityEmb, relationEmb = params["model_params"][:2]
+  return Embeddings(InvertMapping(entToIdx), InvertMapping(relToIdx), entToIdx,
+                    relToIdx, np.asarray(entityEmb), np.asarray(relationEmb))
+
+
+##
+# Returns the file the engine of a KNG is loaded from.
+#
+# @param  folder  folder of KNG
+#
+# @return path to export of embeddings, if it exists, otherwise to model file
+def EngineSource(folder: str) -> str:
+  exportPath = os.path.join(folder, EMBEDDINGS_FILE)
+  if os.path.isfile(exportPath):
+    return exportPath
+  return os.path.join(folder, MODEL_FILE)
+
+
+##
+# Loads the inference engine of a KNG.
+#
+# @param  folder  folder of KNG
+#
+# @return engine with memory mapped embeddings, if they were exported
+#
+# @throws FileNotFoundError if the KNG has no model
+def LoadEngine(folder: str) -> ComplExEngine:
+  if os.path.isfile(os.path.join(folder, EMBEDDINGS_FILE)):
+    try:
+      return ComplExEngine(LoadEmbeddings(folder, mmapMode="r"))
+    except FileNotFoundError:
+      # arrays were replaced by a new export in between, read the model file
+      pass
+  return ComplExEngine(ReadModelFile(folder))
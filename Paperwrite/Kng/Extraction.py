@@ -0,0 +1,318 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Extraction
+# @namespace Paperwrite.Kng.Extraction
+#
+# Package containing the triple extraction engine. Every sentence is parsed
+# exactly once and entities as well as the relation are read from the same
+# spaCy Doc. Sentences are streamed through `nlp.pipe` in batches. For large
+# uploads the sentences can be sharded across a pool of worker processes, each
+# holding its own spaCy pipeline (see ShardedTripleExtractor).
+
+# -- STL
+import math
+import multiprocessing
+from multiprocessing.pool import Pool
+from threading import Lock
+from typing import Iterable, Iterator, List, Optional
+
+# -- LIBRARY
+import spacy
+from spacy.language import Language
+from spacy.matcher import Matcher
+from spacy.tokens import Doc
+
+##
+# Value returned for the relation of a triple, if no relation could be found
+# inside of a sentence.
+UNDEFINED_RELATION = "undefined"
+
+##
+# Matcher pattern for relations. Matches the ROOT of a sentence followed by an
+# optional preposition, agent and adjective.
+RELATION_PATTERN = [{
+    "DEP": "ROOT"
+}, {
+    "DEP": "prep",
+    "OP": "?"
+}, {
+    "DEP": "agent",
+    "OP": "?"
+}, {
+    "POS": "ADJ",
+    "OP": "?"
+}]
+
+
+##
+# Extracts the subject and object entity from a parsed sentence.
+#
+# @param  doc   parsed sentence
+#
+# @return list of `[subject, object]`, entities that could not be found are
+# empty strings
+def GetEntities(doc: Doc) -> List[str]:
+  entity1 = ""
+  entity2 = ""
+
+  previousTokenDependency = ""  # dependency tag of previous token in the sentence
+  previousTokenText = ""  # previous token in the sentence
+
+  prefix = ""
+  modifier = ""
+
+  for token in doc:
+    # if token is a punctuation mark then move on to the next token
+    if token.dep_ == "punct":
+      continue
+
+    # check: token is a compound word or not
+    if token.dep_ == "compound":
+      prefix = token.text
+      # if the previous word was also a 'compound' then add the current word to it
+      if previousTokenDependency == "compound":
+        prefix = previousTokenText + " " + token.text
+
+    # check: token is a modifier or not
+    if token.dep_.endswith("mod"):
+      modifier = token.text
+      # if the previous word was also a 'compound' then add the current word to it
+      if previousTokenDependency == "compound":
+        modifier = previousTokenText + " " + token.text
+
+    # subjects (nsubj, csubj, nsubjpass, ...) carry "subj" at index 1
+    if token.dep_.find("subj") == 1:
+      entity1 = modifier + " " + prefix + " " + token.text
+      prefix = ""
+      modifier = ""
+      previousTokenDependency = ""
+      previousTokenText = ""
+
+    # objects (dobj, pobj, iobj) carry "obj" at index 1
+    if token.dep_.find("obj") == 1:
+      entity2 = modifier + " " + prefix + " " + token.text
+
+    # update variables
+    previousTokenDependency = token.dep_
+    previousTokenText = token.text
+
+  return [entity1.strip(), entity2.strip()]
+
+
+##
+# Engine for extracting `[subject, relation, object]` triples from sentences.
+# Holds a single precompiled Matcher for the relation pattern, which is reused
+# for every sentence.
+class TripleExtractor():
+
+  ##
+  # @var Nlp
+  # spaCy pipeline used for parsing sentences (needs a tagger and a parser)
+  Nlp: Language
+
+  ##
+  # @var BatchSize
+  # Number of sentences, that are buffered and parsed together by `nlp.pipe`.
+  BatchSize: int
+
+  ##
+  # @var matcher
+  # internal precompiled Matcher for relations
+  matcher: Matcher
+
+  ##
+  # Constructor
+  #
+  # @param  nlp   spaCy pipeline used for parsing sentences
+  # @param  batchSize   number of sentences parsed together (default: 256)
+  def __init__(self, nlp: Language, batchSize: int = 256) -> None:
+    self.Nlp = nlp
+    self.BatchSize = batchSize
+    self.matcher = Matcher(nlp.vocab)
+    self.matcher.add("relation", [RELATION_PATTERN])
+
+  ##
+  # Extracts the relation from a parsed sentence. The last match of the
+  # relation pattern is used.
+  #
+  # @param  doc   parsed sentence
+  #
+  # @return relation as string, UNDEFINED_RELATION if none could be found
+  def GetRelation(self, doc: Doc) -> str:
+    matches = self.matcher(doc)
+    if len(matches) == 0:
+      return UNDEFINED_RELATION
+
+    _, start, end = matches[-1]
+    return doc[start:end].text
+
+  ##
+  # Extracts a triple from a parsed sentence.
+  #
+  # @param  doc   parsed sentence
+  #
+  # @return triple as `[subject, relation, object]`
+  def ExtractFromDoc(self, doc: Doc) -> List[str]:
+    entity1, entity2 = GetEntities(doc)
+    return [entity1, self.GetRelation(doc), entity2]
+
+  ##
+  # Extracts a triple from a single sentence.
+  #
+  # @param  sentence  sentence as string
+  #
+  # @return triple as `[subject, relation, object]`
+  def ExtractOne(self, sentence: str) -> List[str]:
+    return self.ExtractFromDoc(self.Nlp(sentence))
+
+  ##
+  # Extracts triples from a stream of sentences. Sentences are parsed in
+  # batches of `BatchSize` and the order of the input is preserved.
+  #
+  # @param  sentences   iterable of sentences as strings
+  #
+  # @return iterator over triples as `[subject, relation, object]`
+  def Extract(self, sentences: Iterable[str]) -> Iterator[List[str]]:
+    for doc in self.Nlp.pipe(sentences, batch_size=self.BatchSize):
+      yield self.ExtractFromDoc(doc)
+
+
+##
+# Number of shards every worker process receives. More than one shard per worker
+# evens out shards with very long sentences.
+SHARDS_PER_WORKER = 4
+
+##
+# Extractor of the current worker process, initialized once by `_InitWorker`.
+_WORKER_EXTRACTOR: Optional[TripleExtractor] = None
+
+
+##
+# Initializer of worker processes. Loads the spaCy pipeline once per worker.
+#
+# @param  model   name or path of spaCy pipeline
+# @param  exclude   names of pipeline components, that should not be loaded
+# @param  batchSize   number of sentences parsed together
+def _InitWorker(model: str, exclude: List[str], batchSize: int) -> None:
+  global _WORKER_EXTRACTOR
+  _WORKER_EXTRACTOR = TripleExtractor(spacy.load(model, exclude=exclude),
+                                      batchSize)
+
+
+##
+# Extracts all triples of a shard inside of a worker process.
+#
+# @param  sentences   shard of sentences as strings
+#
+# @return triples in order of sentences
+def _ExtractShard(sentences: List[str]) -> List[List[str]]:
+  return list(_WORKER_EXTRACTOR.Extract(sentences))
+
+
+##
+# Splits a list into at most `count` contiguous shards of (almost) equal size.
+# Concatenating the shards results in the original list.
+#
+# @param  items   list to split
+# @param  count   maximum number of shards
+#
+# @return list of shards
+def SplitShards(items: List, count: int) -> List[List]:
+  if len(items) == 0:
+    return []
+
+  size = math.ceil(len(items) / max(1, count))
+  return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+##
+# Extraction engine, that shards sentences across a pool of worker processes.
+# Every worker loads its own spaCy pipeline once, when the pool is started. The
+# results are merged back in the order of the input sentences.
+class ShardedTripleExtractor():
+
+  ##
+  # @var Model
+  # name or path of spaCy pipeline loaded by the workers
+  Model: str
+
+  ##
+  # @var Exclude
+  # names of pipeline components, that are not loaded by the workers
+  Exclude: List[str]
+
+  ##
+  # @var Workers
+  # number of worker processes
+  Workers: int
+
+  ##
+  # @var BatchSize
+  # number of sentences parsed together inside of a worker
+  BatchSize: int
+
+  ##
+  # @var pool
+  # internal process pool, created on first use
+  pool: Optional[Pool]
+
+  ##
+  # @var lock
+  # internal lock guarding creation of the process pool
+  lock: Lock
+
+  ##
+  # Constructor
+  #
+  # @param  model   name or path of spaCy pipeline
+  # @param  exclude   names of pipeline components, that should not be loaded
+  # @param  workers   number of worker processes
+  # @param  batchSize   number of sentences parsed together (default: 256)
+  def __init__(self,
+               model: str,
+               exclude: List[str],
+               workers: int,
+               batchSize: int = 256) -> None:
+    self.Model = model
+    self.Exclude = exclude
+    self.Workers = workers
+    self.BatchSize = batchSize
+    self.pool = None
+    self.lock = Lock()
+
+  ##
+  # Returns the process pool, starts it if it is not running yet. Workers are
+  # spawned instead of forked, as the server process is multi-threaded.
+  #
+  # @return process pool
+  def GetPool(self) -> Pool:
+    with self.lock:
+      if self.pool is None:
+        context = multiprocessing.get_context("spawn")
+        self.pool = context.Pool(self.Workers,
+                                 initializer=_InitWorker,
+                                 initargs=(self.Model, self.Exclude,
+                                           self.BatchSize))
+      return self.pool
+
+  ##
+  # Extracts triples from a list of sentences across all worker processes.
+  #
+  # @param  sentences   list of sentences as strings
+  #
+  # @return iterator over triples in order of sentences
+  def Extract(self, sentences: List[str]) -> Iterator[List[str]]:
+    shards = SplitShards(sentences, self.Workers * SHARDS_PER_WORKER)
+    for shard in self.GetPool().imap(_ExtractShard, shards):
+      yield from shard
+
+  ##
+  # Stops all worker processes of the pool.
+  def Shutdown(self) -> None:
+    with self.lock:
+      if self.pool is not None:
+        self.pool.close()
+        self.pool.join()
+        self.pool = None
@@ -0,0 +1,40 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Graph
+# @namespace Paperwrite.Kng.Graph
+#
+# Package containing the shared read access to the graphs of the store. Triples
+# and counts of a KNG are memory mapped once and the read-only mapping is shared
+# by all request threads. A mapping is replaced, as soon as the files of its KNG
+# have been rewritten. Triples are written as generations (see
+# Paperwrite.Kng.Store.SaveTriples), so mappings never mix files of different
+# writes, even if the writer is another process.
+#
+# @example
+# ~~~{.py}
+# from Paperwrite.Application import AppContext
+#
+# graph = AppContext.Graphs.Get(os.path.join(AppContext.Store.Mutable, kid))
+# subjects = graph.Entities[graph.Triples[:, 0]]
+# ~~~
+
+# -- PROJECT
+from Paperwrite.Kng.Store import LoadGraph, MappedCache, LEGACY_GRAPH_FILE, VOCAB_FILE
+
+
+##
+# Process wide cache of memory mapped graphs, one per KNG. Owned by
+# Paperwrite.Application.ApplicationContext.
+#
+# @see
+#  - Paperwrite.Kng.Store.MappedCache
+class GraphCache(MappedCache):
+
+  ##
+  # Constructor
+  def __init__(self) -> None:
+    # the vocabulary is replaced on every write
+    super().__init__("graph", (VOCAB_FILE, LEGACY_GRAPH_FILE),
+                     lambda folder: LoadGraph(folder, mmapMode="r"))
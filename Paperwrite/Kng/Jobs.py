@@ -0,0 +1,396 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Jobs
+# @namespace Paperwrite.Kng.Jobs
+#
+# Package containing the persistent queue for long running work, like the
+# creation of a KNG. Jobs are stored in a SQLite database inside of the store
+# and processed by a bounded pool of worker threads. Jobs, that were queued or
+# running when the application stopped, are processed again after a restart.
+# In pre-fork mode, the workers submit jobs through a JobClient to the queue of
+# the service process, so its worker threads are woken up at once.
+#
+# @example
+# ~~~{.py}
+# def Work(job: Job, progress: ProgressFunc) -> Dict[str, Any]:
+#   progress(0.5, "half way")
+#   return {"answer": 42}
+#
+# AppContext.Jobs.Register("work", Work)
+# AppContext.Jobs.Start()
+# jid = AppContext.Jobs.Submit("work", kid, {"key": "value"})
+# ~~~
+
+# -- STL
+import json
+import os
+import sqlite3
+import time
+import uuid
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+# -- PROJECT
+from Paperwrite.Configuration import JobsConfiguration
+from Paperwrite.PyAdditions import Io
+from Paperwrite.PyAdditions.Errors import NotSupportedError
+from Paperwrite.Remote import RemoteClient
+
+##
+# Status of a job, that waits for a worker.
+STATUS_QUEUED = "queued"
+
+##
+# Status of a job, that is processed by a worker.
+STATUS_RUNNING = "running"
+
+##
+# Status of a job, that finished successfully.
+STATUS_DONE = "done"
+
+##
+# Status of a job, that raised an exception.
+STATUS_FAILED = "failed"
+
+##
+# Schema of job table.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+  id TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,
+  kid TEXT NOT NULL,
+  status TEXT NOT NULL,
+  progress REAL NOT NULL DEFAULT 0,
+  message TEXT NOT NULL DEFAULT '',
+  payload TEXT NOT NULL,
+  result TEXT,
+  error TEXT,
+  created REAL NOT NULL,
+  started REAL,
+  finished REAL
+)
+"""
+
+
+##
+# A job of the queue.
+#
+# @param  Id  `str` -- id of job (UUID version 4)
+# @param  Kind  `str` -- kind of job, selects the function processing it
+# @param  Kid   `str` -- id of KNG the job works on
+# @param  Status  `str` -- one of `queued`, `running`, `done` or `failed`
+# @param  Progress  `float` -- progress between 0 and 1
+# @param  Message   `str` -- description of current step
+# @param  Payload   `Dict[str, Any]` -- arguments of job
+# @param  Result  `Optional[Dict[str, Any]]` -- result of finished job
+# @param  Error   `Optional[str]` -- error of failed job
+# @param  Created   `float` -- unix time job was submitted
+# @param  Started   `Optional[float]` -- unix time job was started
+# @param  Finished  `Optional[float]` -- unix time job was finished
+class Job(NamedTuple):
+  Id: str
+  Kind: str
+  Kid: str
+  Status: str
+  Progress: float
+  Message: str
+  Payload: Dict[str, Any]
+  Result: Optional[Dict[str, Any]]
+  Error: Optional[str]
+  Created: float
+  Started: Optional[float]
+  Finished: Optional[float]
+
+  ##
+  # Converts job into a json-serializable dictionary.
+  #
+  # @return job as dictionary
+  def ToDict(self) -> Dict[str, Any]:
+    return {
+        "id": self.Id,
+        "kind": self.Kind,
+        "kid": self.Kid,
+        "status": self.Status,
+        "progress": self.Progress,
+        "message": self.Message,
+        "result": self.Result,
+        "error": self.Error,
+        "created": self.Created,
+        "started": self.Started,
+        "finished": self.Finished,
+    }
+
+
+##
+# Function for reporting the progress of a job, takes the progress between 0
+# and 1 and a description of the current step.
+ProgressFunc = Callable[[float, str], None]
+
+##
+# Function processing a job, returns the result of the job.
+JobFunc = Callable[[Job, ProgressFunc], Dict[str, Any]]
+
+
+##
+# Maps the progress of a single step onto a range of the overall progress.
+#
+# @param  progress  function overall progress is reported to
+# @param  start   overall progress at begin of step
+# @param  end   overall progress at end of step
+#
+# @return function progress of step is reported to
+def ScaleProgress(progress: ProgressFunc, start: float,
+                  end: float) -> ProgressFunc:
+  return lambda value, message: progress(start + (end - start) * value, message)
+
+
+##
+# Persistent job queue with a bounded pool of worker threads. Owned by
+# Paperwrite.Application.ApplicationContext and started in
+# Paperwrite.__main__.Main.
+class JobQueue():
+
+  ##
+  # @var Config
+  # configuration of queue
+  Config: JobsConfiguration
+
+  ##
+  # @var Path
+  # path to SQLite database
+  Path: str
+
+  ##
+  # @var funcs
+  # internal map of functions per kind of job
+  funcs: Dict[str, JobFunc]
+
+  ##
+  # @var connection
+  # internal connection to database, shared by all threads
+  connection: Optional[sqlite3.Connection]
+
+  ##
+  # @var lock
+  # internal lock guarding `connection`
+  lock: Lock
+
+  ##
+  # @var claimLock
+  # internal lock guarding the claiming of queued jobs
+  claimLock: Lock
+
+  ##
+  # @var wakeup
+  # internal condition notified on new jobs
+  wakeup: Condition
+
+  ##
+  # @var workers
+  # internal list of worker threads
+  workers: List[Thread]
+
+  ##
+  # Constructor. Does not open the database or start any worker.
+  #
+  # @param  config  configuration from `jobs`-block from configuration file
+  # @param  path  path to SQLite database
+  def __init__(self, config: JobsConfiguration, path: str) -> None:
+    self.Config = config
+    self.Path = path
+    self.funcs = {}
+    self.connection = None
+    self.lock = Lock()
+    self.claimLock = Lock()
+    self.wakeup = Condition()
+    self.workers = []
+
+  ##
+  # Registers the function processing a kind of job.
+  #
+  # @param  kind  kind of job
+  # @param  func  function processing job
+  def Register(self, kind: str, func: JobFunc) -> None:
+    self.funcs[kind] = func
+
+  ##
+  # Executes a statement on the database.
+  #
+  # @param  sql   statement
+  # @param  params  parameters of statement
+  #
+  # @return fetched rows
+  def execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+    with self.lock:
+      if self.connection is None:
+        os.makedirs(os.path.dirname(self.Path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(self.Path, check_same_thread=False)
+        self.connection.execute(SCHEMA)
+      with self.connection:
+        return self.connection.execute(sql, params).fetchall()
+
+  ##
+  # Converts a row of the database into a job.
+  #
+  # @param  row   row of job table
+  #
+  # @return job
+  def toJob(self, row: tuple) -> Job:
+    (jid, kind, kid, status, progress, message, payload, result, error,
+     created, started, finished) = row
+    return Job(jid, kind, kid, status, progress, message, json.loads(payload),
+               None if result is None else json.loads(result), error, created,
+               started, finished)
+
+  ##
+  # Requeues jobs interrupted by a restart and starts the worker threads.
+  def Start(self) -> None:
+    interrupted = self.execute("SELECT id FROM jobs WHERE status = ?",
+                               (STATUS_RUNNING,))
+    if interrupted:
+      Io.Info(f"Requeuing {len(interrupted)} interrupted job(s)")
+      self.execute(
+          "UPDATE jobs SET status = ?, progress = 0, message = '' "
+          "WHERE status = ?", (STATUS_QUEUED, STATUS_RUNNING))
+
+    for i in range(self.Config.Workers):
+      worker = Thread(target=self.work, name=f"ppw-job-{i}", daemon=True)
+      worker.start()
+      self.workers.append(worker)
+
+  ##
+  # Submits a new job.
+  #
+  # @param  kind  kind of job
+  # @param  kid   id of KNG the job works on
+  # @param  payload   json-serializable arguments of job
+  #
+  # @return id of job
+  #
+  # @throws NotSupportedError if no function is registered for `kind`
+  def Submit(self, kind: str, kid: str, payload: Dict[str, Any]) -> str:
+    if kind not in self.funcs:
+      raise NotSupportedError(f"kind of job '{kind}' is not registered")
+
+    jid = str(uuid.uuid4())
+    self.execute(
+        "INSERT INTO jobs (id, kind, kid, status, payload, created) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (jid, kind, kid, STATUS_QUEUED, json.dumps(payload), time.time()))
+    with self.wakeup:
+      self.wakeup.notify()
+    return jid
+
+  ##
+  # Looks up a job.
+  #
+  # @param  jid   id of job
+  #
+  # @return job, None if there is no job with id `jid`
+  def Get(self, jid: str) -> Optional[Job]:
+    rows = self.execute("SELECT * FROM jobs WHERE id = ?", (jid,))
+    return self.toJob(rows[0]) if rows else None
+
+  ##
+  # Takes the oldest queued job and marks it as running.
+  #
+  # @return job, None if no job is queued
+  def claim(self) -> Optional[Job]:
+    # no other worker can claim the same job in between
+    with self.claimLock:
+      rows = self.execute(
+          "SELECT * FROM jobs WHERE status = ? ORDER BY created LIMIT 1",
+          (STATUS_QUEUED,))
+      if not rows:
+        return None
+      job = self.toJob(rows[0])
+      self.execute("UPDATE jobs SET status = ?, started = ? WHERE id = ?",
+                   (STATUS_RUNNING, time.time(), job.Id))
+    return job._replace(Status=STATUS_RUNNING)
+
+  ##
+  # Updates the progress of a running job.
+  #
+  # @param  jid   id of job
+  # @param  progress  progress between 0 and 1
+  # @param  message   description of current step
+  def setProgress(self, jid: str, progress: float, message: str) -> None:
+    self.execute("UPDATE jobs SET progress = ?, message = ? WHERE id = ?",
+                 (min(max(progress, 0.0), 1.0), message, jid))
+
+  ##
+  # Processes a single job and stores its outcome.
+  #
+  # @param  job   job to process
+  def run(self, job: Job) -> None:
+    Io.Info(f"Running job {job.Id} ({job.Kind}, {job.Kid})")
+    progress = lambda value, message: self.setProgress(job.Id, value, message)
+    try:
+      result = self.funcs[job.Kind](job, progress)
+    except Exception as err:
+      Io.Error(f"Job {job.Id} failed: {err}")
+      self.execute(
+          "UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?",
+          (STATUS_FAILED, str(err), time.time(), job.Id))
+      return
+
+    self.execute(
+        "UPDATE jobs SET status = ?, progress = 1, message = '', result = ?, "
+        "finished = ? WHERE id = ?",
+        (STATUS_DONE, json.dumps(result or {}), time.time(), job.Id))
+    Io.Info(f"Finished job {job.Id}")
+
+  ##
+  # Loop of worker thread. Waits for queued jobs and processes them.
+  def work(self) -> None:
+    while True:
+      job = self.claim()
+      if job is None:
+        with self.wakeup:
+          # wake up regularly, in case a notification was missed
+          self.wakeup.wait(timeout=5)
+        continue
+      self.run(job)
+
+
+##
+# Methods of JobQueue, that can be called by a JobClient.
+JOB_METHODS = ("Submit",)
+
+
+##
+# Client of a job queue served by Paperwrite.Remote.Serve in another process,
+# as `jobs`. Offers the methods of JobQueue used by the handlers. Jobs are
+# submitted to the served queue, so its worker threads are notified. Jobs are
+# looked up in the database of the local queue, that is shared by all
+# processes.
+class JobClient(RemoteClient):
+
+  ##
+  # @var queue
+  # internal queue of this process, jobs are looked up in
+  queue: JobQueue
+
+  ##
+  # Constructor
+  #
+  # @param  address   address of listener serving the queue
+  # @param  authkey   key authenticating the client
+  # @param  queue   queue of this process, jobs are looked up in
+  def __init__(self, address: str, authkey: bytes, queue: JobQueue) -> None:
+    super().__init__(address, authkey, "jobs")
+    self.queue = queue
+
+  ##
+  # @see
+  #  - JobQueue.Submit
+  def Submit(self, kind: str, kid: str, payload: Dict[str, Any]) -> str:
+    return self.call("Submit", kind, kid, payload)
+
+  ##
+  # @see
+  #  - JobQueue.Get
+  def Get(self, jid: str) -> Optional[Job]:
+    return self.queue.Get(jid)
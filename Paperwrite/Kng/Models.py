@@ -0,0 +1,223 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Models
+# @namespace Paperwrite.Kng.Models
+#
+# Package containing the cache of inference engines of trained ComplEx models
+# (see Paperwrite.Kng.Engine). Loaded engines are kept in memory and shared by
+# all request threads, as scoring only reads their embeddings. The cache is
+# bounded by a memory budget and evicts least recently used engines first. An
+# engine is loaded again, as soon as its files have been replaced by a new
+# training.
+#
+# @example
+# ~~~{.py}
+# from Paperwrite.Application import AppContext
+#
+# scores = AppContext.Models.Get(folder).Predict(triples)
+# ~~~
+
+# -- STL
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, NamedTuple, Tuple
+
+# -- PROJECT
+from Paperwrite.Configuration import ModelsConfiguration
+from Paperwrite.Kng.Engine import ComplExEngine, EngineSource, LoadEngine
+from Paperwrite.Kng.Store import MODEL_FILE
+from Paperwrite.PyAdditions import Io
+
+
+##
+# Cached engine of a KNG.
+#
+# @param  Key   `Tuple[str, int, int]` -- file the engine was loaded from, its
+# inode and modification time
+# @param  Engine  `ComplExEngine` -- loaded engine
+# @param  Size  `int` -- estimated memory of engine in bytes
+class ModelEntry(NamedTuple):
+  Key: Tuple[str, int, int]
+  Engine: ComplExEngine
+  Size: int
+
+
+##
+# Thread-safe LRU cache of inference engines, bounded by a memory budget. Owned
+# by Paperwrite.Application.ApplicationContext.
+class ModelCache():
+
+  ##
+  # @var Config
+  # configuration of cache
+  Config: ModelsConfiguration
+
+  ##
+  # @var entries
+  # internal map of cached engines per KNG folder in order of last use
+  entries: "OrderedDict[str, ModelEntry]"
+
+  ##
+  # @var size
+  # internal estimated memory of all cached engines in bytes
+  size: int
+
+  ##
+  # @var loadLocks
+  # internal map of locks per KNG folder, held while an engine is loaded
+  loadLocks: Dict[str, Lock]
+
+  ##
+  # @var lock
+  # internal lock guarding all members
+  lock: Lock
+
+  ##
+  # @var hits
+  # internal number of lookups served from cache
+  hits: int
+
+  ##
+  # @var misses
+  # internal number of lookups, that loaded an engine
+  misses: int
+
+  ##
+  # @var evictions
+  # internal number of engines evicted from cache
+  evictions: int
+
+  ##
+  # Constructor
+  #
+  # @param  config  configuration from `models`-block from configuration file
+  def __init__(self, config: ModelsConfiguration) -> None:
+    self.Config = config
+    self.entries = OrderedDict()
+    self.size = 0
+    self.loadLocks = {}
+    self.lock = Lock()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  ##
+  # Removes an engine from the cache. Has to be called with `lock` held.
+  #
+  # @param  folder  folder of KNG
+  def remove(self, folder: str) -> None:
+    entry = self.entries.pop(folder, None)
+    if entry is not None:
+      self.size -= entry.Size
+
+  ##
+  # Evicts least recently used engines, until all engines fit into the memory
+  # budget. The most recently used engine is always kept. Has to be called with
+  # `lock` held.
+  def evict(self) -> None:
+    while self.size > self.Config.MaxSize and len(self.entries) > 1:
+      folder, _ = next(iter(self.entries.items()))
+      self.remove(folder)
+      self.evictions += 1
+      Io.Debug(f"    => Model evicted: {os.path.basename(folder)}")
+
+  ##
+  # Returns the engine of a KNG, loads it if it is not cached or its files have
+  # changed. An engine is only loaded once, even if multiple threads request it
+  # at the same time.
+  #
+  # @param  folder  folder of KNG
+  #
+  # @return engine of KNG
+  #
+  # @throws FileNotFoundError if the KNG has no model
+  def Get(self, folder: str) -> ComplExEngine:
+    folder = os.path.abspath(folder)
+    path = EngineSource(folder)
+    stat = os.stat(path)
+    key = (path, stat.st_ino, stat.st_mtime_ns)
+
+    with self.lock:
+      entry = self.entries.get(folder)
+      if entry is not None and entry.Key == key:
+        self.entries.move_to_end(folder)
+        self.hits += 1
+        return entry.Engine
+      if self.loadLocks.get(folder) is None:
+        self.loadLocks[folder] = Lock()
+      loadLock = self.loadLocks[folder]
+
+    with loadLock:
+      # another thread may have loaded the engine in the meantime
+      with self.lock:
+        entry = self.entries.get(folder)
+        if entry is not None and entry.Key == key:
+          self.entries.move_to_end(folder)
+          self.hits += 1
+          return entry.Engine
+        self.misses += 1
+
+      Io.Debug(f"    => Loading model: {os.path.basename(folder)}")
+      engine = LoadEngine(folder)
+      entry = ModelEntry(key, engine, engine.Size())
+
+      with self.lock:
+        self.remove(folder)
+        if self.Config.MaxSize > 0:
+          self.entries[folder] = entry
+          self.size += entry.Size
+          self.evict()
+    return entry.Engine
+
+  ##
+  # Drops the cached engine of a KNG.
+  #
+  # @param  folder  folder of KNG
+  def Invalidate(self, folder: str) -> None:
+    with self.lock:
+      self.remove(os.path.abspath(folder))
+
+  ##
+  # Loads the engines of all KNGs of a store, most recently trained first, until
+  # the memory budget is used up. Should be called once on startup, before the
+  # webserver accepts requests.
+  #
+  # @param  root  folder of store containing the KNGs
+  #
+  # @return number of loaded engines
+  def Preload(self, root: str) -> int:
+    folders = [
+        os.path.join(root, kid)
+        for kid in os.listdir(root)
+        if os.path.isfile(os.path.join(root, kid, MODEL_FILE))
+    ]
+    folders.sort(key=lambda f: os.stat(os.path.join(f, MODEL_FILE)).st_mtime,
+                 reverse=True)
+
+    loaded = 0
+    for folder in folders:
+      if self.size >= self.Config.MaxSize:
+        break
+      self.Get(folder)
+      loaded += 1
+    return loaded
+
+  ##
+  # Returns counters and usage of the cache.
+  #
+  # @return statistics as dictionary
+  def Stats(self) -> Dict[str, Any]:
+    with self.lock:
+      lookups = self.hits + self.misses
+      return {
+          "hits": self.hits,
+          "misses": self.misses,
+          "evictions": self.evictions,
+          "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+          "models": [os.path.basename(f) for f in self.entries],
+          "size": self.size,
+          "max_size": self.Config.MaxSize,
+      }
@@ -0,0 +1,211 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Nlp
+# @namespace Paperwrite.Kng.Nlp
+#
+# Package containing the process wide registry of spaCy pipelines. Pipelines are
+# loaded once (preferably on startup) and handed out to the request threads of
+# waitress as exclusive handles. spaCy is only imported, when the first pipeline
+# is loaded.
+#
+# @example
+# ~~~{.py}
+# from Paperwrite.Application import AppContext
+# from Paperwrite.Kng.Nlp import PIPELINE_PARSER
+#
+# with AppContext.Nlp.Acquire(PIPELINE_PARSER) as handle:
+#   triple = handle.Extractor.ExtractOne("The cat sat on the mat.")
+# ~~~
+
+# -- STL
+from contextlib import contextmanager
+from queue import Queue
+from threading import Lock
+from typing import Any, Dict, Iterator, NamedTuple, Optional
+
+# -- PROJECT
+from Paperwrite.Configuration import NlpConfiguration
+from Paperwrite.PyAdditions import Io
+from Paperwrite.PyAdditions.Errors import NotSupportedError
+
+##
+# Name of the pipeline for dependency parsing and triple extraction. Uses the
+# configured spaCy model without the excluded components.
+PIPELINE_PARSER = "parser"
+
+##
+# Name of the pipeline for rule-based sentence segmentation. Consists of a blank
+# English tokenizer and a sentencizer.
+PIPELINE_SENTENCIZER = "sentencizer"
+
+##
+# All pipelines known by the registry.
+PIPELINES = [PIPELINE_PARSER, PIPELINE_SENTENCIZER]
+
+
+##
+# Handle for a loaded pipeline instance.
+#
+# @param  Nlp   `Language` -- spaCy pipeline
+# @param  Extractor   `TripleExtractor` -- extractor bound to pipeline (None for
+# pipelines without parser)
+class NlpHandle(NamedTuple):
+  Nlp: Any
+  Extractor: Any
+
+
+##
+# Pool of identical instances of a single pipeline. spaCy pipelines are not
+# guaranteed to be thread-safe, therefore every instance is used by one thread
+# at a time.
+class NlpPipeline():
+
+  ##
+  # @var Name
+  # name of pipeline
+  Name: str
+
+  ##
+  # @var instances
+  # internal queue of idle instances
+  instances: Queue
+
+  ##
+  # Constructor
+  #
+  # @param  name  name of pipeline
+  # @param  handles   loaded instances of pipeline
+  def __init__(self, name: str, handles: list) -> None:
+    self.Name = name
+    self.instances = Queue()
+    for h in handles:
+      self.instances.put(h)
+
+  ##
+  # Borrows an instance of the pipeline. Blocks until an instance is idle.
+  #
+  # @return context manager yielding NlpHandle
+  @contextmanager
+  def Acquire(self) -> Iterator[NlpHandle]:
+    handle = self.instances.get()
+    try:
+      yield handle
+    finally:
+      self.instances.put(handle)
+
+
+##
+# Registry of all spaCy pipelines used by the application. Owned by
+# Paperwrite.Application.ApplicationContext.
+class NlpRegistry():
+
+  ##
+  # @var Config
+  # configuration of registry
+  Config: NlpConfiguration
+
+  ##
+  # @var BatchSize
+  # number of sentences parsed together by extractors
+  BatchSize: int
+
+  ##
+  # @var pipelines
+  # internal map of loaded pipelines
+  pipelines: Dict[str, NlpPipeline]
+
+  ##
+  # @var sharded
+  # internal process pool extractor, created on first use
+  sharded: Optional[Any]
+
+  ##
+  # @var lock
+  # internal lock guarding loading of pipelines
+  lock: Lock
+
+  ##
+  # Constructor. Does not load any pipeline.
+  #
+  # @param  config  configuration from `nlp`-block from configuration file
+  # @param  batchSize   number of sentences parsed together by extractors
+  def __init__(self, config: NlpConfiguration, batchSize: int) -> None:
+    self.Config = config
+    self.BatchSize = batchSize
+    self.pipelines = {}
+    self.sharded = None
+    self.lock = Lock()
+
+  ##
+  # Loads a single instance of a pipeline.
+  #
+  # @param  name  name of pipeline
+  #
+  # @return handle on loaded instance
+  def load(self, name: str) -> NlpHandle:
+    import spacy
+    from Paperwrite.Kng.Extraction import TripleExtractor
+
+    if name == PIPELINE_PARSER:
+      nlp = spacy.load(self.Config.Model, exclude=self.Config.Exclude)
+      return NlpHandle(nlp, TripleExtractor(nlp, self.BatchSize))
+    if name == PIPELINE_SENTENCIZER:
+      nlp = spacy.blank("en")
+      nlp.add_pipe("sentencizer")
+      return NlpHandle(nlp, None)
+    raise NotSupportedError(f"unknown nlp pipeline: '{name}'")
+
+  ##
+  # Returns a pipeline, loads all of its instances on first call.
+  #
+  # @param  name  name of pipeline
+  #
+  # @return pipeline
+  def Get(self, name: str) -> NlpPipeline:
+    pipeline = self.pipelines.get(name)
+    if pipeline is not None:
+      return pipeline
+
+    with self.lock:
+      # check again, as another thread could have loaded it in the meantime
+      if self.pipelines.get(name) is None:
+        Io.Debug(f"Loading nlp pipeline '{name}' "
+                 f"({self.Config.Instances} instance(s))")
+        handles = [self.load(name) for _ in range(self.Config.Instances)]
+        self.pipelines[name] = NlpPipeline(name, handles)
+      return self.pipelines[name]
+
+  ##
+  # Borrows an instance of a pipeline for the current thread.
+  #
+  # @param  name  name of pipeline
+  #
+  # @return context manager yielding NlpHandle
+  def Acquire(self, name: str):
+    return self.Get(name).Acquire()
+
+  ##
+  # Returns the process pool extractor for sharded extraction. The worker
+  # processes are only started on first extraction.
+  #
+  # @param  workers   number of worker processes
+  #
+  # @return ShardedTripleExtractor
+  def GetShardedExtractor(self, workers: int):
+    from Paperwrite.Kng.Extraction import ShardedTripleExtractor
+
+    with self.lock:
+      if self.sharded is None:
+        self.sharded = ShardedTripleExtractor(self.Config.Model,
+                                              self.Config.Exclude, workers,
+                                              self.BatchSize)
+      return self.sharded
+
+  ##
+  # Loads all known pipelines. Should be called once on startup, before the
+  # webserver accepts requests.
+  def Preload(self) -> None:
+    for name in PIPELINES:
+      self.Get(name)
@@ -0,0 +1,135 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Similarity
+# @namespace Paperwrite.Kng.Similarity
+#
+# Package containing the nearest-neighbour index over the entity embeddings of a
+# trained ComplEx model. The index is built once a training finishes and stored
+# next to the model. It holds the embeddings normalized to unit length, so the
+# cosine similarity of an entity to all other entities is a single product of
+# the index with its vector. The product is computed in blocks of rows, so the
+# memory mapped index is never copied into memory as a whole.
+#
+# Every build of the index is written as a new generation (see
+# Paperwrite.Kng.Store.SaveGeneration), so readers always see entities and
+# vectors of the same build.
+#
+# @example
+# ~~~{.py}
+# from Paperwrite.Application import AppContext
+#
+# index = AppContext.Similarity.Get(folder)
+# neighbours = index.Query("knowledge graph", k=10)
+# ~~~
+
+# -- STL
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# -- LIBRARY
+import numpy as np
+
+# -- PROJECT
+from Paperwrite.Kng.Completion import Embeddings, TopK, UnknownNodeError
+from Paperwrite.Kng.Store import MappedCache, SaveGeneration, SIMILARITY_FILE, SIMILARITY_VECTORS_FILE
+
+##
+# Number of rows of the index multiplied at once.
+BLOCK_SIZE = 65536
+
+
+##
+# Nearest-neighbour index over entity embeddings.
+#
+# @param  Entities  `np.ndarray` -- names of entities in order of their vectors
+# @param  EntityIndex   `Dict[str, int]` -- index of vector per entity
+# @param  Vectors   `np.ndarray` -- entity embeddings normalized to unit length
+# as `N x 2k` array
+class SimilarityIndex(NamedTuple):
+  Entities: np.ndarray
+  EntityIndex: Dict[str, int]
+  Vectors: np.ndarray
+
+  ##
+  # Finds the entities most similar to an entity by cosine similarity of
+  # their embeddings. The entity itself is excluded.
+  #
+  # @param  entity  name of entity
+  # @param  k   number of entities to return
+  #
+  # @return top-k entities as `(name, similarity)`, most similar first
+  #
+  # @throws UnknownNodeError if `entity` is not part of the index
+  def Query(self, entity: str, k: int) -> List[Tuple[str, float]]:
+    idx = self.EntityIndex.get(entity)
+    if idx is None:
+      raise UnknownNodeError(f"'{entity}' is not part of the trained model")
+
+    query = np.asarray(self.Vectors[idx])
+    scores = np.empty(len(self.Vectors), dtype=np.float32)
+    for start in range(0, len(self.Vectors), BLOCK_SIZE):
+      scores[start:start + BLOCK_SIZE] = self.Vectors[start:start +
+                                                      BLOCK_SIZE] @ query
+    scores[idx] = -np.inf
+    return TopK(self.Entities, scores, min(k, len(scores) - 1))
+
+
+##
+# Builds the similarity index from the embeddings of a model.
+#
+# @param  embeddings  embeddings of model
+#
+# @return similarity index
+def BuildIndex(embeddings: Embeddings) -> SimilarityIndex:
+  vectors = np.asarray(embeddings.EntityEmb, dtype=np.float32)
+  norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+  vectors = vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+  return SimilarityIndex(embeddings.Entities, embeddings.EntityIndex, vectors)
+
+
+##
+# Writes the similarity index of a KNG.
+#
+# @param  folder  folder of KNG
+# @param  index   similarity index
+def SaveIndex(folder: str, index: SimilarityIndex) -> None:
+  SaveGeneration(folder, SIMILARITY_FILE,
+                 {"entities": [str(e) for e in index.Entities]},
+                 {"vectors": (SIMILARITY_VECTORS_FILE, index.Vectors)})
+
+
+##
+# Reads the similarity index of a KNG.
+#
+# @param  folder  folder of KNG
+# @param  mmapMode  mode for memory mapping the vectors (see `numpy.load`)
+#
+# @return similarity index
+#
+# @throws FileNotFoundError if the KNG has no similarity index
+def LoadIndex(folder: str, mmapMode: Optional[str] = None) -> SimilarityIndex:
+  with open(os.path.join(folder, SIMILARITY_FILE), "r") as f:
+    content = json.load(f)
+  entities = content["entities"]
+  vectors = np.load(os.path.join(folder, content["vectors"]),
+                    mmap_mode=mmapMode)
+  return SimilarityIndex(np.asarray(entities, dtype=object),
+                         {e: i for i, e in enumerate(entities)}, vectors)
+
+
+##
+# Process wide cache of memory mapped similarity indices, one per KNG. Owned by
+# Paperwrite.Application.ApplicationContext.
+#
+# @see
+#  - Paperwrite.Kng.Store.MappedCache
+class SimilarityCache(MappedCache):
+
+  ##
+  # Constructor
+  def __init__(self) -> None:
+    super().__init__("similarity index", (SIMILARITY_FILE,),
+                     lambda folder: LoadIndex(folder, mmapMode="r"))
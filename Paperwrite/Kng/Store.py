@@ -0,0 +1,734 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Store
+# @namespace Paperwrite.Kng.Store
+#
+# Package describing the layout of a KNG inside of the mutable store and
+# containing functions for reading and writing its files. Every KNG lives in its
+# own folder `<store>/<kid>/`:
+#
+#  - `metadata.json` -- knowledge base, size, creation date and models
+#  - `graph_vocab.json` -- entity and relation vocabulary, sorted, and the
+#  generation of the triples
+#  - `graph_triples.<generation>.npy` -- unique triples as `N x 3` array of
+#  `int32` indices into the vocabulary (subject, relation, object)
+#  - `graph_counts.<generation>.npy` -- number of occurrences of every triple
+#  - `graph_visualisation.html` -- pyvis visualisation of graph
+#  - `complex.pkl` -- trained ComplEx model (optional)
+#
+# KNGs written before generations were introduced store triples and counts as
+# `graph_triples.npy` and `graph_counts.npy`, until they are written again. KNGs
+# created before the vocabulary was introduced store their triples as
+# `raw_graph_data.npy` (`N x 3` array of strings). They are still readable and
+# can be converted with the `migrate-store` command (see MigrateStore).
+#
+# Files, that are replaced while other processes read them, are written as
+# generations (see SaveGeneration) and read through a MappedCache. Writers lock
+# a KNG across processes with a lock file in `<store>/.locks/` (see GetLock).
+
+# -- STL
+import fcntl
+import json
+import os
+import uuid
+from threading import Lock, RLock
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# -- LIBRARY
+import numpy as np
+
+# -- PROJECT
+from Paperwrite.Kng.Triples import Deduplicate, TripleSet
+from Paperwrite.PyAdditions import Io
+
+##
+# Filename of metadata of a KNG.
+METADATA_FILE = "metadata.json"
+
+##
+# Filename of vocabulary of a KNG.
+VOCAB_FILE = "graph_vocab.json"
+
+##
+# Filename of encoded triples of a KNG, formatted with the generation of the
+# triples.
+GRAPH_GENERATION_FILE = "graph_triples.{}.npy"
+
+##
+# Filename of occurrences of triples of a KNG, formatted with the generation of
+# the triples.
+COUNTS_GENERATION_FILE = "graph_counts.{}.npy"
+
+##
+# Filename of encoded triples of a KNG, used before generations were introduced.
+GRAPH_FILE = "graph_triples.npy"
+
+##
+# Filename of triples of a KNG as strings, used before the vocabulary was
+# introduced.
+LEGACY_GRAPH_FILE = "raw_graph_data.npy"
+
+##
+# Filename of occurrences of triples of a KNG, used before generations were
+# introduced.
+COUNTS_FILE = "graph_counts.npy"
+
+##
+# Filename of visualisation of a KNG.
+VISUALISATION_FILE = "graph_visualisation.html"
+
+##
+# Filename of trained ComplEx model of a KNG.
+MODEL_FILE = "complex.pkl"
+
+##
+# Filename of exported embeddings of the trained model of a KNG, holds the
+# entities, relations and the names of the files of their embeddings.
+EMBEDDINGS_FILE = "complex_embeddings.json"
+
+##
+# Filename of exported entity or relation embeddings of the trained model of a
+# KNG, formatted with the kind of embeddings and the generation of the export.
+EMBEDDINGS_ARRAY_FILE = "complex_{}.{}.npy"
+
+##
+# Filename of similarity index of a KNG, holds the entities and the name of the
+# file of their vectors.
+SIMILARITY_FILE = "similarity_index.json"
+
+##
+# Filename of normalized entity embeddings of the similarity index of a KNG,
+# formatted with the generation of the index.
+SIMILARITY_VECTORS_FILE = "similarity_vectors.{}.npy"
+
+##
+# Name of the folder inside of the store holding the lock files of all KNGs.
+LOCKS_FOLDER = ".locks"
+
+##
+# Index type of encoded triples.
+INDEX_DTYPE = np.int32
+
+##
+# Internal map of locks per KNG folder.
+_LOCKS: Dict[str, "FolderLock"] = {}
+
+##
+# Internal lock guarding `_LOCKS`.
+_LOCKS_LOCK = Lock()
+
+
+##
+# Dictionary-encoded triples of a KNG.
+#
+# @param  Entities  `np.ndarray` -- vocabulary of subjects and objects
+# @param  Relations   `np.ndarray` -- vocabulary of relations
+# @param  Triples   `np.ndarray` -- `N x 3` array of indices, subject and
+# object index into `Entities`, relation into `Relations`
+# @param  Counts  `np.ndarray` -- number of occurrences of every triple
+# @param  Generation  `str` -- id of the write, that created the triples (empty
+# for triples, that have not been written)
+class EncodedGraph(NamedTuple):
+  Entities: np.ndarray
+  Relations: np.ndarray
+  Triples: np.ndarray
+  Counts: np.ndarray
+  Generation: str
+
+
+##
+# Lock of a KNG folder, that is held by a single thread of all processes at a
+# time. Threads of a process wait for a reentrant lock, processes for an
+# exclusive `flock` of a lock file. Lock files are kept outside of the folder,
+# so deleting a KNG does not delete its lock.
+class FolderLock():
+
+  ##
+  # @var Path
+  # path to lock file
+  Path: str
+
+  ##
+  # @var lock
+  # internal lock of the threads of this process
+  lock: RLock
+
+  ##
+  # @var depth
+  # internal number of times the owning thread entered the lock
+  depth: int
+
+  ##
+  # @var fd
+  # internal descriptor of locked file, None if not locked
+  fd: Optional[int]
+
+  ##
+  # @var pid
+  # internal id of the process the lock belongs to
+  pid: int
+
+  ##
+  # Constructor. Does not create the lock file.
+  #
+  # @param  path  path to lock file
+  def __init__(self, path: str) -> None:
+    self.Path = path
+    self.lock = RLock()
+    self.depth = 0
+    self.fd = None
+    self.pid = os.getpid()
+
+  ##
+  # Acquires the lock, blocks until no other thread or process holds it.
+  #
+  # @return self
+  def __enter__(self) -> "FolderLock":
+    self.lock.acquire()
+    if self.depth == 0:
+      try:
+        os.makedirs(os.path.dirname(self.Path), exist_ok=True)
+        fd = os.open(self.Path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+          fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+          os.close(fd)
+          raise
+      except BaseException:
+        self.lock.release()
+        raise
+      self.fd = fd
+    self.depth += 1
+    return self
+
+  ##
+  # Releases the lock.
+  def __exit__(self, *exc: Any) -> None:
+    self.depth -= 1
+    if self.depth == 0:
+      fcntl.flock(self.fd, fcntl.LOCK_UN)
+      os.close(self.fd)
+      self.fd = None
+    self.lock.release()
+
+
+##
+# Returns the lock of a KNG. Writers of a KNG folder have to hold the lock, so
+# concurrent requests on the same KNG do not overwrite each others changes,
+# even if they are handled by different processes. The lock is reentrant, so a
+# writer can read the KNG while holding it.
+#
+# @param  folder  folder of KNG
+#
+# @return lock of KNG
+def GetLock(folder: str) -> FolderLock:
+  key = os.path.abspath(folder)
+  with _LOCKS_LOCK:
+    # forked processes do not share the locks of their parent
+    lock = _LOCKS.get(key)
+    if lock is None or lock.pid != os.getpid():
+      root, kid = os.path.split(key)
+      _LOCKS[key] = FolderLock(
+          os.path.join(root, LOCKS_FOLDER, f"{kid}.lock"))
+    return _LOCKS[key]
+
+
+##
+# Writes a file atomically. Data is written to a temporary file next to the
+# target, which then replaces the target.
+#
+# @param  path  path to file
+# @param  data  content of file
+# @param  mode  mode for opening the file (default: `"w"`)
+def WriteAtomic(path: str, data: Any, mode: str = "w") -> None:
+  tmpPath = f"{path}.{uuid.uuid4().hex}.tmp"
+  with open(tmpPath, mode) as f:
+    f.write(data)
+  os.replace(tmpPath, path)
+
+
+##
+# Reads the metadata of a KNG.
+#
+# @param  folder  folder of KNG
+#
+# @return metadata as dictionary
+def ReadMetadata(folder: str) -> Dict[str, Any]:
+  with open(os.path.join(folder, METADATA_FILE), "r") as f:
+    return json.load(f)
+
+
+##
+# Writes the metadata of a KNG.
+#
+# @param  folder  folder of KNG
+# @param  metadata  metadata as dictionary
+def WriteMetadata(folder: str, metadata: Dict[str, Any]) -> None:
+  WriteAtomic(os.path.join(folder, METADATA_FILE),
+              json.dumps(metadata, indent=2))
+
+
+##
+# Writes an array atomically as `.npy` file.
+#
+# @param  path  path to file
+# @param  array   array to write
+def SaveArray(path: str, array: np.ndarray) -> None:
+  tmpPath = f"{path}.{uuid.uuid4().hex}.tmp"
+  with open(tmpPath, "wb") as f:
+    np.save(f, array)
+  os.replace(tmpPath, path)
+
+
+##
+# Writes arrays as a new generation of files. The arrays are written to new
+# files named after the generation first, the commit file referencing them
+# replaces the previous one afterwards, so readers always see a commit file and
+# arrays of the same write. Arrays of the previous generation are removed,
+# readers, that still map them, keep their mapping. Writers have to hold the
+# lock of the KNG.
+#
+# @param  folder  folder of KNG
+# @param  commitFile  filename of commit file
+# @param  content   json-serializable content of commit file
+# @param  arrays  filename and array per key of commit file, filenames are
+# formatted with the generation
+#
+# @return generation of write
+def SaveGeneration(folder: str, commitFile: str, content: Dict[str, Any],
+                   arrays: Dict[str, Tuple[str, np.ndarray]]) -> str:
+  commitPath = os.path.join(folder, commitFile)
+  previous = {}
+  if os.path.isfile(commitPath):
+    with open(commitPath, "r") as f:
+      previous = json.load(f)
+
+  generation = uuid.uuid4().hex
+  content = dict(content, generation=generation)
+  for key, (filename, array) in arrays.items():
+    content[key] = filename.format(generation)
+    SaveArray(os.path.join(folder, content[key]), array)
+  WriteAtomic(commitPath, json.dumps(content))
+
+  for key in arrays:
+    if key in previous and previous[key] != content[key]:
+      try:
+        os.remove(os.path.join(folder, previous[key]))
+      except FileNotFoundError:
+        pass
+  return generation
+
+
+##
+# Cached value of a MappedCache.
+#
+# @param  Signature   `tuple` -- inodes, modification times and sizes of the
+# files the value was loaded from
+# @param  Value   `Any` -- loaded value
+class MappedEntry(NamedTuple):
+  Signature: Tuple
+  Value: Any
+
+
+##
+# Process wide cache of values loaded from the files of KNGs, one per KNG. The
+# loaded values (like memory mapped arrays) are shared by all request threads. A
+# value is loaded again, as soon as one of the files of its signature has been
+# replaced. For generations (see SaveGeneration) the commit file is sufficient.
+class MappedCache():
+
+  ##
+  # @var Name
+  # name of cached values for messages
+  Name: str
+
+  ##
+  # @var Files
+  # filenames the signature of a KNG is computed from, at least one of them
+  # has to exist
+  Files: Tuple[str, ...]
+
+  ##
+  # @var Load
+  # function loading the value of a KNG from its folder
+  Load: Callable[[str], Any]
+
+  ##
+  # @var entries
+  # internal map of cached values per KNG folder
+  entries: Dict[str, MappedEntry]
+
+  ##
+  # @var lock
+  # internal lock guarding `entries`
+  lock: Lock
+
+  ##
+  # Constructor
+  #
+  # @param  name  name of cached values for messages
+  # @param  files   filenames the signature of a KNG is computed from
+  # @param  load  function loading the value of a KNG from its folder
+  def __init__(self, name: str, files: Tuple[str, ...],
+               load: Callable[[str], Any]) -> None:
+    self.Name = name
+    self.Files = files
+    self.Load = load
+    self.entries = {}
+    self.lock = Lock()
+
+  ##
+  # Computes the signature of the files of a KNG. Files are replaced on every
+  # write, therefore a new write always changes the signature.
+  #
+  # @param  folder  folder of KNG
+  #
+  # @return signature of files
+  #
+  # @throws FileNotFoundError if none of the files exists
+  def signature(self, folder: str) -> Tuple:
+    signature = []
+    for name in self.Files:
+      try:
+        stat = os.stat(os.path.join(folder, name))
+        signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+      except FileNotFoundError:
+        signature.append(None)
+    if all(s is None for s in signature):
+      raise FileNotFoundError(f"no {self.Name} found in '{folder}'")
+    return tuple(signature)
+
+  ##
+  # Returns the value of a KNG. The value is loaded on first access and after
+  # its files have changed, otherwise the shared value is returned.
+  #
+  # @param  folder  folder of KNG
+  #
+  # @return cached value
+  #
+  # @throws FileNotFoundError if the files of the KNG do not exist
+  def Get(self, folder: str) -> Any:
+    key = os.path.abspath(folder)
+    while True:
+      signature = self.signature(folder)
+      entry = self.entries.get(key)
+      if entry is not None and entry.Signature == signature:
+        return entry.Value
+
+      Io.Debug(f"    => Mapping {self.Name} '{os.path.basename(key)}'")
+      try:
+        value = self.Load(folder)
+      except FileNotFoundError:
+        # files were removed by a new write in between, load the new write
+        if self.signature(folder) != signature:
+          continue
+        raise
+      with self.lock:
+        self.entries[key] = MappedEntry(signature, value)
+      return value
+
+  ##
+  # Drops the cached value of a KNG.
+  #
+  # @param  folder  folder of KNG
+  def Invalidate(self, folder: str) -> None:
+    with self.lock:
+      self.entries.pop(os.path.abspath(folder), None)
+
+
+##
+# Encodes a set of triples with a vocabulary of entities and relations.
+#
+# @param  triples   set of triples
+#
+# @return encoded triples
+def EncodeTriples(triples: TripleSet) -> EncodedGraph:
+  values = triples.Triples.reshape(-1, 3)
+  entities, entityIndex = np.unique(np.concatenate([values[:, 0],
+                                                    values[:, 2]]),
+                                    return_inverse=True)
+  relations, relationIndex = np.unique(values[:, 1], return_inverse=True)
+  entityIndex = entityIndex.reshape(-1)
+
+  encoded = np.empty((len(values), 3), dtype=INDEX_DTYPE)
+  encoded[:, 0] = entityIndex[:len(values)]
+  encoded[:, 1] = relationIndex.reshape(-1)
+  encoded[:, 2] = entityIndex[len(values):]
+  return EncodedGraph(entities, relations, encoded, triples.Counts, "")
+
+
+##
+# Decodes triples into an array of strings.
+#
+# @param  graph   encoded triples
+#
+# @return set of triples
+def DecodeTriples(graph: EncodedGraph) -> TripleSet:
+  subjects = graph.Entities[graph.Triples[:, 0]]
+  relations = graph.Relations[graph.Triples[:, 1]]
+  objects = graph.Entities[graph.Triples[:, 2]]
+  return TripleSet(np.stack([subjects, relations, objects], axis=1),
+                   graph.Counts)
+
+
+##
+# Looks up the indices of values in a sorted vocabulary.
+#
+# @param  vocabulary  sorted vocabulary
+# @param  values  values to look up
+#
+# @return indices of values, -1 for values not found in vocabulary
+def LookupIndices(vocabulary: np.ndarray, values: List[str]) -> np.ndarray:
+  values = np.asarray(values, dtype=str)
+  if len(vocabulary) == 0:
+    return np.full(values.shape, -1, dtype=np.int64)
+  indices = np.searchsorted(vocabulary, values)
+  indices = np.minimum(indices, len(vocabulary) - 1)
+  return np.where(vocabulary[indices] == values, indices, -1)
+
+
+##
+# Reads the counts of a KNG. Graphs created before occurrences were counted,
+# count every triple once.
+#
+# @param  folder  folder of KNG
+# @param  size  number of triples of KNG
+# @param  mmapMode  mode for memory mapping the file (see `numpy.load`)
+#
+# @return number of occurrences of every triple
+def loadCounts(folder: str,
+               size: int,
+               mmapMode: Optional[str] = None) -> np.ndarray:
+  path = os.path.join(folder, COUNTS_FILE)
+  if os.path.isfile(path):
+    return np.load(path, mmap_mode=mmapMode)
+  return np.ones(size, dtype=np.int64)
+
+
+##
+# Reads the triples of a KNG as strings from the format used before the
+# vocabulary was introduced. Duplicate triples are merged on load.
+#
+# @param  folder  folder of KNG
+#
+# @return set of triples
+def loadLegacyTriples(folder: str) -> TripleSet:
+  triples = np.load(os.path.join(folder, LEGACY_GRAPH_FILE)).reshape(-1, 3)
+  countsPath = os.path.join(folder, COUNTS_FILE)
+  if not os.path.isfile(countsPath):
+    return Deduplicate(triples, np.ones(len(triples), dtype=np.int64))
+  return TripleSet(triples, np.load(countsPath))
+
+
+##
+# Reads the vocabulary of a KNG.
+#
+# @param  folder  folder of KNG
+#
+# @return vocabulary as dictionary with keys `entities` and `relations`, None
+# if the KNG is stored in the legacy format
+def ReadVocabulary(folder: str) -> Optional[Dict[str, Any]]:
+  try:
+    with open(os.path.join(folder, VOCAB_FILE), "r") as f:
+      return json.load(f)
+  except FileNotFoundError:
+    return None
+
+
+##
+# Reads the encoded triples of a KNG. KNGs in the legacy format are encoded on
+# load.
+#
+# @param  folder  folder of KNG
+# @param  mmapMode  mode for memory mapping triples and counts (see
+# `numpy.load`), None reads them into memory
+#
+# @return encoded triples
+#
+# @throws FileNotFoundError if the KNG has no triples or they were replaced by
+# a new write in between
+def LoadGraph(folder: str, mmapMode: Optional[str] = None) -> EncodedGraph:
+  vocab = ReadVocabulary(folder)
+  if vocab is None:
+    return EncodeTriples(loadLegacyTriples(folder))
+
+  triples = np.load(os.path.join(folder, vocab.get("triples", GRAPH_FILE)),
+                    mmap_mode=mmapMode).reshape(-1, 3)
+  if "counts" in vocab:
+    counts = np.load(os.path.join(folder, vocab["counts"]), mmap_mode=mmapMode)
+  else:
+    counts = loadCounts(folder, len(triples), mmapMode)
+  return EncodedGraph(np.asarray(vocab["entities"], dtype=str),
+                      np.asarray(vocab["relations"], dtype=str), triples,
+                      counts, vocab.get("generation", ""))
+
+
+##
+# Reads the triples of a KNG as strings.
+#
+# @param  folder  folder of KNG
+#
+# @return set of triples
+def LoadTriples(folder: str) -> TripleSet:
+  return DecodeTriples(LoadGraph(folder))
+
+
+##
+# Writes an encoded graph as a new generation, the vocabulary is the commit file
+# of the generation. Processes reading the KNG therefore never map triples of
+# one write against the vocabulary of another. Removes the triples of previous
+# formats, if there are any.
+#
+# @param  folder  folder of KNG
+# @param  graph   encoded triples
+def saveGraph(folder: str, graph: EncodedGraph) -> None:
+  SaveGeneration(
+      folder, VOCAB_FILE, {
+          "entities": graph.Entities.tolist(),
+          "relations": graph.Relations.tolist()
+      }, {
+          "triples": (GRAPH_GENERATION_FILE, graph.Triples),
+          "counts": (COUNTS_GENERATION_FILE, graph.Counts)
+      })
+
+  for name in (GRAPH_FILE, COUNTS_FILE, LEGACY_GRAPH_FILE):
+    try:
+      os.remove(os.path.join(folder, name))
+    except FileNotFoundError:
+      pass
+
+
+##
+# Writes the triples of a KNG in encoded form.
+#
+# @param  folder  folder of KNG
+# @param  triples   set of triples
+def SaveTriples(folder: str, triples: TripleSet) -> None:
+  saveGraph(folder, EncodeTriples(triples))
+
+
+##
+# Extends a sorted vocabulary with values, that are not part of it yet.
+#
+# @param  vocabulary  sorted vocabulary
+# @param  values  values to add
+#
+# @return extended vocabulary and the indices of the values of `vocabulary`
+# inside of it
+def extendVocabulary(vocabulary: np.ndarray,
+                     values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+  values = np.unique(np.asarray(values, dtype=str))
+  values = values[LookupIndices(vocabulary, values) < 0]
+  positions = np.searchsorted(vocabulary, values)
+  extended = np.insert(vocabulary.astype(np.result_type(vocabulary, values)),
+                       positions, values)
+  # every value inserted before an existing value shifts its index by one
+  shifts = np.cumsum(np.bincount(positions, minlength=len(vocabulary) + 1))
+  indices = np.arange(len(vocabulary)) + shifts[:len(vocabulary)]
+  return extended, indices.astype(INDEX_DTYPE)
+
+
+##
+# Converts the rows of encoded triples into single values, that compare like
+# the rows. Rows are packed into integers, unless these could overflow.
+#
+# @param  triples   `N x 3` array of indices
+# @param  entities  size of vocabulary of entities
+# @param  relations   size of vocabulary of relations
+#
+# @return `N` array of rows
+def tripleKeys(triples: np.ndarray, entities: int,
+               relations: int) -> np.ndarray:
+  if entities * entities * relations <= np.iinfo(np.int64).max:
+    rows = triples.astype(np.int64)
+    return (rows[:, 0] * relations + rows[:, 1]) * entities + rows[:, 2]
+  dtype = [("subject", INDEX_DTYPE), ("relation", INDEX_DTYPE),
+           ("object", INDEX_DTYPE)]
+  rows = np.ascontiguousarray(triples, dtype=INDEX_DTYPE)
+  return rows.view(dtype).reshape(-1)
+
+
+##
+# Appends triples to the triples of a KNG. Triples already in the KNG only add
+# their counts, new triples are appended in order. Existing triples stay
+# encoded: their indices are remapped onto the extended vocabulary and matched
+# against the sorted new triples, so they are neither decoded nor sorted again.
+# Has to be called with the lock of the KNG held.
+#
+# @param  folder  folder of KNG
+# @param  triples   deduplicated set of new triples
+#
+# @return merged graph and the triples, that were not in the KNG before
+def AppendTriples(folder: str,
+                  triples: TripleSet) -> Tuple[EncodedGraph, TripleSet]:
+  graph = LoadGraph(folder, mmapMode="r")
+  values = triples.Triples.reshape(-1, 3)
+  entities, entityMap = extendVocabulary(graph.Entities,
+                                         values[:, [0, 2]].reshape(-1))
+  relations, relationMap = extendVocabulary(graph.Relations, values[:, 1])
+
+  existing = np.empty((len(graph.Triples), 3), dtype=INDEX_DTYPE)
+  existing[:, 0] = entityMap[graph.Triples[:, 0]]
+  existing[:, 1] = relationMap[graph.Triples[:, 1]]
+  existing[:, 2] = entityMap[graph.Triples[:, 2]]
+
+  added = np.empty((len(values), 3), dtype=INDEX_DTYPE)
+  added[:, 0] = np.searchsorted(entities, values[:, 0])
+  added[:, 1] = np.searchsorted(relations, values[:, 1])
+  added[:, 2] = np.searchsorted(entities, values[:, 2])
+
+  counts = np.array(graph.Counts, dtype=np.int64)
+  isNew = np.ones(len(values), dtype=bool)
+  if len(values) > 0 and len(existing) > 0:
+    addedKeys = tripleKeys(added, len(entities), len(relations))
+    order = np.argsort(addedKeys)
+    sortedKeys = addedKeys[order]
+    existingKeys = tripleKeys(existing, len(entities), len(relations))
+    positions = np.minimum(np.searchsorted(sortedKeys, existingKeys),
+                           len(sortedKeys) - 1)
+    found = sortedKeys[positions] == existingKeys
+    matches = order[positions[found]]
+    counts[found] += triples.Counts[matches]
+    isNew[matches] = False
+
+  merged = EncodedGraph(entities, relations,
+                        np.concatenate([existing, added[isNew]]),
+                        np.concatenate([counts, triples.Counts[isNew]]), "")
+  saveGraph(folder, merged)
+  return merged, TripleSet(values[isNew], triples.Counts[isNew])
+
+
+##
+# Converts all KNGs of a store from the legacy format into the encoded format.
+#
+# @param  root  folder of store
+#
+# @return number of migrated KNGs
+def MigrateStore(root: str) -> int:
+  migrated = 0
+  for kid in sorted(os.listdir(root)):
+    folder = os.path.join(root, kid)
+    legacyPath = os.path.join(folder, LEGACY_GRAPH_FILE)
+    if kid.startswith(".") or not os.path.isfile(legacyPath):
+      continue
+
+    with GetLock(folder):
+      sizeBefore = os.path.getsize(legacyPath)
+      triples = loadLegacyTriples(folder)
+      SaveTriples(folder, triples)
+
+      # duplicates of legacy triples are merged, so the size changes
+      if os.path.isfile(os.path.join(folder, METADATA_FILE)):
+        metadata = ReadMetadata(folder)
+        metadata["size"] = len(triples.Triples)
+        metadata["occurrences"] = int(triples.Counts.sum())
+        WriteMetadata(folder, metadata)
+      vocab = ReadVocabulary(folder)
+      sizeAfter = sum(
+          os.path.getsize(os.path.join(folder, f))
+          for f in (VOCAB_FILE, vocab["triples"], vocab["counts"]))
+    Io.Info(f"    => Migrated '{kid}': {sizeBefore} -> {sizeAfter} bytes")
+    migrated += 1
+  return migrated
@@ -0,0 +1,249 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Text
+# @namespace Paperwrite.Kng.Text
+#
+# Package containing the streaming cleanup and sentence segmentation of text
+# extracted by Tika. The text is processed in bounded chunks, so no full copy of
+# a document is created for any step of the cleanup. Every step holds back the
+# few characters at the end of a chunk, whose result depends on the next chunk,
+# which keeps the output exactly the same as running the steps over the whole
+# text one after another. Segmentation works on bounded windows of the cleaned
+# text, so neither spaCy's `max_length` nor the size of a document limit it.
+
+# -- STL
+import re
+from typing import Any, Iterable, Iterator, List
+
+##
+# Pattern for references in the form of `[Author et. al., 2020]`.
+CLEAN_SOURCE_PATTERN = re.compile(r"\[[a-zA-Z\.\s]+,[\s\d]+\]")
+
+##
+# Pattern for all citations in square brackets.
+SOURCE_PATTERN = re.compile(r"\[[\w,\.\s?]+\]")
+
+##
+# Pattern for lines surrounded by empty lines (headers, footers, page numbers).
+SINGLE_LINE_PATTERN = re.compile(r"\n{2}.+\n{2}")
+
+##
+# Pattern for the end of a chunk, that could be the start of a single line.
+SINGLE_LINE_TAIL_PATTERN = re.compile(r"\n(?:\n(?:.+\n?)?)?\Z")
+
+##
+# Pattern for the end of a chunk, that could be the start of a citation.
+SOURCE_TAIL_PATTERN = re.compile(r"\[[\w,\.\s?]*\Z")
+
+##
+# Default number of characters processed at once.
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+##
+# Default number of characters segmented into sentences at once.
+DEFAULT_WINDOW_SIZE = 1 << 17
+
+
+##
+# Splits a text into chunks.
+#
+# @param  text  text to split
+# @param  size  maximum number of characters per chunk
+#
+# @return iterator over chunks
+def IterChunks(text: str, size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+  for start in range(0, len(text), size):
+    yield text[start:start + size]
+
+
+##
+# Streaming cleanup of text extracted by Tika. Removes single lines, joins
+# hyphenated words and lines, and removes citations in a single pass over the
+# chunks of a text. References found in the text are collected in
+# `References`.
+#
+# @par Example
+# ~~~{.py}
+# normalizer = TextNormalizer()
+# text = "".join(normalizer.Normalize(IterChunks(raw)))
+# refs = normalizer.References
+# ~~~
+class TextNormalizer():
+
+  ##
+  # @var References
+  # references found in text processed so far
+  References: List[str]
+
+  ##
+  # Constructor
+  def __init__(self) -> None:
+    self.References = []
+
+  ##
+  # Removes single lines from a chunk.
+  #
+  # @param  buffer  held back text and new chunk
+  # @param  final   True if no more text follows
+  #
+  # @return cleaned text and text, that has to be held back
+  def stripSingleLines(self, buffer: str, final: bool):
+    cut = len(buffer)
+    if not final:
+      tail = SINGLE_LINE_TAIL_PATTERN.search(buffer,
+                                             max(0, buffer.rfind("\n\n")))
+      if tail is not None:
+        cut = tail.start()
+
+    # matches starting before `cut` do not depend on the next chunk
+    parts = []
+    pos = 0
+    for match in SINGLE_LINE_PATTERN.finditer(buffer):
+      if match.start() >= cut:
+        break
+      parts.append(buffer[pos:match.start()])
+      pos = match.end()
+    end = max(pos, cut)
+    parts.append(buffer[pos:end])
+    return "".join(parts), buffer[end:]
+
+  ##
+  # Joins hyphenated words and lines of a chunk.
+  #
+  # @param  buffer  held back text and new chunk
+  # @param  final   True if no more text follows
+  #
+  # @return cleaned text and text, that has to be held back
+  def foldLines(self, buffer: str, final: bool):
+    cut = len(buffer)
+    if not final and buffer.endswith("-"):
+      cut -= 1
+    text = buffer[:cut].replace("-\n", "").replace("\n", " ")
+    return text, buffer[cut:]
+
+  ##
+  # Collects references and removes citations of a chunk.
+  #
+  # @param  buffer  held back text and new chunk
+  # @param  final   True if no more text follows
+  #
+  # @return cleaned text and text, that has to be held back
+  def stripCitations(self, buffer: str, final: bool):
+    cut = len(buffer)
+    if not final:
+      # only the last bracket can be open, every other is closed by a
+      # character not allowed inside of a citation
+      tail = SOURCE_TAIL_PATTERN.match(buffer, max(0, buffer.rfind("[")))
+      if tail is not None:
+        cut = tail.start()
+    text = buffer[:cut]
+    self.References.extend(CLEAN_SOURCE_PATTERN.findall(text))
+    return SOURCE_PATTERN.sub("", text), buffer[cut:]
+
+  ##
+  # Cleans up a text given as chunks.
+  #
+  # @param  chunks  iterable of text chunks
+  #
+  # @return iterator over cleaned text
+  def Normalize(self, chunks: Iterable[str]) -> Iterator[str]:
+    steps = [self.stripSingleLines, self.foldLines, self.stripCitations]
+    held = ["" for _ in steps]
+
+    for chunk in chunks:
+      for i, step in enumerate(steps):
+        chunk, held[i] = step(held[i] + chunk, False)
+      if chunk:
+        yield chunk
+
+    # flush held back text through all following steps
+    chunk = ""
+    for i, step in enumerate(steps):
+      chunk, held[i] = step(held[i] + chunk, True)
+    if chunk:
+      yield chunk
+
+
+##
+# Streaming sentence segmentation over bounded windows of a text. The last
+# sentence of a window may be cut off by the end of the window, therefore it is
+# carried over and segmented again together with the next window. Only one
+# window is parsed by spaCy at a time.
+#
+# @par Example
+# ~~~{.py}
+# with AppContext.Nlp.Acquire(PIPELINE_SENTENCIZER) as handle:
+#   segmenter = SentenceSegmenter(handle.Nlp)
+#   for sentence in segmenter.Segment(chunks):
+#     ...
+# ~~~
+class SentenceSegmenter():
+
+  ##
+  # @var Nlp
+  # spaCy pipeline with sentence boundaries
+  Nlp: Any
+
+  ##
+  # @var WindowSize
+  # number of characters segmented at once
+  WindowSize: int
+
+  ##
+  # Constructor
+  #
+  # @param  nlp   spaCy pipeline with sentence boundaries
+  # @param  windowSize  number of characters segmented at once, is capped to
+  # half of the `max_length` of the pipeline, so window and carried over
+  # sentence always fit
+  def __init__(self, nlp: Any, windowSize: int = DEFAULT_WINDOW_SIZE) -> None:
+    self.Nlp = nlp
+    self.WindowSize = max(1, min(windowSize, nlp.max_length // 2))
+
+  ##
+  # Cuts chunks of text into windows of `WindowSize` characters.
+  #
+  # @param  chunks  iterable of text chunks
+  #
+  # @return iterator over windows
+  def windows(self, chunks: Iterable[str]) -> Iterator[str]:
+    buffer = ""
+    for chunk in chunks:
+      buffer += chunk
+      while len(buffer) >= self.WindowSize:
+        yield buffer[:self.WindowSize]
+        buffer = buffer[self.WindowSize:]
+    if buffer:
+      yield buffer
+
+  ##
+  # Segments a text given as chunks into sentences.
+  #
+  # @param  chunks  iterable of text chunks
+  #
+  # @return iterator over stripped, non-empty sentences
+  def Segment(self, chunks: Iterable[str]) -> Iterator[str]:
+    carry = ""
+    for window in self.windows(chunks):
+      text = carry + window
+      sents = list(self.Nlp(text).sents)
+      for sent in sents[:-1]:
+        sentence = sent.text.strip()
+        if sentence:
+          yield sentence
+
+      carry = text[sents[-1].start_char:] if sents else text
+      # a sentence longer than a window is cut, so windows stay bounded
+      if len(carry) >= self.WindowSize:
+        sentence = carry.strip()
+        if sentence:
+          yield sentence
+        carry = ""
+
+    if carry:
+      for sent in self.Nlp(carry).sents:
+        sentence = sent.text.strip()
+        if sentence:
+          yield sentence
@@ -0,0 +1,284 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Tika
+# @namespace Paperwrite.Kng.Tika
+#
+# Package containing a managed pool of local Apache Tika server processes. The
+# servers are started on boot, health-checked and used round-robin, so that
+# documents of one or multiple uploads are parsed in parallel. If the pool size
+# is configured as 0, the tika client library manages its own server.
+
+# -- STL
+import os
+import subprocess
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import List, Optional
+
+# -- PROJECT
+from Paperwrite.Configuration import TikaConfiguration
+from Paperwrite.PyAdditions import Io
+from Paperwrite.PyAdditions.Errors import Error
+
+
+##
+# Error for a Tika server, that could not be started or is not reachable.
+class TikaServerError(Error):
+  pass
+
+
+##
+# Error for a document, that a healthy Tika server could not parse.
+class TikaParseError(Error):
+  pass
+
+
+##
+# A single local Tika server process.
+class TikaServer():
+
+  ##
+  # @var Host
+  # host the server is listening on
+  Host: str
+
+  ##
+  # @var Port
+  # port the server is listening on
+  Port: int
+
+  ##
+  # @var process
+  # internal handle on server process, None if not started
+  process: Optional[subprocess.Popen]
+
+  ##
+  # @var lock
+  # internal lock guarding (re)starts of server
+  lock: Lock
+
+  ##
+  # Constructor
+  #
+  # @param  host  host the server should listen on
+  # @param  port  port the server should listen on
+  def __init__(self, host: str, port: int) -> None:
+    self.Host = host
+    self.Port = port
+    self.process = None
+    self.lock = Lock()
+
+  ##
+  # Endpoint of server as url, as used by the tika client library.
+  #
+  # @return url of server
+  def Endpoint(self) -> str:
+    return f"http://{self.Host}:{self.Port}"
+
+  ##
+  # Checks if the server process is alive and answers on its status route.
+  #
+  # @return True if server is healthy
+  def IsHealthy(self) -> bool:
+    if self.process is None or self.process.poll() is not None:
+      return False
+    try:
+      with urllib.request.urlopen(f"{self.Endpoint()}/tika", timeout=2) as r:
+        return r.status == 200
+    except Exception:
+      return False
+
+  ##
+  # Starts the server process, if it is not running, and blocks until it is
+  # healthy.
+  #
+  # @param  java  path to java executable
+  # @param  jarPath   path to tika-server jar
+  # @param  timeout   seconds to wait for server to become healthy
+  #
+  # @throws TikaServerError if server is not healthy after `timeout`
+  def EnsureRunning(self, java: str, jarPath: str, timeout: float) -> None:
+    with self.lock:
+      if self.IsHealthy():
+        return
+
+      self.Stop()
+      Io.Debug(f"Starting tika server at {self.Endpoint()}")
+      self.process = subprocess.Popen(
+          [java, "-jar", jarPath, "--host", self.Host, "--port",
+           str(self.Port)],
+          stdout=subprocess.DEVNULL,
+          stderr=subprocess.DEVNULL)
+
+      deadline = time.monotonic() + timeout
+      while time.monotonic() < deadline:
+        if self.process.poll() is not None:
+          break
+        if self.IsHealthy():
+          return
+        time.sleep(0.5)
+
+      self.Stop()
+      raise TikaServerError(
+          f"tika server at {self.Endpoint()} did not become healthy")
+
+  ##
+  # Stops the server process.
+  def Stop(self) -> None:
+    if self.process is not None:
+      self.process.terminate()
+      try:
+        self.process.wait(timeout=10)
+      except subprocess.TimeoutExpired:
+        self.process.kill()
+      self.process = None
+
+
+##
+# Pool of local Tika servers. Owned by
+# Paperwrite.Application.ApplicationContext and started in
+# Paperwrite.__main__.Main.
+class TikaPool():
+
+  ##
+  # @var Config
+  # configuration of pool
+  Config: TikaConfiguration
+
+  ##
+  # @var servers
+  # internal list of managed servers
+  servers: List[TikaServer]
+
+  ##
+  # @var next
+  # internal index of next server for round-robin
+  next: int
+
+  ##
+  # @var lock
+  # internal lock guarding round-robin index
+  lock: Lock
+
+  ##
+  # @var executor
+  # internal thread pool dispatching parse requests to servers, shared by all
+  # uploads
+  executor: ThreadPoolExecutor
+
+  ##
+  # Constructor. Does not start any server.
+  #
+  # @param  config  configuration from `tika`-block from configuration file
+  def __init__(self, config: TikaConfiguration) -> None:
+    self.Config = config
+    self.servers = [
+        TikaServer(config.Host, config.BasePort + i)
+        for i in range(config.PoolSize)
+    ]
+    self.next = 0
+    self.lock = Lock()
+    self.executor = ThreadPoolExecutor(max_workers=max(1, config.PoolSize))
+
+  ##
+  # Returns the path to the tika-server jar. If none is configured, the jar of
+  # the tika client library is used and downloaded, if necessary.
+  #
+  # @return path to jar
+  def getJarPath(self) -> str:
+    if self.Config.JarPath != "":
+      return self.Config.JarPath
+
+    from tika import tika as tikaLib
+    jarPath = os.path.join(tikaLib.TikaJarPath, "tika-server.jar")
+    if not os.path.isfile(jarPath):
+      Io.Info(f"Downloading tika server to '{jarPath}'")
+      tikaLib.getRemoteJar(tikaLib.TikaServerJar, jarPath)
+    return jarPath
+
+  ##
+  # Starts all servers of the pool in parallel and waits until they are
+  # healthy. Afterwards the tika client library is set to client-only mode, so
+  # it does not spawn a server of its own.
+  def Start(self) -> None:
+    if len(self.servers) == 0:
+      return
+
+    from tika import tika as tikaLib
+    tikaLib.TikaClientOnly = True
+
+    jarPath = self.getJarPath()
+    Io.Info(f"Starting {len(self.servers)} tika server(s)")
+    futures = [
+        self.executor.submit(s.EnsureRunning, self.Config.Java, jarPath,
+                             self.Config.StartupTimeout) for s in self.servers
+    ]
+    for f in futures:
+      f.result()
+
+  ##
+  # Stops all servers of the pool.
+  def Stop(self) -> None:
+    for s in self.servers:
+      s.Stop()
+
+  ##
+  # Returns the next server in round-robin order.
+  #
+  # @return server
+  def nextServer(self) -> TikaServer:
+    with self.lock:
+      server = self.servers[self.next % len(self.servers)]
+      self.next += 1
+    return server
+
+  ##
+  # Parses a single document and returns its text content. If a server is not
+  # reachable or not healthy, it is restarted and the document is sent to the
+  # next server. Errors of a healthy server are caused by the document, so it is
+  # not sent to other servers.
+  #
+  # @param  path  path to document
+  #
+  # @return text content of document (empty string, if it has none)
+  #
+  # @throws TikaParseError if a healthy server could not parse the document
+  # @throws TikaServerError if no server could be reached
+  def Parse(self, path: str) -> str:
+    import requests
+    from tika import parser
+
+    if len(self.servers) == 0:
+      return parser.from_file(path).get("content") or ""
+
+    lastError = None
+    for _ in range(len(self.servers)):
+      server = self.nextServer()
+      try:
+        raw = parser.from_file(path, serverEndpoint=server.Endpoint())
+        return raw.get("content") or ""
+      except Exception as err:
+        if (not isinstance(err, requests.exceptions.ConnectionError) and
+            server.IsHealthy()):
+          raise TikaParseError(f"could not parse '{path}': {err}") from err
+        Io.Warning(f"tika server at {server.Endpoint()} failed: {err}")
+        lastError = err
+        try:
+          server.EnsureRunning(self.Config.Java, self.getJarPath(),
+                               self.Config.StartupTimeout)
+        except TikaServerError as restartErr:
+          Io.Error(str(restartErr))
+    raise TikaServerError(f"could not parse '{path}': {lastError}")
+
+  ##
+  # Parses documents in parallel across all servers of the pool.
+  #
+  # @param  paths   paths to documents
+  #
+  # @return text contents in order of `paths`
+  def ParseAll(self, paths: List[str]) -> List[str]:
+    return list(self.executor.map(self.Parse, paths))
@@ -0,0 +1,620 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Training
+# @namespace Paperwrite.Kng.Training
+#
+# Package containing the queue for training ComplEx models of KNGs. Every model
+# is trained in a dedicated worker process, so training neither blocks the
+# threads of the API nor competes with other trainings inside of the same
+# process. The queue is FIFO, holds every KNG at most once and is limited to a
+# configurable number of concurrent trainings. Status and timing of a training
+# are recorded in the metadata of its KNG:
+#
+# ~~~{.py}
+# "training": {
+#   "status": "queued" | "running" | "done" | "failed" | "cancelled",
+#   "profile": "<name of training profile>",
+#   "warm_start": <true if previous model is fine-tuned>,
+#   "queued": "<datetime>",
+#   "started": "<datetime>",
+#   "finished": "<datetime>",
+#   "duration": <seconds of training>,
+#   "error": "<error of failed training>"
+# }
+# ~~~
+#
+# Only the API process writes the metadata. Worker processes only write their
+# trained model to a staged file. Once a worker reports its training as done,
+# the dispatcher commits the model: it exports the embeddings of the model (see
+# Paperwrite.Kng.Engine), builds the similarity index of its entities (see
+# Paperwrite.Kng.Similarity) and replaces the previous model. Cancelled and
+# failed trainings therefore never change the model of a KNG.
+
+# -- STL
+import fnmatch
+import math
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from threading import Condition, Thread
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+# -- LIBRARY
+import numpy as np
+
+# -- PROJECT
+from Paperwrite.Configuration import TrainingConfiguration, TrainingProfile
+from Paperwrite.Kng.Engine import LoadEngine, ReadModelFile, SaveEmbeddings
+from Paperwrite.Kng.Similarity import BuildIndex, SaveIndex
+from Paperwrite.Kng.Store import GetLock, LoadTriples, ReadMetadata, WriteMetadata, METADATA_FILE, MODEL_FILE
+from Paperwrite.PyAdditions import Io
+from Paperwrite.PyAdditions.Errors import NotSupportedError
+from Paperwrite.Remote import RemoteClient
+
+##
+# Status of a training, that waits for a worker.
+STATUS_QUEUED = "queued"
+
+##
+# Status of a training, that is running in a worker process.
+STATUS_RUNNING = "running"
+
+##
+# Status of a finished training.
+STATUS_DONE = "done"
+
+##
+# Status of a training, whose worker process failed.
+STATUS_FAILED = "failed"
+
+##
+# Status of a training, that has been cancelled.
+STATUS_CANCELLED = "cancelled"
+
+##
+# Value of `ai_models` in metadata, while the first model of a KNG is trained.
+AI_MODELS_TRAINING = "training..."
+
+##
+# Value of `ai_models` in metadata, once a model has been trained.
+AI_MODELS_COMPLEX = "ComplEx"
+
+##
+# Filename of a trained model, that has not been committed yet, formatted with
+# the id of its training.
+STAGED_MODEL_FILE = MODEL_FILE + ".{}.tmp"
+
+##
+# Maximum number of triples held out for early stopping. Every check ranks all
+# validation triples against all entities, so larger splits slow down training
+# more than they improve the decision to stop.
+MAX_VALIDATION_SIZE = 1000
+
+
+##
+# Converts a training profile into hyperparameters of ComplEx.
+#
+# @param  profile   training profile
+#
+# @return keyword arguments of `ComplEx`
+def ComplexParams(profile: TrainingProfile) -> Dict[str, Any]:
+  return {
+      "k": profile.K,
+      "batches_count": profile.BatchesCount,
+      "epochs": profile.Epochs,
+      "seed": profile.Seed,
+      "optimizer": profile.Optimizer,
+      "optimizer_params": {
+          "lr": profile.LearningRate
+      },
+  }
+
+
+##
+# Holds out a validation split for early stopping. Every entity and relation of
+# the split also occurs in the remaining triples.
+#
+# @param  triples   triples of KNG
+# @param  profile   training profile
+#
+# @return triples for training and for validation, validation is None if early
+# stopping is disabled or the graph is too sparse for a split
+def SplitValidation(triples: np.ndarray,
+                    profile: TrainingProfile) -> Tuple[np.ndarray, Any]:
+  size = min(int(len(triples) * profile.ValidationSize), MAX_VALIDATION_SIZE)
+  if not profile.EarlyStopping or size < 1:
+    return triples, None
+
+  from ampligraph.evaluation import train_test_split_no_unseen
+  try:
+    return train_test_split_no_unseen(triples, test_size=size, seed=profile.Seed)
+  except Exception:
+    # too many entities occur only once, train on the whole graph
+    return triples, None
+
+
+##
+# Aligns embeddings of a previous model to a new mapping of names. Known names
+# keep their trained embedding, new names are initialized like ampligraph does
+# (Xavier uniform).
+#
+# @param  emb   embeddings of previous model
+# @param  index   index of embedding per name of previous model
+# @param  names   names of new model, in order of their embeddings
+# @param  rng   random number generator
+#
+# @return embeddings of new model
+def AlignEmbeddings(emb: np.ndarray, index: Dict[str, int], names: np.ndarray,
+                    rng: np.random.RandomState) -> np.ndarray:
+  limit = math.sqrt(6 / (len(names) + emb.shape[1]))
+  aligned = rng.uniform(-limit, limit,
+                        size=(len(names), emb.shape[1])).astype(emb.dtype)
+  previous = np.asarray([index.get(name, -1) for name in names],
+                        dtype=np.int64)
+  known = previous >= 0
+  aligned[known] = emb[previous[known]]
+  return aligned
+
+
+##
+# Creates the parameters, that warm start a training from the previous model of
+# a KNG. ampligraph orders entities and relations of a model by sorting the
+# unique values of its training triples, so the initial embeddings are aligned
+# to this order.
+#
+# @param  folder  folder of KNG
+# @param  triples   triples the new model is trained on
+# @param  profile   training profile
+#
+# @return keyword arguments of `ComplEx` replacing the ones of the profile,
+# None if there is no previous model of the same dimension
+def WarmStartParams(folder: str, triples: np.ndarray,
+                    profile: TrainingProfile) -> Optional[Dict[str, Any]]:
+  if not os.path.isfile(os.path.join(folder, MODEL_FILE)):
+    return None
+
+  previous = LoadEngine(folder).Embeddings
+  if previous.EntityEmb.shape[1] != 2 * profile.K:
+    return None
+
+  entities = np.unique(np.concatenate([triples[:, 0], triples[:, 2]]))
+  relations = np.unique(triples[:, 1])
+  rng = np.random.RandomState(profile.Seed)
+  Io.Info(f"Warm starting from previous model: "
+          f"{len(set(entities) - set(previous.EntityIndex))} new entities, "
+          f"{len(set(relations) - set(previous.RelationIndex))} new relations")
+  return {
+      "epochs": profile.WarmEpochs,
+      "initializer": "constant",
+      "initializer_params": {
+          "entity":
+              AlignEmbeddings(previous.EntityEmb, previous.EntityIndex,
+                              entities, rng),
+          "relation":
+              AlignEmbeddings(previous.RelationEmb, previous.RelationIndex,
+                              relations, rng),
+      },
+  }
+
+
+##
+# Fits a ComplEx model. Without warm start, a validation split is held out for
+# early stopping, if the profile enables it.
+#
+# @param  triples   triples to train on
+# @param  profile   training profile
+# @param  warmParams  parameters of WarmStartParams, None for a new model
+#
+# @return trained model
+def FitModel(triples: np.ndarray,
+             profile: TrainingProfile,
+             warmParams: Optional[Dict[str, Any]] = None) -> Any:
+  from ampligraph.latent_features import ComplEx
+
+  params = ComplexParams(profile)
+  if warmParams is not None:
+    params.update(warmParams)
+    train, valid = triples, None
+  else:
+    train, valid = SplitValidation(triples, profile)
+
+  model = ComplEx(**params)
+  if valid is None:
+    model.fit(train)
+  else:
+    model.fit(train,
+              early_stopping=True,
+              early_stopping_params={
+                  "x_valid": valid,
+                  "x_filter": triples,
+                  "criteria": profile.Criteria,
+                  "burn_in": profile.BurnIn,
+                  "check_interval": profile.CheckInterval,
+                  "stop_interval": profile.StopInterval,
+                  "corruption_entities": "all",
+              })
+  return model
+
+
+##
+# Trains a ComplEx model on the triples of a KNG. Entry point of the worker
+# processes. The trained model is only written to a staged file, that is
+# committed by the dispatcher (see CommitModel), so a cancelled or failed
+# training never changes the model of the KNG. A warm started training
+# fine-tunes the previous model on all triples, without early stopping, and
+# falls back to a full training if there is no compatible previous model.
+#
+# @param  folder  folder of KNG
+# @param  profile   training profile
+# @param  warmStart   fine-tune the previous model
+# @param  stagedPath  path the trained model is written to
+# @param  conn  connection the outcome is sent to, as `(status, error)`
+def TrainModel(folder: str, profile: TrainingProfile, warmStart: bool,
+               stagedPath: str, conn) -> None:
+  try:
+    from ampligraph.utils import save_model
+
+    triples = LoadTriples(folder).Triples
+    warmParams = WarmStartParams(folder, triples, profile) if warmStart else None
+    model = FitModel(triples, profile, warmParams)
+    save_model(model, model_name_path=stagedPath)
+    conn.send((STATUS_DONE, None))
+  except Exception as err:
+    conn.send((STATUS_FAILED, f"{type(err).__name__}: {err}"))
+  finally:
+    conn.close()
+
+
+##
+# Commits the staged model of a finished training. Exports the embeddings of
+# the model for the inference engine and builds the similarity index of its
+# entities, before the staged model replaces the previous model. Has to be
+# called with the lock of the KNG held.
+#
+# @param  folder  folder of KNG
+# @param  stagedPath  path to staged model
+def CommitModel(folder: str, stagedPath: str) -> None:
+  # the engine loads the export, so it has to be written before the model
+  embeddings = ReadModelFile(folder, os.path.basename(stagedPath))
+  SaveEmbeddings(folder, embeddings)
+  SaveIndex(folder, BuildIndex(embeddings))
+  os.replace(stagedPath, os.path.join(folder, MODEL_FILE))
+
+
+##
+# Removes a staged model, if it exists.
+#
+# @param  stagedPath  path to staged model
+def removeStaged(stagedPath: str) -> None:
+  try:
+    os.remove(stagedPath)
+  except FileNotFoundError:
+    pass
+
+
+##
+# Running training of a KNG.
+#
+# @param  Process   `Process` -- worker process
+# @param  Conn  `Connection` -- receiving end of the outcome of the worker
+# @param  Started   `float` -- monotonic time training was started
+# @param  Staged  `str` -- path the worker writes the trained model to
+class RunningTraining(NamedTuple):
+  Process: Any
+  Conn: Any
+  Started: float
+  Staged: str
+
+
+##
+# Queued training of a KNG.
+#
+# @param  Profile   `str` -- name of training profile
+# @param  WarmStart   `bool` -- fine-tune the previous model
+class TrainingRequest(NamedTuple):
+  Profile: str
+  WarmStart: bool
+
+
+##
+# FIFO queue of trainings, processed by a limited number of worker processes.
+# Owned by Paperwrite.Application.ApplicationContext and started in
+# Paperwrite.__main__.Main.
+class TrainingQueue():
+
+  ##
+  # @var Config
+  # configuration of queue
+  Config: TrainingConfiguration
+
+  ##
+  # @var Root
+  # folder of store containing the KNGs
+  Root: str
+
+  ##
+  # @var queued
+  # internal FIFO of queued KNGs with their training request
+  queued: "OrderedDict[str, TrainingRequest]"
+
+  ##
+  # @var running
+  # internal map of running trainings per KNG
+  running: Dict[str, RunningTraining]
+
+  ##
+  # @var condition
+  # internal condition guarding `queued` and `running`, notified on changes
+  condition: Condition
+
+  ##
+  # @var context
+  # internal multiprocessing context for worker processes
+  context: Any
+
+  ##
+  # Constructor. Does not start the dispatcher.
+  #
+  # @param  config  configuration from `training`-block from configuration
+  # file
+  # @param  root  folder of store containing the KNGs
+  def __init__(self, config: TrainingConfiguration, root: str) -> None:
+    self.Config = config
+    self.Root = root
+    self.queued = OrderedDict()
+    self.running = {}
+    self.condition = Condition()
+    # spawn, so workers do not inherit the threads and locks of the api
+    self.context = multiprocessing.get_context("spawn")
+
+  ##
+  # Updates the training status in the metadata of a KNG.
+  #
+  # @param  kid   id of KNG
+  # @param  status  new status of training
+  # @param  fields  additional fields of training status
+  def setStatus(self, kid: str, status: str, **fields: Any) -> None:
+    folder = os.path.join(self.Root, kid)
+    with GetLock(folder):
+      metadata = ReadMetadata(folder)
+      training = metadata.get("training", {})
+      if status == STATUS_QUEUED:
+        training = {}
+      training.update(status=status, **fields)
+      metadata["training"] = training
+
+      hasModel = os.path.isfile(os.path.join(folder, MODEL_FILE))
+      if status in (STATUS_QUEUED, STATUS_RUNNING) and not hasModel:
+        metadata["ai_models"] = AI_MODELS_TRAINING
+      elif hasModel:
+        metadata["ai_models"] = AI_MODELS_COMPLEX
+      else:
+        metadata.pop("ai_models", None)
+      WriteMetadata(folder, metadata)
+
+  ##
+  # Requeues trainings interrupted by a restart, removes their staged models
+  # and starts the dispatcher.
+  def Start(self) -> None:
+    for kid in sorted(os.listdir(self.Root)):
+      folder = os.path.join(self.Root, kid)
+      if not os.path.isfile(os.path.join(folder, METADATA_FILE)):
+        continue
+      for name in fnmatch.filter(os.listdir(folder),
+                                 STAGED_MODEL_FILE.format("*")):
+        removeStaged(os.path.join(folder, name))
+      training = ReadMetadata(folder).get("training", {})
+      if training.get("status") in (STATUS_QUEUED, STATUS_RUNNING):
+        Io.Info(f"Requeuing interrupted training of '{kid}'")
+        profile = training.get("profile")
+        self.Submit(kid, profile if profile in self.Config.Profiles else None,
+                    bool(training.get("warm_start", False)))
+
+    Thread(target=self.dispatch, name="ppw-training", daemon=True).start()
+
+  ##
+  # Queues the training of a KNG. A KNG, that is already queued or running, is
+  # not queued again, but a queued KNG changes to the new request.
+  #
+  # @param  kid   id of KNG
+  # @param  profile   name of training profile, None for the configured default
+  # @param  warmStart   fine-tune the previous model instead of training a new
+  # one
+  #
+  # @return status of training and position in queue (0 if running)
+  #
+  # @throws NotSupportedError if `profile` is not configured
+  def Submit(self,
+             kid: str,
+             profile: Optional[str] = None,
+             warmStart: bool = False) -> Dict[str, Any]:
+    profile = profile or self.Config.Profile
+    if profile not in self.Config.Profiles:
+      raise NotSupportedError(f"training profile '{profile}' is not configured")
+
+    request = TrainingRequest(profile, warmStart)
+    with self.condition:
+      if kid in self.running:
+        return {"status": STATUS_RUNNING, "position": 0}
+      if self.queued.get(kid) != request:
+        self.setStatus(kid,
+                       STATUS_QUEUED,
+                       profile=profile,
+                       warm_start=warmStart,
+                       queued=str(datetime.now()))
+        self.condition.notify_all()
+      self.queued[kid] = request
+      position = list(self.queued).index(kid) + 1
+    return {
+        "status": STATUS_QUEUED,
+        "position": position,
+        "profile": profile,
+        "warm_start": warmStart
+    }
+
+  ##
+  # Cancels the training of a KNG. Queued trainings are removed from the
+  # queue, running trainings are terminated.
+  #
+  # @param  kid   id of KNG
+  #
+  # @return True if a training was cancelled
+  def Cancel(self, kid: str) -> bool:
+    with self.condition:
+      if kid in self.queued:
+        del self.queued[kid]
+      elif kid in self.running:
+        training = self.running.pop(kid)
+        training.Process.terminate()
+        training.Process.join()
+        training.Conn.close()
+        removeStaged(training.Staged)
+      else:
+        return False
+      self.setStatus(kid, STATUS_CANCELLED, finished=str(datetime.now()))
+      self.condition.notify_all()
+    Io.Info(f"Cancelled training of '{kid}'")
+    return True
+
+  ##
+  # Collects the outcome of finished worker processes and commits the models of
+  # finished trainings. Has to be called with `condition` held, so a training
+  # can not be cancelled while its model is committed.
+  def reap(self) -> None:
+    for kid, training in list(self.running.items()):
+      if training.Process.is_alive():
+        continue
+      training.Process.join()
+      status, error = STATUS_FAILED, f"exit code {training.Process.exitcode}"
+      if training.Conn.poll():
+        status, error = training.Conn.recv()
+      training.Conn.close()
+      del self.running[kid]
+
+      if status == STATUS_DONE:
+        folder = os.path.join(self.Root, kid)
+        try:
+          with GetLock(folder):
+            CommitModel(folder, training.Staged)
+        except Exception as err:
+          status, error = STATUS_FAILED, f"{type(err).__name__}: {err}"
+      removeStaged(training.Staged)
+
+      fields = {
+          "finished": str(datetime.now()),
+          "duration": round(time.monotonic() - training.Started, 3)
+      }
+      if error is not None:
+        fields["error"] = error
+      self.setStatus(kid, status, **fields)
+      Io.Info(f"Training of '{kid}' {status} after {fields['duration']}s")
+
+  ##
+  # Loop of dispatcher thread. Starts worker processes for queued trainings,
+  # as long as the concurrency limit allows it, and collects finished ones.
+  def dispatch(self) -> None:
+    while True:
+      with self.condition:
+        self.reap()
+        while self.queued and len(self.running) < self.Config.Workers:
+          kid, request = self.queued.popitem(last=False)
+          self.start(kid, request)
+        self.condition.wait(timeout=1)
+
+  ##
+  # Starts the worker process for a KNG. Has to be called with `condition`
+  # held.
+  #
+  # @param  kid   id of KNG
+  # @param  request   training request
+  def start(self, kid: str, request: TrainingRequest) -> None:
+    folder = os.path.join(self.Root, kid)
+    staged = os.path.join(folder, STAGED_MODEL_FILE.format(uuid.uuid4().hex))
+    recvConn, sendConn = self.context.Pipe(duplex=False)
+    process = self.context.Process(target=TrainModel,
+                                   args=(folder,
+                                         self.Config.Profiles[request.Profile],
+                                         request.WarmStart, staged, sendConn),
+                                   name=f"ppw-train-{kid}",
+                                   daemon=True)
+    process.start()
+    # only the worker writes to the pipe
+    sendConn.close()
+    self.running[kid] = RunningTraining(process, recvConn, time.monotonic(),
+                                        staged)
+    self.setStatus(kid, STATUS_RUNNING, started=str(datetime.now()))
+    Io.Info(f"Started training of '{kid}' (pid {process.pid})")
+
+  ##
+  # Returns the training status of a KNG from the queue.
+  #
+  # @param  kid   id of KNG
+  #
+  # @return status and position in queue, None if KNG is neither queued nor
+  # running
+  def Status(self, kid: str) -> Optional[Dict[str, Any]]:
+    with self.condition:
+      if kid in self.running:
+        return {"status": STATUS_RUNNING, "position": 0}
+      if kid in self.queued:
+        return {
+            "status": STATUS_QUEUED,
+            "position": list(self.queued).index(kid) + 1
+        }
+    return None
+
+  ##
+  # Terminates all running worker processes and removes their staged models.
+  def Stop(self) -> None:
+    with self.condition:
+      for training in self.running.values():
+        training.Process.terminate()
+      for training in self.running.values():
+        training.Process.join()
+        removeStaged(training.Staged)
+
+
+##
+# Methods of TrainingQueue, that can be called by a TrainingClient.
+TRAINING_METHODS = ("Submit", "Cancel", "Status")
+
+
+##
+# Client of a training queue served by Paperwrite.Remote.Serve in another
+# process, as `training`. Offers the methods of TrainingQueue used by the
+# handlers.
+class TrainingClient(RemoteClient):
+
+  ##
+  # Constructor
+  #
+  # @param  address   address of listener serving the queue
+  # @param  authkey   key authenticating the client
+  def __init__(self, address: str, authkey: bytes) -> None:
+    super().__init__(address, authkey, "training")
+
+  ##
+  # @see
+  #  - TrainingQueue.Submit
+  def Submit(self,
+             kid: str,
+             profile: Optional[str] = None,
+             warmStart: bool = False) -> Dict[str, Any]:
+    return self.call("Submit", kid, profile, warmStart)
+
+  ##
+  # @see
+  #  - TrainingQueue.Cancel
+  def Cancel(self, kid: str) -> bool:
+    return self.call("Cancel", kid)
+
+  ##
+  # @see
+  #  - TrainingQueue.Status
+  def Status(self, kid: str) -> Optional[Dict[str, Any]]:
+    return self.call("Status", kid)
@@ -0,0 +1,85 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Triples
+# @namespace Paperwrite.Kng.Triples
+#
+# Package containing the post-processing of extracted triples. Whitespace is
+# normalized, incomplete triples are dropped and duplicates are merged into a
+# single triple with its number of occurrences. All steps work on whole arrays
+# instead of single rows.
+
+# -- STL
+from typing import List, NamedTuple
+
+# -- LIBRARY
+import numpy as np
+
+##
+# Values marking a triple as incomplete.
+INVALID_VALUES = ["", "undefined"]
+
+##
+# Normalizes the whitespace of all values of an array.
+normalizeWhitespace = np.frompyfunc(lambda val: " ".join(val.split()), 1, 1)
+
+
+##
+# Deduplicated set of triples.
+#
+# @param  Triples   `np.ndarray` -- unique `[subject, relation, object]`
+# triples as `N x 3` array of strings, in order of first occurrence
+# @param  Counts  `np.ndarray` -- number of occurrences of every triple as `N`
+# array of integers
+class TripleSet(NamedTuple):
+  Triples: np.ndarray
+  Counts: np.ndarray
+
+
+##
+# Creates an empty set of triples.
+#
+# @return empty set of triples
+def EmptyTripleSet() -> TripleSet:
+  return TripleSet(np.empty((0, 3), dtype=str), np.empty(0, dtype=np.int64))
+
+
+##
+# Merges duplicate triples and sums up their counts. The order of first
+# occurrence is kept, so triples of `triples` keep their position.
+#
+# @param  triples   triples as `N x 3` array of strings
+# @param  counts  number of occurrences of every triple
+#
+# @return deduplicated set of triples
+def Deduplicate(triples: np.ndarray, counts: np.ndarray) -> TripleSet:
+  if len(triples) == 0:
+    return EmptyTripleSet()
+
+  unique, index, inverse = np.unique(triples,
+                                     axis=0,
+                                     return_index=True,
+                                     return_inverse=True)
+  sums = np.bincount(inverse.reshape(-1), weights=counts, minlength=len(unique))
+  order = np.argsort(index, kind="stable")
+  return TripleSet(unique[order], sums[order].astype(np.int64))
+
+
+##
+# Normalizes extracted triples. Whitespace inside of values is collapsed into
+# single spaces, triples with empty or undefined values are dropped and
+# duplicates are merged.
+#
+# @param  rows  extracted `[subject, relation, object]` triples
+#
+# @return deduplicated set of triples
+def NormalizeTriples(rows: List[List[str]]) -> TripleSet:
+  if len(rows) == 0:
+    return EmptyTripleSet()
+
+  triples = normalizeWhitespace(np.asarray(rows, dtype=object))
+  triples = triples.astype(str).reshape(-1, 3)
+  valid = ~np.isin(triples, INVALID_VALUES).any(axis=1)
+  triples = triples[valid]
+  return Deduplicate(triples, np.ones(len(triples), dtype=np.int64))
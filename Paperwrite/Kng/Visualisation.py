@@ -0,0 +1,158 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng.Visualisation
+# @namespace Paperwrite.Kng.Visualisation
+#
+# Package containing the pyvis visualisation of a KNG. A visualisation can be
+# rendered from scratch or extended with new triples in place. Extending adds
+# statements for the new nodes and edges after the datasets embedded in the html
+# file, so the existing graph is not parsed again. The file and its compressed
+# copy are still rewritten as a whole. pyvis is only imported, once a
+# visualisation is rendered from scratch. Every visualisation gets a gzip
+# compressed copy next to it, which is served to clients accepting gzip.
+
+# -- STL
+import gzip
+import json
+from typing import Dict, Iterable, List, Optional
+
+# -- PROJECT
+from Paperwrite.Kng.Store import WriteAtomic
+
+##
+# Prefix of the line holding the nodes inside of a pyvis html file.
+NODES_PREFIX = "nodes = new vis.DataSet("
+
+##
+# Prefix of the line holding the edges inside of a pyvis html file.
+EDGES_PREFIX = "edges = new vis.DataSet("
+
+##
+# Suffix of the node and edge lines inside of a pyvis html file.
+DATASET_SUFFIX = ");"
+
+##
+# Prefix of the lines adding nodes to a pyvis html file.
+NODES_APPEND_PREFIX = "nodes.update("
+
+##
+# Prefix of the lines adding edges to a pyvis html file.
+EDGES_APPEND_PREFIX = "edges.add("
+
+##
+# Prefixes of all lines added to a pyvis html file.
+APPEND_PREFIXES = (NODES_APPEND_PREFIX, EDGES_APPEND_PREFIX)
+
+##
+# Font of nodes, matches the font color of RenderGraph.
+NODE_FONT = {"color": "white"}
+
+##
+# Suffix of the gzip compressed copy of a visualisation.
+GZIP_SUFFIX = ".gz"
+
+##
+# Compression level of the gzip compressed copy. The copy is compressed once per
+# build, but served on every request, so the highest level is used.
+GZIP_LEVEL = 9
+
+
+##
+# Writes the gzip compressed copy of a visualisation. Has to be called after
+# every change of the visualisation, so the copy is not older than it.
+#
+# @param  path  path to html file
+def CompressGraph(path: str) -> None:
+  with open(path, "rb") as f:
+    data = f.read()
+  WriteAtomic(f"{path}{GZIP_SUFFIX}", gzip.compress(data, GZIP_LEVEL), "wb")
+
+
+##
+# Renders the visualisation of a graph and saves it as html file.
+#
+# @param  triples   iterable of `[subject, relation, object]` triples
+# @param  path  path to html file
+def RenderGraph(triples: Iterable[List[str]], path: str) -> None:
+  from pyvis.network import Network
+
+  net = Network(height="100%",
+                width="100%",
+                bgcolor='#141519',
+                font_color='white',
+                directed=True)
+  for kngSet in triples:
+    net.add_node(kngSet[0], label=kngSet[0])
+    net.add_node(kngSet[2], label=kngSet[2])
+    net.add_edge(kngSet[0], kngSet[2], label=kngSet[1])
+  net.toggle_drag_nodes(False)
+  net.save_graph(path)
+  CompressGraph(path)
+
+
+##
+# Finds the line of a dataset inside of a pyvis html file.
+#
+# @param  lines   lines of html file
+# @param  prefix  prefix of dataset line
+#
+# @return index of line, None if the line was not found
+def findDataset(lines: List[str], prefix: str) -> Optional[int]:
+  for index, line in enumerate(lines):
+    stripped = line.strip()
+    if stripped.startswith(prefix) and stripped.endswith(DATASET_SUFFIX):
+      return index
+  return None
+
+
+##
+# Adds triples to an existing visualisation in place. The new nodes and edges
+# are added to the datasets by statements following the datasets, so the
+# existing nodes and edges are neither parsed nor serialized again. Nodes
+# already in the graph are updated with the same values.
+#
+# @param  triples   iterable of new `[subject, relation, object]` triples
+# @param  path  path to html file
+#
+# @return True if the visualisation was extended, False if the file does not
+# contain a pyvis graph and has to be rendered from scratch
+def AppendGraph(triples: Iterable[List[str]], path: str) -> bool:
+  try:
+    with open(path, "r") as f:
+      lines = f.read().split("\n")
+  except FileNotFoundError:
+    return False
+
+  nodesIndex = findDataset(lines, NODES_PREFIX)
+  edgesIndex = findDataset(lines, EDGES_PREFIX)
+  if nodesIndex is None or edgesIndex is None:
+    return False
+
+  nodes: Dict[str, dict] = {}
+  edges: List[dict] = []
+  for kngSet in triples:
+    subj, rel, obj = str(kngSet[0]), str(kngSet[1]), str(kngSet[2])
+    for n in (subj, obj):
+      nodes[n] = {"font": NODE_FONT, "id": n, "label": n, "shape": "dot"}
+    edges.append({"arrows": "to", "from": subj, "label": rel, "to": obj})
+  if not edges:
+    return True
+
+  # statements of previous appends follow the datasets, keep them in order and
+  # the indentation of the datasets
+  index = max(nodesIndex, edgesIndex) + 1
+  while index < len(lines) and lines[index].strip().startswith(APPEND_PREFIXES):
+    index += 1
+  indent = lines[edgesIndex][:len(lines[edgesIndex]) -
+                             len(lines[edgesIndex].lstrip())]
+  lines[index:index] = [
+      f"{indent}{NODES_APPEND_PREFIX}{json.dumps(list(nodes.values()))}"
+      f"{DATASET_SUFFIX}",
+      f"{indent}{EDGES_APPEND_PREFIX}{json.dumps(edges)}{DATASET_SUFFIX}"
+  ]
+
+  WriteAtomic(path, "\n".join(lines))
+  CompressGraph(path)
+  return True
@@ -0,0 +1,11 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Kng
+# @namespace Paperwrite.Kng
+#
+# Package containing the building blocks for creating, storing and querying
+# knowledge graphs (KNG). Subpackages are not imported here, because most of
+# them pull in heavy libraries (spaCy, tika, numpy) and should only be loaded by
+# the handlers that actually need them.
@@ -0,0 +1,283 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Prefork
+# @namespace Paperwrite.Prefork
+#
+# Package containing the pre-fork mode of the webserver. The main process binds
+# the listening socket and loads everything the workers share (handlers, nlp
+# pipelines, models), before it forks the worker processes. Memory loaded before
+# forking is shared by all workers copy-on-write, so every worker has its own
+# GIL without loading pipelines and models again. All workers accept requests
+# from the same socket.
+#
+# Background services (jobs, trainings, tika) run in one additional service
+# process. The main process only supervises its children and restarts them, as
+# soon as they exit. It never starts threads, so forking a replacement is always
+# safe.
+#
+# @example
+# ~~~{.py}
+# server = PreforkServer(provider, AppContext.Config.Webserver, runServices,
+#                        initWorker)
+# server.Run()
+# ~~~
+
+# -- STL
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict, NamedTuple
+
+# -- LIBRARY
+from flask import Flask
+from waitress import serve
+
+# -- PROJECT
+from Paperwrite.Configuration import WebserverConfiguration
+from Paperwrite.PyAdditions import Io
+
+##
+# Name of the process running the background services.
+ROLE_SERVICES = "services"
+
+##
+# Maximum number of pending connections of the listening socket.
+BACKLOG = 1024
+
+##
+# Minimum time in seconds between two starts of the same child, so a crashing
+# child is not restarted in a busy loop.
+RESTART_DELAY = 1.0
+
+##
+# Time in seconds children get to stop, before they are killed.
+STOP_TIMEOUT = 10.0
+
+##
+# Interval in seconds in which the main process checks its children.
+SUPERVISE_INTERVAL = 0.2
+
+##
+# Signals, that stop the server.
+STOP_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+##
+# Child process of the server.
+#
+# @param  Role  `str` -- name of child (`services` or `worker-<n>`)
+# @param  Target  `Callable[[], None]` -- function run by child
+# @param  Started   `float` -- monotonic time the child was started
+class ChildProcess(NamedTuple):
+  Role: str
+  Target: Callable[[], None]
+  Started: float
+
+
+##
+# Raises SystemExit, so a child runs its cleanup when it is stopped.
+#
+# @param  signum  number of received signal
+# @param  frame   current stack frame
+def raiseExit(signum: int, frame) -> None:
+  raise SystemExit(0)
+
+
+##
+# Converts the status of a terminated process into its exit code.
+#
+# @param  status  status returned by `os.waitpid`
+#
+# @return exit code, negative signal number if process was killed
+def exitCode(status: int) -> int:
+  if os.WIFSIGNALED(status):
+    return -os.WTERMSIG(status)
+  return os.WEXITSTATUS(status)
+
+
+##
+# Pre-fork server, that serves a Flask application from multiple worker
+# processes.
+class PreforkServer():
+
+  ##
+  # @var Provider
+  # Flask application served by the workers
+  Provider: Flask
+
+  ##
+  # @var Config
+  # configuration from `webserver`-block from configuration file
+  Config: WebserverConfiguration
+
+  ##
+  # @var RunServices
+  # function running the background services in the service process, blocks
+  # until the process is stopped
+  RunServices: Callable[[], None]
+
+  ##
+  # @var InitWorker
+  # function preparing a worker process, before it serves requests
+  InitWorker: Callable[[], None]
+
+  ##
+  # @var socket
+  # internal listening socket shared by all workers
+  socket: socket.socket
+
+  ##
+  # @var children
+  # internal map of running children per pid
+  children: Dict[int, ChildProcess]
+
+  ##
+  # @var stopping
+  # internal flag, set once the server is stopped
+  stopping: bool
+
+  ##
+  # @var deadline
+  # internal monotonic time, after which remaining children are killed
+  deadline: float
+
+  ##
+  # Constructor. Does not bind the socket.
+  #
+  # @param  provider  Flask application served by the workers
+  # @param  config  configuration from `webserver`-block from configuration
+  # file
+  # @param  runServices   function running the background services, blocks
+  # until the process is stopped
+  # @param  initWorker  function preparing a worker process
+  def __init__(self, provider: Flask, config: WebserverConfiguration,
+               runServices: Callable[[], None],
+               initWorker: Callable[[], None]) -> None:
+    self.Provider = provider
+    self.Config = config
+    self.RunServices = runServices
+    self.InitWorker = initWorker
+    self.socket = None
+    self.children = {}
+    self.stopping = False
+    self.deadline = 0.0
+
+  ##
+  # Binds the socket, starts all children and supervises them, until the
+  # server receives SIGINT or SIGTERM.
+  def Run(self) -> None:
+    host, port = self.Config.Host, self.Config.Port
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    self.socket = socket.socket(family, socket.SOCK_STREAM)
+    self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    self.socket.bind((host, port))
+    self.socket.listen(BACKLOG)
+
+    for signum in STOP_SIGNALS:
+      signal.signal(signum, self.stop)
+
+    self.start(ChildProcess(ROLE_SERVICES, self.RunServices, 0.0))
+    for i in range(self.Config.Workers):
+      self.start(ChildProcess(f"worker-{i}", self.serveWorker, 0.0))
+    self.supervise()
+
+    self.socket.close()
+    Io.Info("Stopped all workers")
+
+  ##
+  # Forks a child. Stop signals are blocked while forking, so they are only
+  # handled once the child has installed its own handlers.
+  #
+  # @param  child   child to start
+  def start(self, child: ChildProcess) -> None:
+    signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+    pid = os.fork()
+    if pid == 0:
+      self.runChild(child)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+    self.children[pid] = child._replace(Started=time.monotonic())
+
+  ##
+  # Runs the target of a child inside of the forked process. Never returns.
+  #
+  # @param  child   child to run
+  def runChild(self, child: ChildProcess) -> None:
+    code = 0
+    try:
+      self.children = {}
+      # the main process stops all children with SIGTERM
+      signal.signal(signal.SIGINT, signal.SIG_IGN)
+      signal.signal(signal.SIGTERM, raiseExit)
+      signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+      Io.Info(f"Started {child.Role} (pid {os.getpid()})")
+      child.Target()
+    except SystemExit as err:
+      code = err.code if isinstance(err.code, int) else 0
+    except BaseException as err:
+      Io.Critical(f"{child.Role} failed: {type(err).__name__}: {err}")
+      code = 1
+    finally:
+      # never return into the code of the main process
+      os._exit(code)
+
+  ##
+  # Target of worker processes. Serves requests from the shared socket.
+  def serveWorker(self) -> None:
+    self.InitWorker()
+    serve(self.Provider, sockets=[self.socket])
+
+  ##
+  # Signal handler of the main process. Forwards SIGTERM to all children.
+  #
+  # @param  signum  number of received signal
+  # @param  frame   current stack frame
+  def stop(self, signum: int, frame) -> None:
+    if self.stopping:
+      return
+    Io.Info("Stopping workers")
+    self.stopping = True
+    self.deadline = time.monotonic() + STOP_TIMEOUT
+    self.signalChildren(signal.SIGTERM)
+
+  ##
+  # Sends a signal to all running children.
+  #
+  # @param  signum  signal to send
+  def signalChildren(self, signum: int) -> None:
+    for pid in list(self.children):
+      try:
+        os.kill(pid, signum)
+      except ProcessLookupError:
+        pass
+
+  ##
+  # Waits for children to exit and restarts them, until the server is stopped
+  # and all children have exited.
+  def supervise(self) -> None:
+    while self.children:
+      try:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+      except ChildProcessError:
+        return
+
+      if pid == 0:
+        if self.stopping and time.monotonic() > self.deadline:
+          Io.Warning("Killing workers, that did not stop in time")
+          self.signalChildren(signal.SIGKILL)
+        time.sleep(SUPERVISE_INTERVAL)
+        continue
+
+      child = self.children.pop(pid, None)
+      if child is None or self.stopping:
+        continue
+      Io.Error(f"{child.Role} (pid {pid}) exited with code "
+               f"{exitCode(status)}, restarting")
+      delay = RESTART_DELAY - (time.monotonic() - child.Started)
+      if delay > 0:
+        time.sleep(delay)
+      # the server may have been stopped in the meantime
+      if not self.stopping:
+        self.start(child)
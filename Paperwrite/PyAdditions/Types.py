@@ -6,13 +6,17 @@
 # @namespace Paperwrite.PyAdditions.Types
 #
 # Package containing extra general types and patterns not included in STL for
-# Python. Adds GoF pattern singleton.
+# Python. Adds GoF pattern singleton and lazily imported functions.
 
 # -- FUTURE (subject to change, handle with care)
 #from __future__ import annotations
 
 # -- STL
-from typing import Any, Dict, TypeVar, Type
+import importlib
+import sys
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, TypeVar, Type
 import warnings
 
 ##
@@ -102,3 +106,125 @@ class SingletonMeta(type):
 #  - SingletonMeta
 class Singleton(metaclass=SingletonMeta):
   pass
+
+
+##
+# Cost of importing a module.
+#
+# @param  Module  `str` -- name of module
+# @param  Seconds   `float` -- wall time of import in seconds
+# @param  Modules   `int` -- number of modules newly loaded by the import
+# (including dependencies)
+class ImportCost(NamedTuple):
+  Module: str
+  Seconds: float
+  Modules: int
+
+
+##
+# Imports a module and measures the cost of its import. Modules, that are
+# already loaded, cost nothing.
+#
+# @param  name  name of module
+#
+# @return module and cost of import
+def ImportModule(name: str) -> Tuple[Any, ImportCost]:
+  loaded = len(sys.modules)
+  started = time.perf_counter()
+  module = importlib.import_module(name)
+  return module, ImportCost(name,
+                            time.perf_counter() - started,
+                            len(sys.modules) - loaded)
+
+
+##
+# Reference to a function given as `"<module>:<function>"`, that imports its
+# module on first call. Can be used in place of the function, so modules with
+# heavy dependencies are only imported once they are needed.
+#
+# @example
+# ~~~{.py}
+# func = LazyFunction("Paperwrite.Handlers.GetKngList:GetKngList")
+# response = func()  # imports Paperwrite.Handlers.GetKngList
+# ~~~
+class LazyFunction():
+
+  ##
+  # @var Module
+  # name of module containing the function
+  Module: str
+
+  ##
+  # @var __name__
+  # name of function
+  __name__: str
+
+  ##
+  # @var Cost
+  # cost of importing the module, None until the function is resolved
+  Cost: Optional[ImportCost]
+
+  ##
+  # @var func
+  # internal resolved function, None until first call
+  func: Optional[Callable[..., Any]]
+
+  ##
+  # @var lock
+  # internal lock, that ensures the module is imported once
+  lock: Lock
+
+  ##
+  # Constructor
+  #
+  # @param  ref   reference to function as `"<module>:<function>"`
+  #
+  # @throws ValueError if `ref` is not of scheme `"<module>:<function>"`
+  def __init__(self, ref: str) -> None:
+    module, sep, name = ref.partition(":")
+    if not sep or not module or not name:
+      raise ValueError(f"expected '<module>:<function>', got '{ref}'")
+    self.Module = module
+    self.__name__ = name
+    self.Cost = None
+    self.func = None
+    self.lock = Lock()
+
+  ##
+  # Checks if the function has been imported.
+  #
+  # @return True if the module of the function has been imported
+  def Resolved(self) -> bool:
+    return self.func is not None
+
+  ##
+  # Imports the module of the function, if it has not been imported yet.
+  #
+  # @return function
+  #
+  # @throws ImportError if the module can not be imported
+  # @throws AttributeError if the module has no such function
+  def Resolve(self) -> Callable[..., Any]:
+    if self.func is None:
+      with self.lock:
+        if self.func is None:
+          module, cost = ImportModule(self.Module)
+          func = getattr(module, self.__name__)
+          self.Cost = cost
+          self.func = func
+    return self.func
+
+  ##
+  # Calls the function, imports its module on first call.
+  #
+  # @param  *args   variable length argument list
+  # @param  **kwargs  arbitrary keyword arguments
+  #
+  # @return result of function
+  def __call__(self, *args: Any, **kwargs: Any) -> Any:
+    return self.Resolve()(*args, **kwargs)
+
+  ##
+  # @return reference to function as `"<module>:<function>"`
+  def __repr__(self) -> str:
+    return f"LazyFunction('{self.Module}:{self.__name__}')"
@@ -0,0 +1,133 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.Remote
+# @namespace Paperwrite.Remote
+#
+# Package containing the calls between the processes of the pre-fork mode (see
+# Paperwrite.Prefork). The service process serves its queues (trainings, jobs)
+# on a local socket, the worker processes call them through a RemoteClient.
+# Only the methods registered for an object can be called.
+#
+# @example
+# ~~~{.py}
+# # service process
+# with Listener(address, "AF_UNIX", authkey=authkey) as listener:
+#   Serve({"training": RemoteObject(queue, ("Submit",))}, listener)
+#
+# # worker process
+# RemoteClient(address, authkey, "training").call("Submit", kid)
+# ~~~
+
+# -- STL
+import multiprocessing
+from multiprocessing.connection import Client, Connection, Listener
+from threading import Thread
+from typing import Any, Dict, NamedTuple, Tuple
+
+# -- PROJECT
+from Paperwrite.PyAdditions import Io
+from Paperwrite.PyAdditions.Errors import NotSupportedError
+
+
+##
+# Object served to other processes.
+#
+# @param  Object  `Any` -- object calls are forwarded to
+# @param  Methods   `Tuple[str, ...]` -- names of methods, that can be called
+class RemoteObject(NamedTuple):
+  Object: Any
+  Methods: Tuple[str, ...]
+
+
+##
+# Answers the calls of a single client, until it closes the connection.
+#
+# @param  objects   served objects by name
+# @param  conn  connection to client
+def serveConnection(objects: Dict[str, RemoteObject], conn: Connection) -> None:
+  with conn:
+    while True:
+      try:
+        name, method, args = conn.recv()
+      except EOFError:
+        return
+      try:
+        remote = objects.get(name)
+        if remote is None or method not in remote.Methods:
+          raise NotSupportedError(f"method '{name}.{method}' can not be called")
+        conn.send((None, getattr(remote.Object, method)(*args)))
+      except Exception as err:
+        conn.send((err, None))
+
+
+##
+# Serves objects to the RemoteClient of other processes, so all processes share
+# the same objects. Every connection is handled by its own thread. Blocks until
+# the listener is closed.
+#
+# @param  objects   served objects by name
+# @param  listener  listener accepting connections of clients
+def Serve(objects: Dict[str, RemoteObject], listener: Listener) -> None:
+  while True:
+    try:
+      conn = listener.accept()
+    except OSError:
+      return
+    except multiprocessing.AuthenticationError:
+      Io.Warning("Rejected remote client with wrong authkey")
+      continue
+    Thread(target=serveConnection,
+           args=(objects, conn),
+           name="ppw-remote-client",
+           daemon=True).start()
+
+
+##
+# Client of an object served by Serve in another process. Every call opens its
+# own connection, so the client survives a restart of the serving process.
+class RemoteClient():
+
+  ##
+  # @var Address
+  # address of listener serving the object
+  Address: str
+
+  ##
+  # @var Name
+  # name the object is served as
+  Name: str
+
+  ##
+  # @var authkey
+  # internal key authenticating the client
+  authkey: bytes
+
+  ##
+  # Constructor
+  #
+  # @param  address   address of listener serving the object
+  # @param  authkey   key authenticating the client
+  # @param  name  name the object is served as
+  def __init__(self, address: str, authkey: bytes, name: str) -> None:
+    self.Address = address
+    self.Name = name
+    self.authkey = authkey
+
+  ##
+  # Calls a method of the served object.
+  #
+  # @param  method  name of method
+  # @param  *args   arguments of method
+  #
+  # @return result of method
+  #
+  # @throws Exception raised by method
+  def call(self, method: str, *args: Any) -> Any:
+    with Client(self.Address, authkey=self.authkey) as conn:
+      conn.send((self.Name, method, args))
+      err, result = conn.recv()
+    if err is not None:
+      raise err
+    return result
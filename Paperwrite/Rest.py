@@ -11,7 +11,7 @@
 from enum import Enum
 from datetime import datetime
 import os
-from typing import Any, Dict, List, NoReturn
+from typing import Any, Dict, List, NoReturn, Optional
 import io
 
 # -- LIBRARY
@@ -721,6 +721,48 @@ def CreateResponseHTML(status: HttpStatus, path: str) -> Response:
   return make_response(render_template_string(data), status.value)
 
 
+##
+# Creates a flask.Response serving a static file. The response carries an ETag
+# and Last-Modified of the file, so clients revalidate with conditional
+# requests and get `304 Not Modified` as long as the file is unchanged. Clients
+# accepting gzip get the compressed copy of the file, if it is not older than
+# the file. The file is handed to the WSGI server as file wrapper, so it is
+# streamed without being read into Python.
+#
+# @param  path  path to file
+# @param  mimetype  mimetype of file
+# @param  gzipPath  path to gzip compressed copy of file, None if there is none
+#
+# @return   file as flask.Response with HTTP status 200 or 304
+def CreateResponseStatic(path: str,
+                         mimetype: str,
+                         gzipPath: Optional[str] = None) -> Response:
+  stat = os.stat(path)
+  etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+  # a copy older than the file belongs to a previous version of the file
+  encoded = False
+  if gzipPath is not None and "gzip" in request.accept_encodings:
+    try:
+      encoded = os.stat(gzipPath).st_mtime_ns >= stat.st_mtime_ns
+    except FileNotFoundError:
+      pass
+
+  response = send_file(gzipPath if encoded else path,
+                       mimetype=mimetype,
+                       conditional=True,
+                       etag=f"{etag}-gzip" if encoded else etag,
+                       last_modified=stat.st_mtime,
+                       max_age=0)
+  if encoded:
+    response.headers["Content-Encoding"] = "gzip"
+  if gzipPath is not None:
+    response.vary.add("Accept-Encoding")
+  Io.Debug(f"    => Outcome: {response.status_code}, "
+           f"{HttpStatus(response.status_code).Title()}")
+  return response
+
+
 ##
 # Validates a dictionary based on a protype, which describes the types and
 # existence for keys and values in dictionary.
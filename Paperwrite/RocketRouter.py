@@ -5,7 +5,27 @@
 # @package   Paperwrite.RocketRouter
 # @namespace Paperwrite.RocketRouter
 #
-# Package containing REST routing capabilities of RocketRouter.
+# Package containing REST routing capabilities of RocketRouter. Handlers can be
+# mounted as function or as reference `"<module>:<function>"`, which imports the
+# module of the handler on its first request (see
+# Paperwrite.PyAdditions.Types.LazyFunction). Modules of handlers often depend
+# on heavy libraries (spaCy, pyvis, ...), so importing them lazily keeps startup
+# time and memory of the API low.
+#
+# Routes are stored in a trie with one level per path segment. Literal segments
+# are looked up by name, variables are matched by the regex of their type. At
+# every level candidates are tried in a fixed order of precedence:
+#
+#  1. literal segment
+#  2. `uuid4`
+#  3. `int64`
+#  4. `float64`
+#  5. `str`
+#
+# If a candidate does not lead to a route, the next one is tried. Matching
+# therefore costs O(path segments), independent of the number of mounted
+# routes, and a path always matches the same route, no matter in which order
+# routes were mounted. Segments have to match completely.
 
 # -- FUTURE (subject to change, handle with care)
 #from __future__ import annotations
@@ -16,7 +36,7 @@ import re
 from datetime import datetime
 from enum import Enum
 from types import FunctionType
-from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Tuple, Union
 
 # -- LIBRARY
 from flask import Response, request, Flask
@@ -26,6 +46,7 @@ from flask_cors import CORS
 from Paperwrite.Application import AppContext
 from Paperwrite.PyAdditions import Io
 from Paperwrite.PyAdditions.Errors import NotSupportedError, Error
+from Paperwrite.PyAdditions.Types import ImportCost, LazyFunction
 from Paperwrite.Rest import CreateResponseJson, HttpStatus, RespondWithError
 
 
@@ -68,6 +89,18 @@ class RocketPathVariableTypes(Enum):
   # `float64` -- floats 64bit
   FLOAT64 = RocketPathVariableTypesRepresentation(float, "[-+]?\d*\.?\d+|\d+")
 
+  @staticmethod
+  ##
+  # Returns all types in order of precedence, in which they are tried when a
+  # path segment is matched.
+  #
+  # @return list of enum-objects, most specific type first
+  def Precedence() -> list:
+    return [
+        RocketPathVariableTypes.UUID4, RocketPathVariableTypes.INT64,
+        RocketPathVariableTypes.FLOAT64, RocketPathVariableTypes.STR
+    ]
+
   @staticmethod
   ##
   # Converts enum-object in string descriptor in lowercase.
@@ -186,6 +219,77 @@ class RocketTemplatedPath():
     self.HttpMethodsMap.Register(acceptedHttpMethods, functionPtr)
 
 
+##
+# Node of the route trie. Every node represents one path segment.
+class RocketRouteNode():
+
+  ##
+  # @var Literals
+  # Child nodes of literal segments by segment.
+  Literals: Dict[str, "RocketRouteNode"]
+
+  ##
+  # @var Variables
+  # Child nodes of variable segments by type, in order of precedence.
+  Variables: List[Tuple[RocketPathVariableTypes, Pattern, "RocketRouteNode"]]
+
+  ##
+  # @var Template
+  # Templated path ending at this node, None if no route ends here.
+  Template: Optional[RocketTemplatedPath]
+
+  ##
+  # Constructor
+  def __init__(self) -> None:
+    self.Literals = {}
+    self.Variables = []
+    self.Template = None
+
+  ##
+  # Returns the child node of a variable type, creates it if it does not exist.
+  #
+  # @param  vartype   type of variable as enum-object
+  #
+  # @return child node of type
+  def VariableChild(self,
+                    vartype: RocketPathVariableTypes) -> "RocketRouteNode":
+    for t, _, node in self.Variables:
+      if t is vartype:
+        return node
+
+    node = RocketRouteNode()
+    self.Variables.append((vartype, re.compile(vartype.value.regex), node))
+    precedence = RocketPathVariableTypes.Precedence()
+    self.Variables.sort(key=lambda v: precedence.index(v[0]))
+    return node
+
+  ##
+  # Finds the templated path matching path segments, starting at this node.
+  #
+  # @param  modules   segments of path
+  # @param  index   index of segment matched by the children of this node
+  #
+  # @return templated path, None if no route matches
+  def Find(self, modules: List[str],
+           index: int) -> Optional[RocketTemplatedPath]:
+    if index == len(modules):
+      return self.Template
+
+    mod = modules[index]
+    child = self.Literals.get(mod)
+    if child is not None:
+      template = child.Find(modules, index + 1)
+      if template is not None:
+        return template
+
+    for _, regex, child in self.Variables:
+      if regex.fullmatch(mod) is not None:
+        template = child.Find(modules, index + 1)
+        if template is not None:
+          return template
+    return None
+
+
 ##
 # Returned tuple on a specific path with mapped variables and function.
 #
@@ -205,13 +309,20 @@ class RocketRouter():
 
   ##
   # @var routes
-  # Internal map for template-routes.
-  routes: Dict[Pattern, RocketTemplatedPath]
+  # Internal map for template-routes, by their path with variable names removed
+  # (e.g. "kng/{str}/details").
+  routes: Dict[str, RocketTemplatedPath]
+
+  ##
+  # @var root
+  # Internal root node of the route trie.
+  root: RocketRouteNode
 
   ##
   # Constructor
   def __init__(self) -> None:
     self.routes = {}
+    self.root = RocketRouteNode()
 
   ##
   # Registers a handler function for a specific template-route. Variables have
@@ -219,18 +330,22 @@ class RocketRouter():
   # RocketPathVariableTypes).
   #
   # @param  templatedPathStr   template path for route
-  # @param  functionPtr  function that should be run on route-match
+  # @param  functionPtr  function that should be run on route-match, or
+  # reference to it as `"<module>:<function>"`, that is imported on first match
   # @param  acceptedHttpMethods  list of HTTP Methods that are accepted
-  def Mount(self, templatedPathStr: str, functionPtr: FunctionType,
+  def Mount(self, templatedPathStr: str, functionPtr: Union[FunctionType, str],
             acceptedHttpMethods: List[str]) -> None:
+    if isinstance(functionPtr, str):
+      functionPtr = LazyFunction(functionPtr)
     # split route into individual modules
     modules = templatedPathStr.split("/")
     modules = list(filter(("").__ne__, modules))
     # initialize list for varibles found in path
     variables = []
+    node = self.root
 
-    # convert variable modules to regex and save information about position,
-    # type and name of variable in variables list.
+    # walk down the trie along the modules, creating missing nodes, and save
+    # information about position, type and name of variables in variables list.
     for index, mod in enumerate(modules):
       # check if module is variable
       if mod.startswith("{"):
@@ -238,18 +353,28 @@ class RocketRouter():
         varname, vartype = tuple(mod[1:-1].split(":"))
         vartype = RocketPathVariableTypes.FromStr(vartype)
         variables.append(RocketPathVariable(index, vartype.value.t, varname))
-        # convert variable-template to regex
-        modules[index] = vartype.value.regex
-
-    # convert whole path to single regex expression
-    regex = re.compile("/".join(modules))
-    # register route-template under regex in container 'routes'
-    if self.routes.get(regex) is None:
-      self.routes[regex] = RocketTemplatedPath(templatedPathStr, variables,
-                                               functionPtr, acceptedHttpMethods)
+        node = node.VariableChild(vartype)
+        # variable names do not distinguish routes
+        modules[index] = "{" + RocketPathVariableTypes.ToStr(vartype) + "}"
+      else:
+        node = node.Literals.setdefault(mod, RocketRouteNode())
+
+    # register route-template at its node and in container 'routes'
+    if node.Template is None:
+      node.Template = RocketTemplatedPath(templatedPathStr, variables,
+                                          functionPtr, acceptedHttpMethods)
+      self.routes["/".join(modules)] = node.Template
     else:
-      self.routes[regex].HttpMethodsMap.Register(acceptedHttpMethods,
-                                                 functionPtr)
+      node.Template.HttpMethodsMap.Register(acceptedHttpMethods, functionPtr)
+
+  ##
+  # Finds the template-route matching a route.
+  #
+  # @param  route   api path with variables set
+  #
+  # @return templated path, None if no route matches
+  def Find(self, route: str) -> Optional[RocketTemplatedPath]:
+    return self.root.Find(route.split("/"), 0)
 
   ##
   # Will try to find a match for a given route in internal template-paths. If
@@ -264,26 +389,14 @@ class RocketRouter():
   # `Error(Msg, HttpStatus)`.
   def Match(self, route: str,
             httpApiFunc: str) -> Tuple[RocketSpecificPath, Error]:
-    templates = []
     modules = route.split("/")
     variables = {}
 
-    # get templates that match regex and path
-    for regex, template in self.routes.items():
-      if regex.match(route) is not None:
-        templates.append(template)
-
-    # only one template should be returned for a route. If more then one are
-    # returned, raise RuntimeError. If none was found, return None for route.
-    if len(templates) != 1:
-      if len(templates) > 1:
-        return None, Error("to many matched routes found",
-                           HttpStatus.MULTIPLE_CHOICES)
+    # get template from trie, precedence decides between overlapping routes
+    template = self.Find(route)
+    if template is None:
       return None, Error("no matching routes could be found",
                          HttpStatus.NOT_FOUND)
-
-    # rename templates[0] for easier writing
-    template = templates[0]
     # map values for variables into dictionary (values are casted as represented
     # types)
     for var in template.TemplatedPathVariables:
@@ -300,6 +413,40 @@ class RocketRouter():
              f"{template.TemplatedPathStr}")
     return RocketSpecificPath(variables, functionPtr), None
 
+  ##
+  # Returns all handlers mounted as reference, that have not been imported yet.
+  #
+  # @return unresolved handlers
+  def unresolved(self) -> List[LazyFunction]:
+    return [
+        f for t in self.routes.values()
+        for f in t.HttpMethodsMap.FunctionsLookup.values()
+        if isinstance(f, LazyFunction) and not f.Resolved()
+    ]
+
+  ##
+  # Imports a handler mounted as reference and logs the cost of its import.
+  #
+  # @param  handler   handler mounted as reference
+  def resolve(self, handler: LazyFunction) -> None:
+    handler.Resolve()
+    cost = handler.Cost
+    Io.Info(f"    => Imported {cost.Module} in {cost.Seconds:.3f}s "
+            f"({cost.Modules} modules)")
+
+  ##
+  # Imports all handlers mounted as reference, so no request has to wait for an
+  # import.
+  #
+  # @return cost of import per module of handler
+  def Preload(self) -> List[ImportCost]:
+    costs = []
+    for handler in self.unresolved():
+      if not handler.Resolved():
+        self.resolve(handler)
+        costs.append(handler.Cost)
+    return costs
+
   ##
   # Prints detailed debug information on router.
   #
@@ -382,6 +529,10 @@ class RocketRouter():
       Io.Debug(f"    => Matching Error: {err.args[0]}")
       RespondWithError(err.args[1], err.args[0])
 
+    # import handler on its first request
+    if isinstance(route.Function, LazyFunction) and not route.Function.Resolved():
+      self.resolve(route.Function)
+
     # if route was found execute handler and pass variables
     return route.Function(**route.Vars)
 
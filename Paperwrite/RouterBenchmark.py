@@ -0,0 +1,117 @@
+##
+# @file
+# @author Hendrik Boeck <hendrikboeck.dev@protonmail.com>
+#
+# @package   Paperwrite.RouterBenchmark
+# @namespace Paperwrite.RouterBenchmark
+#
+# Package containing the microbenchmark of route matching of RocketRouter. For
+# every number of routes in `ROUTE_COUNTS` a router with synthetic routes is
+# built, mixing literal and all types of variable segments. The time of matching
+# random paths of mounted routes is measured. As routes are matched by a trie,
+# the time per match should not grow with the number of routes. Every path has
+# to match the template it was generated for, including paths whose segments
+# are matched by multiple routes and have to be resolved by precedence.
+#
+# @example
+# ~~~{.sh}
+# python -m Paperwrite benchmark-router
+# ~~~
+
+# -- STL
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+
+# -- PROJECT
+from Paperwrite.PyAdditions import Io
+from Paperwrite.RocketRouter import RocketRouter
+
+##
+# Numbers of mounted routes, that are benchmarked.
+ROUTE_COUNTS = [10, 100, 1000, 10000]
+
+##
+# Number of matched paths per number of routes.
+LOOKUPS = 100000
+
+##
+# Seed of the selection of matched paths.
+SEED = 555
+
+
+##
+# Handler of all benchmarked routes, never called.
+def benchmarkHandler(**kwargs: Any) -> None:
+  pass
+
+
+##
+# Builds a router with synthetic routes. Every group of routes shares its prefix
+# and contains literal routes, routes with variables of every type and routes
+# competing for the same segments. Competing routes are mounted with the least
+# specific type first, so precedence does not follow the order of mounting.
+#
+# @param  count   number of routes
+#
+# @return router and a path of every route with the templated path string it
+# has to match
+def buildRouter(count: int) -> Tuple[RocketRouter, List[Tuple[str, str]]]:
+  router = RocketRouter()
+  uuidStr = str(uuid.uuid4())
+  templates = [
+      ("/bench/{}/list", "bench/{}/list"),
+      ("/bench/{}/{{id:int64}}/details", "bench/{}/42/details"),
+      ("/bench/{}/{{kid:str}}/items/{{iid:uuid4}}",
+       "bench/{}/kng_bench/items/" + uuidStr),
+      ("/bench/{}/{{x:float64}}/score", "bench/{}/0.5/score"),
+      # segments matched by multiple routes: literal before uuid4 before int64
+      # before float64 before str
+      ("/prec/{}/{{name:str}}", "prec/{}/kng_bench"),
+      ("/prec/{}/{{x:float64}}", "prec/{}/0.5"),
+      ("/prec/{}/{{id:int64}}", "prec/{}/42"),
+      ("/prec/{}/{{iid:uuid4}}", "prec/{}/" + uuidStr),
+      ("/prec/{}/latest", "prec/{}/latest"),
+      # a less specific type matches, if the more specific one has no route
+      ("/prec/{}/{{id:int64}}/first", "prec/{}/42/first"),
+      ("/prec/{}/{{name:str}}/second", "prec/{}/42/second"),
+  ]
+
+  routes = []
+  for i in range(count):
+    template, path = templates[i % len(templates)]
+    group = i // len(templates)
+    router.Mount(template.format(group), benchmarkHandler, ["GET"])
+    routes.append((path.format(group), template.format(group)))
+  return router, routes
+
+
+##
+# Runs the benchmark of route matching and logs its results.
+#
+# @return time of a single match in microseconds per number of routes
+def RunRouterBenchmark() -> Dict[int, float]:
+  rng = random.Random(SEED)
+  results = {}
+  for count in ROUTE_COUNTS:
+    router, routes = buildRouter(count)
+    lookups = [rng.choice(routes) for _ in range(LOOKUPS)]
+
+    started = time.perf_counter()
+    for path, _ in lookups:
+      router.Find(path)
+    elapsed = time.perf_counter() - started
+
+    # every path has to match the route it was generated for
+    mismatches = 0
+    for path, expected in routes:
+      template = router.Find(path)
+      if template is None or template.TemplatedPathStr != expected:
+        mismatches += 1
+    if mismatches > 0:
+      raise RuntimeError(f"{mismatches} path(s) matched the wrong route")
+
+    results[count] = elapsed / LOOKUPS * 1e6
+    Io.Info(f"    => {count} routes: {results[count]:.2f} us per match")
+  return results
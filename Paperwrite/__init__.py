@@ -20,3 +20,5 @@ from . import Application
 from . import Configuration
 from . import Rest
 from . import RocketRouter
+from . import Prefork
+from . import RouterBenchmark
@@ -8,40 +8,161 @@
 # Main package containing Main function of program, as well as all subpackages
 # used in Paperwrite.
 
+# -- STL
+import atexit
+import os
+import sys
+import tempfile
+from multiprocessing.connection import Listener
+
 # -- LIBRARY
 from waitress import serve
 
 # -- PROJECT
-from Paperwrite.Application import AppContext
+from Paperwrite.Application import AppContext, COMMAND_BENCHMARK_ROUTER, COMMAND_BENCHMARK_TRAINING, COMMAND_MIGRATE_STORE
+from Paperwrite.Kng.Benchmark import RunBenchmark
+from Paperwrite.Kng.Build import AppendKng, CreateKng, WithUploads, JOB_APPEND, JOB_CREATE
+from Paperwrite.Kng.Jobs import JobClient, JOB_METHODS
+from Paperwrite.Kng.Store import MigrateStore
+from Paperwrite.Kng.Training import TrainingClient, TRAINING_METHODS
+from Paperwrite.Prefork import PreforkServer
 from Paperwrite.PyAdditions import Io
+from Paperwrite.Remote import RemoteObject, Serve
 from Paperwrite.RocketRouter import RocketRouter
-from Paperwrite.Handlers.PostKngCreate import PostKngCreate
-from Paperwrite.Handlers.GetKngList import GetKngList
-from Paperwrite.Handlers.GetKngVisualisation import GetKngVisualisation
-from Paperwrite.Handlers.GetKngDetails import GetKngDetails
-from Paperwrite.Handlers.GetKngTrainModel import GetKngTrainModel
-from Paperwrite.Handlers.PostKngPredict import PostKngPredict
+from Paperwrite.RouterBenchmark import RunRouterBenchmark
+
+
+##
+# Starts the background services (tika, jobs, trainings) and stops them on exit.
+def startServices() -> None:
+  # start warm pool of tika servers and stop it on exit
+  atexit.register(AppContext.Tika.Stop)
+  AppContext.Tika.Start()
+
+  # process queued jobs in background, including jobs of previous runs
+  AppContext.Jobs.Start()
+
+  # train models in worker processes and terminate them on exit
+  atexit.register(AppContext.Training.Stop)
+  AppContext.Training.Start()
+
+
+##
+# Serves the API from forked worker processes (see Paperwrite.Prefork). The
+# background services run in their own process, which serves the training queue
+# and the job queue to the workers (see Paperwrite.Remote).
+#
+# @param  provider  Flask application of router
+def servePrefork(provider) -> None:
+  address = os.path.join(tempfile.mkdtemp(prefix="ppw-"), "services.sock")
+  authkey = os.urandom(32)
+
+  def runServices() -> None:
+    try:
+      startServices()
+      # socket of a previous service process may still exist
+      if os.path.exists(address):
+        os.remove(address)
+      with Listener(address, "AF_UNIX", authkey=authkey) as listener:
+        services = {
+            "training": RemoteObject(AppContext.Training, TRAINING_METHODS),
+            "jobs": RemoteObject(AppContext.Jobs, JOB_METHODS),
+        }
+        Serve(services, listener)
+    finally:
+      AppContext.Training.Stop()
+      AppContext.Tika.Stop()
+
+  def initWorker() -> None:
+    AppContext.Training = TrainingClient(address, authkey)
+    AppContext.Jobs = JobClient(address, authkey, AppContext.Jobs)
+
+  PreforkServer(provider, AppContext.Config.Webserver, runServices,
+                initWorker).Run()
 
 
 ##
 # Main function of program. Refrenced in `setup.cfg` as `entry_point`. This
 # function can be used for production.
 def Main() -> None:
+  # run maintenance commands instead of serving the API
+  if AppContext.Command == COMMAND_MIGRATE_STORE:
+    Io.Info(f"Migrating store at '{AppContext.Store.Mutable}'")
+    migrated = MigrateStore(AppContext.Store.Mutable)
+    Io.Info(f"Migrated {migrated} knowledge graph(s)")
+    return
+  if AppContext.Command == COMMAND_BENCHMARK_TRAINING:
+    report = RunBenchmark(AppContext.Config.Benchmark,
+                          AppContext.Config.Training, AppContext.Store.Mutable)
+    Io.Info(f"Wrote report of {len(report['runs'])} run(s) to "
+            f"'{AppContext.Config.Benchmark.Output}'")
+    return
+  if AppContext.Command == COMMAND_BENCHMARK_ROUTER:
+    Io.Info("Benchmarking route matching")
+    RunRouterBenchmark()
+    return
+
   # initializing router
   router = RocketRouter()
 
-  # mount all routes to router
-  router.Mount("/kng/list", GetKngList, ["GET"])
-  router.Mount("/kng/{kid:str}/details", GetKngDetails, ["GET"])
-  router.Mount("/kng/{kid:str}/visualisation.html", GetKngVisualisation,
+  # mount all routes to router, handlers are imported on their first request
+  router.Mount("/kng/list", "Paperwrite.Handlers.GetKngList:GetKngList",
+               ["GET"])
+  router.Mount("/kng/{kid:str}/details",
+               "Paperwrite.Handlers.GetKngDetails:GetKngDetails", ["GET"])
+  router.Mount("/kng/{kid:str}/visualisation.html",
+               "Paperwrite.Handlers.GetKngVisualisation:GetKngVisualisation",
+               ["GET"])
+  router.Mount("/kng/{kid:str}/create",
+               "Paperwrite.Handlers.PostKngCreate:PostKngCreate", ["POST"])
+  router.Mount("/kng/{kid:str}/append",
+               "Paperwrite.Handlers.PostKngAppend:PostKngAppend", ["POST"])
+  router.Mount("/kng/{kid:str}/predict",
+               "Paperwrite.Handlers.PostKngPredict:PostKngPredict", ["POST"])
+  router.Mount("/kng/{kid:str}/predict_batch",
+               "Paperwrite.Handlers.PostKngPredictBatch:PostKngPredictBatch",
+               ["POST"])
+  router.Mount("/kng/{kid:str}/complete",
+               "Paperwrite.Handlers.GetKngComplete:GetKngComplete", ["GET"])
+  router.Mount("/kng/{kid:str}/similar",
+               "Paperwrite.Handlers.GetKngSimilar:GetKngSimilar", ["GET"])
+  router.Mount("/kng/{kid:str}/train_model",
+               "Paperwrite.Handlers.GetKngTrainModel:GetKngTrainModel",
+               ["GET"])
+  router.Mount("/kng/{kid:str}/train_model",
+               "Paperwrite.Handlers.DeleteKngTrainModel:DeleteKngTrainModel",
+               ["DELETE"])
+  router.Mount("/jobs/{jid:uuid4}", "Paperwrite.Handlers.GetJob:GetJob",
                ["GET"])
-  router.Mount("/kng/{kid:str}/create", PostKngCreate, ["POST"])
-  router.Mount("/kng/{kid:str}/predict", PostKngPredict, ["POST"])
-  router.Mount("/kng/{kid:str}/train_model", GetKngTrainModel, ["GET"])
+  router.Mount("/models/stats",
+               "Paperwrite.Handlers.GetModelStats:GetModelStats", ["GET"])
 
   # build Flask provider from router
   provider = router.Build()
 
+  # report modules imported so far and import handlers, if configured
+  Io.Info(f"Imported {len(sys.modules)} modules on startup")
+  if AppContext.Config.Webserver.PreloadHandlers:
+    Io.Info("Preloading handlers")
+    costs = router.Preload()
+    Io.Info(f"Imported {len(costs)} handler(s) in "
+            f"{sum(c.Seconds for c in costs):.3f}s")
+
+  # load spaCy pipelines, before the first request arrives
+  if AppContext.Config.Nlp.Preload:
+    Io.Info("Preloading nlp pipelines")
+    AppContext.Nlp.Preload()
+
+  # load models, before the first prediction arrives
+  if AppContext.Config.Models.Preload:
+    Io.Info("Preloading models")
+    loaded = AppContext.Models.Preload(AppContext.Store.Mutable)
+    Io.Info(f"Loaded {loaded} model(s)")
+
+  # every process can submit jobs, only the background services process them
+  AppContext.Jobs.Register(JOB_CREATE, WithUploads(CreateKng))
+  AppContext.Jobs.Register(JOB_APPEND, WithUploads(AppendKng))
+
   # getting server information
   host = AppContext.Config.Webserver.Host
   port = AppContext.Config.Webserver.Port
@@ -52,7 +173,15 @@ def Main() -> None:
   for r in apiRoutes:
     Io.Info(f"    => {r}")
 
+  # fork workers, that share everything loaded so far
+  workers = AppContext.Config.Webserver.Workers
+  if workers > 0:
+    Io.Info(f"Forking {workers} worker(s)")
+    servePrefork(provider)
+    return
+
   # server Flask with waitress
+  startServices()
   serve(provider, host=host, port=port)
 
 
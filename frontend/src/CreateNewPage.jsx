@@ -19,6 +19,7 @@ import {
   EuiCallOut,
   EuiPageHeader,
   EuiCode,
+  EuiProgress,
 } from '@elastic/eui';
 
 const CreateNewPage = () => {
@@ -39,6 +40,17 @@ const CreateNewPage = () => {
   var [overwriteKng, setOverwriteKng] = useState(true);
   var [files, setFiles] = useState([]);
   var [kngName, setKngName] = useState("kng");
+  var [job, setJob] = useState(null);
+
+  const pollJob = (jid) => {
+    axios.get(`http://127.0.0.1:44777/jobs/${jid}`)
+      .then((res) => {
+        setJob(res.data);
+        if (res.data.status === "queued" || res.data.status === "running") {
+          setTimeout(() => pollJob(jid), 1000);
+        }
+      });
+  };
 
   const onFileUpload = () => {
     const formData = new FormData();
@@ -55,7 +67,11 @@ const CreateNewPage = () => {
     }
 
     console.log(files);
-    axios.post(`http://127.0.0.1:44777/kng/${kngName}/create`, formData);
+    axios.post(`http://127.0.0.1:44777/kng/${kngName}/create`, formData)
+      .then((res) => {
+        setJob({ status: res.data.status, progress: 0, message: "" });
+        pollJob(res.data.job);
+      });
   };
 
   return (
@@ -128,7 +144,27 @@ const CreateNewPage = () => {
               title: "Finish",
               children: (
                 <>
-                  <EuiButton iconType="arrowRight" iconSide="right" onClick={onFileUpload}>Upload</EuiButton>
+                  <EuiButton iconType="arrowRight" iconSide="right" onClick={onFileUpload}
+                    isDisabled={job !== null && (job.status === "queued" || job.status === "running")}>Upload</EuiButton>
+                  {job !== null ?
+                    <>
+                      <EuiSpacer />
+                      {job.status === "failed" ?
+                        <EuiCallOut title="Creation failed" color="danger" iconType="alert">
+                          <p>{job.error}</p>
+                        </EuiCallOut> :
+                        job.status === "done" ?
+                          <EuiCallOut title="Knowledge graph created" color="success" iconType="check">
+                            <p>The knowledge graph '{kngName}' has been created.</p>
+                          </EuiCallOut> :
+                          <EuiProgress
+                            value={Math.round(job.progress * 100)}
+                            max={100}
+                            size="m"
+                            valueText={true}
+                            label={job.status === "queued" ? "Queued" : job.message}
+                          />}
+                    </> : null}
                 </>
               ),
             }
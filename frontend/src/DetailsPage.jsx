@@ -59,7 +59,7 @@ const DetailsPage = () => {
                   onClick={() => {
                     axios.get(`http://127.0.0.1:44777/kng/${kid}/train_model`)
                       .then(resp => {
-                        if (resp.status === 200) {
+                        if (resp.status === 202) {
                           setUpdate(update + 1);
                         }
                       })
@@ -88,6 +88,9 @@ const DetailsPage = () => {
               description: (
                 <>
                   {resp.data.ai_models}
+                  {resp.data.training !== undefined &&
+                    <> (training: {resp.data.training.status})</>
+                  }
                   <EuiSpacer size='s' />
                   <div style={{ display: "flex" }}>
                     <EuiFieldSearch